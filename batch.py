@@ -0,0 +1,201 @@
+# -*- coding: utf-8 -*-
+"""
+Command line entry point for batch processing without the GUI.
+
+Runs (I - ISET)^2 maps and l0 calculations over whole directories, e.g.:
+
+    python -m batch data/scans --type s94 --iset 0.1 --operations iset-map l0
+    python -m batch "data/**/*.mpp" --type mpp --iset 0.5 --summary l0.csv
+    python -m batch data/scans --type stp --iset-range 0 1 0.05 --operations l0-sweep --summary l0.csv
+
+@author: rlewandkow
+"""
+
+import os, sys
+
+sys.path.insert(1, "/".join(os.path.realpath(__file__).split("/")[0:-1]))
+
+import argparse
+import csv
+import glob
+import json
+import logging
+
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import config
+from data.files.load_files import read_file
+from data.processing.file_process import (
+    process_stp_files_I_ISET_map, process_s94_files_I_ISET_map,
+    process_mpp_files_I_ISET_map, process_stp_and_s94_files_l0,
+    process_mpp_files_l0, process_mpp_files_l0_from_I_ISET_map,
+    process_stp_and_s94_files_l0_from_I_ISET_map, convert_s94_files_to_stp,
+    process_files_l0_sweep, create_ISET_range
+)
+
+logger = logging.getLogger(__name__)
+
+FILE_TYPES = (".s94", ".stp", ".mpp")
+
+# Operations available from the command line
+OPERATIONS = ("iset-map", "l0", "l0-from-map", "l0-sweep", "convert")
+
+# Operations which need an ISET value
+ISET_OPERATIONS = ("iset-map", "l0", "l0-sweep")
+
+def find_files(paths, file_type):
+    """
+    Find files of the given type.
+
+    Args:
+        paths (list): Directories, files or glob patterns.
+        file_type (str): File extension, e.g. ".s94".
+
+    Returns:
+        list: Sorted paths of the matching files.
+    """
+    files = set()
+    for path in paths:
+        if os.path.isdir(path):
+            candidates = [os.path.join(path, file) for file in os.listdir(path)]
+        else:
+            candidates = glob.glob(path, recursive=True)
+        files.update(file for file in candidates if os.path.isfile(file) and file.lower().endswith(file_type))
+    return sorted(files)
+
+def process_file(file_path, file_type, isets, operations):
+    """
+    Read one file and run the operations on it.
+
+    Args:
+        file_path (str): Path of the file.
+        file_type (str): File extension.
+        isets (list): ISET values.
+        operations (list): Names of the operations to run.
+
+    Returns:
+        list: l0 summary records, see create_l0_result.
+
+    Raises:
+        ValueError: If the file could not be read.
+        Exception: Any error of the operations, so the file is reported as failed.
+    """
+    data_set = read_file(file_path, file_type)
+    if data_set is None:
+        raise ValueError("file could not be read")
+    data = [data_set]
+
+    results = []
+    for operation in operations:
+        if operation == "convert":
+            if file_type == ".s94":
+                convert_s94_files_to_stp(data_set, raise_errors=True)
+        elif operation == "l0-sweep":
+            # l0 for all ISET values from one pass over the data
+            results += process_files_l0_sweep(data, isets, raise_errors=True)
+        elif operation == "l0-from-map":
+            if file_type == ".mpp":
+                results += process_mpp_files_l0_from_I_ISET_map(data, raise_errors=True)
+            else:
+                results += process_stp_and_s94_files_l0_from_I_ISET_map(data, raise_errors=True)
+        else:
+            for ISET in isets:
+                if operation == "iset-map":
+                    if file_type == ".stp":
+                        process_stp_files_I_ISET_map(data, ISET, raise_errors=True)
+                    elif file_type == ".s94":
+                        process_s94_files_I_ISET_map(data, ISET, raise_errors=True)
+                    elif file_type == ".mpp":
+                        process_mpp_files_I_ISET_map(data, ISET, raise_errors=True)
+                elif operation == "l0":
+                    if file_type == ".mpp":
+                        results += process_mpp_files_l0(data, ISET, raise_errors=True)
+                    else:
+                        results += process_stp_and_s94_files_l0(data, ISET, raise_errors=True)
+    return results
+
+def write_summary(summary_path, results):
+    """Write l0 summary records to a .json or .csv file."""
+    if summary_path.lower().endswith(".json"):
+        with open(summary_path, "w") as file:
+            json.dump(results, file, indent=2)
+    else:
+        with open(summary_path, "w", newline="") as file:
+            writer = csv.DictWriter(file, fieldnames=["file_name", "frame", "ISET", "l0", "error"])
+            writer.writeheader()
+            writer.writerows(results)
+
+def run_batch(files, file_type, isets, operations, max_workers=None):
+    """
+    Run the operations over files in a process pool.
+
+    Progress is printed as files finish. A failing file is reported in the summary
+    and does not stop the batch.
+
+    Args:
+        files (list): Paths of the files.
+        file_type (str): File extension.
+        isets (list): ISET values.
+        operations (list): Names of the operations to run.
+        max_workers (int, optional): Number of worker processes.
+
+    Returns:
+        list: l0 summary records in file order; failed files have an 'error' key.
+    """
+    results = [None] * len(files)
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        futures = {executor.submit(process_file, file, file_type, isets, operations): i for i, file in enumerate(files)}
+        for done, future in enumerate(as_completed(futures), start=1):
+            i = futures[future]
+            try:
+                results[i] = future.result()
+                status = "ok"
+            except Exception as e:
+                error_msg = f"run_batch: Error processing file '{files[i]}': {e}"
+                logger.error(error_msg)
+                results[i] = [{"file_name": files[i], "frame": None, "ISET": None, "l0": None, "error": str(e)}]
+                status = f"error: {e}"
+            print(f"[{done}/{len(files)}] {os.path.basename(files[i])}: {status}", flush=True)
+    return [result for file_results in results for result in file_results]
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m batch", description="Calculate (I - ISET)^2 maps and l0 without the GUI.")
+    parser.add_argument("paths", nargs="+", help="directories, files or glob patterns")
+    parser.add_argument("--type", required=True, choices=[t[1:] for t in FILE_TYPES], help="file type")
+    parser.add_argument("--iset", nargs="+", type=float, default=[], help="ISET value(s)")
+    parser.add_argument("--iset-range", nargs=3, type=float, metavar=("START", "STOP", "STEP"), help="ISET values from START to STOP (inclusive)")
+    parser.add_argument("--operations", nargs="+", choices=OPERATIONS, default=["l0"], help="operations to run (default: l0)")
+    parser.add_argument("--workers", type=int, default=None, help="number of worker processes (default: number of CPUs)")
+    parser.add_argument("--summary", help="write an l0 summary to this .json or .csv file")
+    args = parser.parse_args(argv)
+
+    file_type = "." + args.type
+    if args.iset_range:
+        try:
+            args.iset += create_ISET_range(*args.iset_range)
+        except ValueError as e:
+            parser.error(str(e))
+    if any(operation in ISET_OPERATIONS for operation in args.operations) and not args.iset:
+        parser.error("--iset is required for operations: " + ", ".join(ISET_OPERATIONS))
+    if "iset-map" in args.operations and len(args.iset) > 1:
+        # Maps for every ISET would be written to the same I-ISETmap file
+        parser.error("iset-map takes a single --iset value")
+    if args.workers is not None and args.workers < 1:
+        parser.error("--workers must be a positive integer")
+
+    files = find_files(args.paths, file_type)
+    if not files:
+        print("No files found.")
+        return 1
+
+    print(f"Processing {len(files)} {args.type} files: {', '.join(args.operations)}", flush=True)
+    results = run_batch(files, file_type, args.iset, args.operations, args.workers)
+    if args.summary:
+        write_summary(args.summary, results)
+        print(f"Summary saved as {args.summary}")
+
+    return 1 if any("error" in result for result in results) else 0
+
+if __name__ == '__main__':
+    config.setup_logging()
+    sys.exit(main())
@@ -0,0 +1,53 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmark for the background estimation used by AdaptiveLeveling.
+
+Compares the exact disk opening with the decomposed and pyramid methods on a
+synthetic STM-like image: speed and difference of the background.
+
+@author: rlewandkow
+"""
+
+import os, sys
+
+sys.path.insert(1, "/".join(os.path.realpath(__file__).split("/")[0:-2]))
+
+import time
+import numpy as np
+
+from data.processing.preprocessing.leveling import estimate_background
+
+SIZE = 512
+RADII = (10, 25, 50)
+METHODS = ("decomposed", "pyramid")
+
+def synthetic_image(size, seed=0):
+    """Tilted, curved background with bright spots and noise, as uint8."""
+    rng = np.random.default_rng(seed)
+    y, x = np.mgrid[0:size, 0:size] / size
+    image = 60 * x + 40 * y + 30 * (x - 0.5) ** 2
+    centres = rng.integers(0, size, size=(200, 2))
+    yy, xx = np.mgrid[0:size, 0:size]
+    for cy, cx in centres:
+        image += 80 * np.exp(-((yy - cy) ** 2 + (xx - cx) ** 2) / 30.0)
+    image += rng.normal(scale=3, size=image.shape)
+    return np.clip(image, 0, 255).astype(np.uint8)
+
+def timed(method, image, radius):
+    start = time.perf_counter()
+    background = estimate_background(image, radius, method)
+    return background, time.perf_counter() - start
+
+def main():
+    image = synthetic_image(SIZE)
+    for radius in RADII:
+        exact, t_exact = timed("disk", image, radius)
+        line = f"r={radius:3d}: exact {t_exact * 1e3:8.1f} ms"
+        for method in METHODS:
+            background, t_method = timed(method, image, radius)
+            diff = np.abs(background.astype(np.float64) - exact)
+            line += f" | {method} {t_method * 1e3:7.1f} ms ({t_exact / t_method:5.1f}x, mean diff {diff.mean():.3f}, max {diff.max():.0f})"
+        print(line)
+
+if __name__ == '__main__':
+    main()
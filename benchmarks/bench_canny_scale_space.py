@@ -0,0 +1,72 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmark for the Canny scale space of the detection sigma slider.
+
+Scrubs the sigma slider back and forth on a large synthetic scan and compares
+running the Canny edge detector for every value with revisiting sigma values
+whose edge candidates are kept.
+
+@author: rlewandkow
+"""
+
+import os, sys
+
+sys.path.insert(1, "/".join(os.path.realpath(__file__).split("/")[0:-2]))
+
+import time
+import cv2
+import numpy as np
+from PIL import Image
+
+from data.processing.detection.edge_detection import CannyScaleSpace, EdgeDetection
+from ui.main_window.tabs.detection.detection_operations import ScaleSpaceCache, create_sigma_data
+
+SIZE = 2048
+SIGMAS = [round(0.5 + 0.25 * i, 2) for i in range(12)]
+FILTER_PARAMS = {'min_area_[nm2]': 1.0, 'max_area_[nm2]': 500.0, 'circularity_low': 0.1, 'circularity_high': 0.9}
+
+def make_scan(rng):
+    img = np.zeros((SIZE, SIZE), dtype=np.uint8)
+    for x, y in rng.integers(0, SIZE, size=(3000, 2)):
+        cv2.circle(img, (int(x), int(y)), int(rng.integers(3, 12)), int(rng.integers(80, 255)), -1)
+    return np.clip(img + rng.normal(0, 20, img.shape), 0, 255).astype(np.uint8)
+
+def main():
+    img = make_scan(np.random.default_rng(0))
+
+    start = time.perf_counter()
+    reference = [EdgeDetection(img, sigma) for sigma in SIGMAS]
+    t_canny = (time.perf_counter() - start) / len(SIGMAS)
+
+    scale_space = CannyScaleSpace(img)
+    start = time.perf_counter()
+    first = [scale_space.edges(sigma) for sigma in SIGMAS]
+    t_first = (time.perf_counter() - start) / len(SIGMAS)
+    start = time.perf_counter()
+    revisited = [scale_space.edges(sigma) for sigma in SIGMAS[::-1]][::-1]
+    t_revisit = (time.perf_counter() - start) / len(SIGMAS)
+    same = all((a == b).all() and (a == c).all() for a, b, c in zip(reference, first, revisited))
+
+    print(f"{SIZE}x{SIZE}, {len(SIGMAS)} sigma values:")
+    print(f"  edges: canny {t_canny * 1e3:6.1f} ms | first visit {t_first * 1e3:6.1f} ms | "
+          f"revisit {t_revisit * 1e3:6.1f} ms ({t_canny / t_revisit:4.1f}x), same edges: {same}, "
+          f"kept {scale_space._size / 2**20:.1f} MB")
+
+    # Whole slider tick, with contour extraction and filtering
+    pil_img = Image.fromarray(img)
+    start = time.perf_counter()
+    for sigma in SIGMAS:
+        create_sigma_data(pil_img, sigma, "Canny", FILTER_PARAMS, 0.04, True)
+    t_tick = (time.perf_counter() - start) / len(SIGMAS)
+    cache = ScaleSpaceCache()
+    for sigma in SIGMAS:
+        create_sigma_data(pil_img, sigma, "Canny", FILTER_PARAMS, 0.04, True, cache)
+    start = time.perf_counter()
+    for sigma in SIGMAS[::-1]:
+        create_sigma_data(pil_img, sigma, "Canny", FILTER_PARAMS, 0.04, True, cache)
+    t_tick_cached = (time.perf_counter() - start) / len(SIGMAS)
+    print(f"  slider tick: uncached {t_tick * 1e3:6.1f} ms | revisited sigma {t_tick_cached * 1e3:6.1f} ms "
+          f"({t_tick / t_tick_cached:4.1f}x)")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,65 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmark for rendering images on the canvas.
+
+Compares resizing the whole image for every zoom step with rendering only
+the visible region of the canvas from an image pyramid.
+
+@author: rlewandkow
+"""
+
+import os, sys
+
+sys.path.insert(1, "/".join(os.path.realpath(__file__).split("/")[0:-2]))
+
+import time
+import numpy as np
+from PIL import Image
+
+from ui.main_window.tabs.canvas_operations import (
+    ImagePyramid,
+    VIEWPORT_MARGIN,
+    scale_factor_resize_image
+)
+
+PANEL_SIZE = 2048
+VIEWPORT = (1200, 800)
+SCALES = (0.25, 0.5, 1.0, 2.0, 4.0)
+REPEATS = 3
+
+def make_four_panel_image():
+    """2x2 panels, as the detection tab shows the processed images side by side."""
+    rng = np.random.default_rng(0)
+    y, x = np.mgrid[0:PANEL_SIZE, 0:PANEL_SIZE]
+    smooth = 127.5 + 127.5 * np.sin(x / 37.0) * np.cos(y / 53.0)
+    panels = [np.clip(smooth + rng.normal(0, 10, smooth.shape), 0, 255).astype(np.uint8) for _ in range(4)]
+    grid = np.block([[panels[0], panels[1]], [panels[2], panels[3]]])
+    return Image.fromarray(grid).convert("RGB")
+
+def timed(function):
+    start = time.perf_counter()
+    for _ in range(REPEATS):
+        result = function()
+    return (time.perf_counter() - start) / REPEATS, result
+
+def main():
+    img = make_four_panel_image()
+    pyramid = ImagePyramid(img)
+    for scale in SCALES:
+        width, height = pyramid.scaled_size(scale)
+        # Centre of the image, with the margin the renderer adds
+        x0 = max(width // 2 - VIEWPORT[0] // 2 - VIEWPORT_MARGIN, 0)
+        y0 = max(height // 2 - VIEWPORT[1] // 2 - VIEWPORT_MARGIN, 0)
+        region = (x0, y0, min(x0 + VIEWPORT[0] + 2 * VIEWPORT_MARGIN, width),
+                  min(y0 + VIEWPORT[1] + 2 * VIEWPORT_MARGIN, height))
+
+        t_full, full = timed(lambda: scale_factor_resize_image(img, scale))
+        t_view, tile = timed(lambda: pyramid.render_region(scale, region))
+        reference = np.asarray(full.crop(region), dtype=np.float64)
+        error = np.abs(np.asarray(tile, dtype=np.float64) - reference).mean()
+        print(f"{img.width}x{img.height} at {scale:4.2f}: full resize {t_full * 1e3:7.1f} ms | "
+              f"viewport {t_view * 1e3:6.1f} ms ({t_full / t_view:5.1f}x), "
+              f"mean abs difference {error:.2f}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,89 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmark for the nearest neighbour search of GetContourData.
+
+Compares the KD-tree version with the previous pairwise loop on synthetic
+spots and checks that both find the same neighbours.
+
+@author: rlewandkow
+"""
+
+import os, sys
+
+sys.path.insert(1, "/".join(os.path.realpath(__file__).split("/")[0:-2]))
+
+import time
+import cv2
+import numpy as np
+
+from data.processing.contours.contour_detection import (
+    ContourFinder,
+    GetContourData,
+    distance_between_points_in_nm
+)
+
+SPOT_COUNTS = (250, 500, 1000, 2000)
+X_COEFF, Y_COEFF = 0.19, 0.21
+
+def pairwise_contour_data(filtered_contours, x_size_coefficient, y_size_coefficient, avg_coefficient):
+    """The previous GetContourData, with the index 0 fix, as reference."""
+    contour_data = []
+    centroids = []
+    for contour in filtered_contours:
+        M = cv2.moments(contour)
+        if M["m00"] != 0:
+            centroids.append((int(M["m10"] / M["m00"]), int(M["m01"] / M["m00"])))
+
+    for i, contour in enumerate(filtered_contours):
+        distances_to_other_contours = []
+        min_distance = 0.0
+        min_index = -1
+        area = cv2.contourArea(contour)
+        M = cv2.moments(contour)
+        for j in range(len(filtered_contours)):
+            if i != j:
+                distance = distance_between_points_in_nm(centroids[i], centroids[j], x_size_coefficient, y_size_coefficient)
+                distances_to_other_contours.append((distance, j))
+        if distances_to_other_contours:
+            min_distance, min_index = min(distances_to_other_contours)
+        contour_data.append({
+            "name": f"{i:03}",
+            "contour": contour,
+            "area": area * avg_coefficient,
+            "moments": M,
+            "distance_to_nearest_neighbour": min_distance,
+            "nearest_neighbour": f"{min_index:03}"
+        })
+    return contour_data
+
+def make_spots(count, rng):
+    size = int(np.sqrt(count) * 40)
+    img = np.zeros((size, size), dtype=np.uint8)
+    for x, y in rng.integers(10, size - 10, size=(count, 2)):
+        cv2.circle(img, (int(x), int(y)), int(rng.integers(2, 6)), 255, -1)
+    return ContourFinder(img)
+
+def main():
+    rng = np.random.default_rng(0)
+    for count in SPOT_COUNTS:
+        contours = make_spots(count, rng)
+
+        start = time.perf_counter()
+        reference = pairwise_contour_data(contours, X_COEFF, Y_COEFF, X_COEFF * Y_COEFF)
+        t_pairwise = time.perf_counter() - start
+
+        start = time.perf_counter()
+        result = GetContourData(contours, X_COEFF, Y_COEFF, X_COEFF * Y_COEFF)
+        t_kdtree = time.perf_counter() - start
+
+        same = all(
+            a["nearest_neighbour"] == b["nearest_neighbour"]
+            and np.isclose(a["distance_to_nearest_neighbour"], b["distance_to_nearest_neighbour"])
+            and a["area"] == b["area"]
+            for a, b in zip(reference, result)
+        )
+        print(f"{len(contours):5d} contours: pairwise {t_pairwise * 1e3:9.1f} ms | "
+              f"KD-tree {t_kdtree * 1e3:6.1f} ms ({t_pairwise / t_kdtree:6.1f}x), same result: {same}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,70 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmark for filtering contours on a filter slider move.
+
+Compares measuring every contour again for each filter value, as
+ContourFilter did, with a mask over the contour feature table computed once
+per edge image.
+
+@author: rlewandkow
+"""
+
+import os, sys
+
+sys.path.insert(1, "/".join(os.path.realpath(__file__).split("/")[0:-2]))
+
+import time
+import cv2
+import numpy as np
+
+from data.processing.contours.contour_detection import (
+    AreaOfContour,
+    PerimieterOfContour,
+    FindCircularityOfContour,
+    ContourFinder
+)
+from data.processing.contours.contour_features import ContourFeatures
+
+SIZE = 2048
+SLIDER_VALUES = [(0.1 + 0.02 * i, 0.9, 2.0, 400.0) for i in range(20)]
+
+def loop_contour_filter(contours, circularity_low, circularity_high, min_area, max_area):
+    """The previous ContourFilter."""
+    filtered_contours = []
+    for contour in contours:
+        area = AreaOfContour(contour)
+        perimeter = PerimieterOfContour(contour)
+        circularity = FindCircularityOfContour(area, perimeter)
+        if circularity_low < circularity < circularity_high and max_area > area > min_area:
+            filtered_contours.append(contour)
+    return filtered_contours
+
+def main():
+    rng = np.random.default_rng(0)
+    noise = cv2.GaussianBlur(rng.random((SIZE, SIZE)).astype(np.float32), (0, 0), 3)
+    edges = cv2.Canny((noise * 255 / noise.max()).astype(np.uint8), 10, 30)
+    contours = ContourFinder(edges)
+
+    start = time.perf_counter()
+    loop_results = [loop_contour_filter(contours, *values) for values in SLIDER_VALUES]
+    t_loop = (time.perf_counter() - start) / len(SLIDER_VALUES)
+
+    start = time.perf_counter()
+    features = ContourFeatures.from_contours(contours)
+    t_table = time.perf_counter() - start
+
+    start = time.perf_counter()
+    mask_results = [features.select(features.filter_mask(*values)).contours for values in SLIDER_VALUES]
+    t_mask = (time.perf_counter() - start) / len(SLIDER_VALUES)
+
+    same = all(
+        len(a) == len(b) and all(x is y for x, y in zip(a, b))
+        for a, b in zip(loop_results, mask_results)
+    )
+    print(f"{len(contours)} contours, {len(SLIDER_VALUES)} slider moves:")
+    print(f"  measure per move: {t_loop * 1e3:7.2f} ms/move")
+    print(f"  feature table:    {t_table * 1e3:7.2f} ms once, {t_mask * 1e3:7.2f} ms/move "
+          f"({t_loop / t_mask:5.1f}x per move), same contours: {same}")
+
+if __name__ == '__main__':
+    main()
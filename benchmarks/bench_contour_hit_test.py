@@ -0,0 +1,81 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmark for finding the contour under the mouse.
+
+Compares testing every contour with cv2.pointPolygonTest, as the hover
+handler did, with the contour label raster.
+
+@author: rlewandkow
+"""
+
+import os, sys
+
+sys.path.insert(1, "/".join(os.path.realpath(__file__).split("/")[0:-2]))
+
+import time
+import cv2
+import numpy as np
+
+from data.processing.contours.contour_index import ContourLabelIndex, NO_CONTOUR
+from ui.main_window.tabs.detection.detection_operations import is_point_inside_contour
+
+SIZE = 2048
+SPOTS = 12000
+MOVES = 500
+
+def linear_scan(contours, x, y):
+    for i, contour in enumerate(contours):
+        if is_point_inside_contour((x, y), contour):
+            return i
+    return None
+
+def same_as_fresh_build(index, contours):
+    """Check if every pixel maps to the same contour as in an index built for the contours."""
+    fresh = ContourLabelIndex(contours)
+    positions = np.where(index.raster == NO_CONTOUR, NO_CONTOUR, index.positions[np.maximum(index.raster, 0)])
+    height = max(positions.shape[0], fresh.raster.shape[0])
+    width = max(positions.shape[1], fresh.raster.shape[1])
+    expected = np.full((height, width), NO_CONTOUR, dtype=np.int64)
+    expected[:fresh.raster.shape[0], :fresh.raster.shape[1]] = fresh.raster
+    found = np.full((height, width), NO_CONTOUR, dtype=np.int64)
+    found[:positions.shape[0], :positions.shape[1]] = positions
+    return np.array_equal(found, expected)
+
+def main():
+    rng = np.random.default_rng(0)
+    img = np.zeros((SIZE, SIZE), dtype=np.uint8)
+    for x, y in rng.integers(0, SIZE, size=(SPOTS, 2)):
+        cv2.circle(img, (int(x), int(y)), int(rng.integers(2, 8)), 255, -1)
+    contours = list(cv2.findContours(img, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)[0])
+    # Mouse positions on pixels, half of them inside spots
+    inside = [tuple(contour[0, 0]) for contour in rng.choice(np.array(contours, dtype=object), MOVES // 2)]
+    points = [(float(x), float(y)) for x, y in inside] + [tuple(map(float, p)) for p in rng.integers(0, SIZE, (MOVES // 2, 2))]
+
+    start = time.perf_counter()
+    scanned = [linear_scan(contours, x, y) for x, y in points]
+    t_scan = (time.perf_counter() - start) / len(points)
+
+    start = time.perf_counter()
+    index = ContourLabelIndex(contours)
+    t_build = time.perf_counter() - start
+    start = time.perf_counter()
+    found = [index.find(x, y) for x, y in points]
+    t_find = (time.perf_counter() - start) / len(points)
+
+    positions = [int(position) for position in rng.integers(0, len(contours) - 100, 20)]
+    start = time.perf_counter()
+    for position in positions:
+        index.remove(position)
+    t_remove = (time.perf_counter() - start) / 20
+    remaining = list(contours)
+    for position in positions:
+        remaining.pop(position)
+
+    print(f"{len(contours)} contours, {len(points)} mouse moves:")
+    print(f"  linear scan: {t_scan * 1e3:8.3f} ms/move")
+    print(f"  label index: {t_find * 1e3:8.4f} ms/move ({t_scan / t_find:7.0f}x), built in {t_build * 1e3:.1f} ms, "
+          f"remove {t_remove * 1e3:.2f} ms, same contours: {scanned == found}")
+    print(f"  index after removals equals a fresh build: {same_as_fresh_build(index, remaining)}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,88 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmark for saving detection results of the frames of a movie.
+
+Compares the memory and time of storing copy.deepcopy of the current
+operation, as the save button did, with a DetectionResult.
+
+@author: rlewandkow
+"""
+
+import os, sys
+
+sys.path.insert(1, "/".join(os.path.realpath(__file__).split("/")[0:-2]))
+
+import copy
+import gc
+import time
+import numpy as np
+
+from PIL import Image
+from scipy import ndimage as ndi
+
+from ui.main_window.tabs.detection.current_operation_model import CurrentOperation
+from ui.main_window.tabs.detection.detection_operations import create_sigma_data, filter_and_label_contours
+from ui.main_window.tabs.detection.detection_result import DetectionResult, format_size
+
+SIZE = 1024
+FRAMES = 100
+FILTER_PARAMS = {"circularity_low": 0.1, "circularity_high": 0.9, "min_area_[nm2]": 0.0, "max_area_[nm2]": 1000}
+
+def resident_bytes():
+    with open("/proc/self/statm") as statm:
+        return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+
+def detect(img):
+    operation = CurrentOperation()
+    operation.raw_data_index = 0
+    operation.image_to_process = img
+    sigma_data = create_sigma_data(img, 2.0, "Canny", FILTER_PARAMS, 1.0, True)
+    for key, value in sigma_data.items():
+        setattr(operation, key, value)
+    result_image, contours_data, labeled_image = filter_and_label_contours(
+        FILTER_PARAMS, operation.edge_image, operation.contour_features, img, 1.0, 1.0, 1.0, True, True, False
+    )
+    operation.filtered_contours_img = Image.fromarray(result_image)
+    operation.contours_data = contours_data
+    operation.labeled_image = labeled_image
+    return operation
+
+def measure(operation, save):
+    gc.collect()
+    before = resident_bytes()
+    start = time.perf_counter()
+    saved = [save(operation) for _ in range(FRAMES)]
+    elapsed = time.perf_counter() - start
+    gc.collect()
+    return saved, resident_bytes() - before, elapsed
+
+def same_contours_data(a, b):
+    keys = ("name", "area", "distance_to_nearest_neighbour", "nearest_neighbour", "moments")
+    return len(a) == len(b) and all(
+        np.array_equal(x["contour"], y["contour"]) and all(x[key] == y[key] for key in keys)
+        for x, y in zip(a, b)
+    )
+
+def main():
+    rng = np.random.default_rng(0)
+    data = ndi.gaussian_filter(rng.random((SIZE, SIZE)), 3)
+    img = Image.fromarray((255 * (data - data.min()) / np.ptp(data)).astype(np.uint8))
+    operation = detect(img)
+
+    # Results first, so they do not reuse memory freed by the copies
+    results, results_bytes, t_results = measure(operation, DetectionResult)
+    copies, copies_bytes, t_copies = measure(operation, copy.deepcopy)
+
+    start = time.perf_counter()
+    opened = results[0].to_operation()
+    t_open = time.perf_counter() - start
+
+    print(f"{FRAMES} saved results of a {SIZE}x{SIZE} frame, {len(operation.contours)} contours, "
+          f"{len(operation.contours_data)} after filtering:")
+    print(f"  deepcopy:         {copies_bytes / 2**20:8.1f} MB, {t_copies / FRAMES * 1e3:6.2f} ms per save")
+    print(f"  DetectionResult:  {results_bytes / 2**20:8.1f} MB, {t_results / FRAMES * 1e3:6.2f} ms per save, "
+          f"{format_size(results[0].nbytes)} each, opened in {t_open * 1e3:.1f} ms")
+    print(f"  same contours data: {same_contours_data(operation.contours_data, opened.contours_data)}")
+
+if __name__ == '__main__':
+    main()
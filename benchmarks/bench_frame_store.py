@@ -0,0 +1,82 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmark for sharing loaded frames between the tabs.
+
+Inserts a synthetic MPP movie into the preprocessing, detection and
+measurement tabs, as opening each tab does, and compares creating a greyscale
+image per frame in every tab with the lazy images of the frame store.
+
+@author: rlewandkow
+"""
+
+import os, sys
+
+sys.path.insert(1, "/".join(os.path.realpath(__file__).split("/")[0:-2]))
+
+import tempfile
+import time
+import numpy as np
+
+from data.files.read_mpp import MppMovie, iter_mpp_frames
+from data.processing.data_process import convert_data_to_greyscale_image
+
+from ui.main_window.tabs.frame_store import frame_store, format_memory_usage
+from ui.main_window.tabs.preprocessing import preprocessing_data
+from ui.main_window.tabs.detection import detection_data
+from ui.main_window.tabs.spots_measurement import spots_measurement_data
+
+NUMBER_OF_FRAMES = 300
+SIZE = 512
+
+def insert_eagerly(item):
+    """Entries as every tab created them before, with a greyscale image per frame."""
+    return [
+        {
+            "file_name": item['file_name'],
+            "frame_number": i,
+            "header_info": item['header_info'],
+            "original_data": frame,
+            "greyscale_image": convert_data_to_greyscale_image(frame),
+            "operations": []
+        }
+        for i, frame in enumerate(iter_mpp_frames(item['data']), start=1)
+    ]
+
+def images_bytes(tabs):
+    images = {id(entry['greyscale_image']): entry['greyscale_image'] for entries in tabs for entry in entries}
+    return sum(img.width * img.height for img in images.values())
+
+def main():
+    rng = np.random.default_rng(0)
+    with tempfile.TemporaryDirectory() as folder_path:
+        file_name = os.path.join(folder_path, "movie.mpp")
+        rng.random((NUMBER_OF_FRAMES, SIZE, SIZE)).tofile(file_name)
+        item = {'file_name': file_name, 'header_info': {}, 'data': MppMovie(file_name, 0, NUMBER_OF_FRAMES, SIZE, SIZE)}
+
+        start = time.perf_counter()
+        eager_tabs = [insert_eagerly(item) for _ in range(3)]
+        t_eager = time.perf_counter() - start
+        eager_bytes = images_bytes(eager_tabs)
+        del eager_tabs
+
+        start = time.perf_counter()
+        modules = (preprocessing_data, detection_data, spots_measurement_data)
+        for module in modules:
+            module.insert_data("mpp", item)
+        t_store = time.perf_counter() - start
+
+        tabs = (preprocessing_data.data_for_preprocessing, detection_data.data_for_detection,
+                spots_measurement_data.data_for_measurement)
+        # Every tab shows the first frame
+        start = time.perf_counter()
+        shown = [entries[0]['greyscale_image'] for entries in tabs]
+        t_show = time.perf_counter() - start
+
+        print(f"{NUMBER_OF_FRAMES} frames {SIZE}x{SIZE} in 3 tabs:")
+        print(f"  per-tab greyscale images: insert {t_eager * 1e3:8.1f} ms, images {eager_bytes / 2**20:7.1f} MB")
+        print(f"  frame store:              insert {t_store * 1e3:8.1f} ms, first frame shown in 3 tabs "
+              f"{t_show * 1e3:.1f} ms, shared image: {all(img is shown[0] for img in shown)}")
+        print(f"  {format_memory_usage(frame_store.stats())}")
+
+if __name__ == '__main__':
+    main()
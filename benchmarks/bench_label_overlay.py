@@ -0,0 +1,112 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmark for redrawing contour labels after a manual edit.
+
+Compares DrawLabels as it was, converting the image for every contour,
+DrawLabels converting it once, and the label overlay updating only the
+boxes of the changed contours for a highlight and for deletions.
+
+@author: rlewandkow
+"""
+
+import os, sys
+
+sys.path.insert(1, "/".join(os.path.realpath(__file__).split("/")[0:-2]))
+
+import time
+import cv2
+import numpy as np
+
+from PIL import Image
+
+from data.processing.img_process import DrawLabels
+from data.processing.contours.contour_detection import GetContourData
+from data.processing.contours.label_overlay import LabelOverlay
+
+SIZE = 2048
+SPOTS = 6000
+EDITS = 20
+
+def draw_labels_per_contour_conversion(img, contours_data, draw_contours=False, draw_labels=False, color=False, highlight_index=None):
+    for i, item in enumerate(contours_data):
+        if color:
+            text_color = (255,255,255)
+        elif highlight_index == i:
+            text_color = (169, 169, 169)
+        else:
+            text_color = (0,0,0)
+        M = item['moments']
+        name = item['name']
+        img = np.array(img).astype(np.uint8)
+        if M["m00"] != 0:
+            cX = int(M["m10"] / M["m00"])
+            cY = int(M["m01"] / M["m00"])
+            if draw_labels:
+                img = cv2.putText(img, name, (cX, cY), cv2.FONT_HERSHEY_SIMPLEX, 0.3, text_color, 1)
+        if draw_contours:
+                img = cv2.drawContours(img, [item['contour']], 0, text_color, 1)
+    return img
+
+def timed(function, *args):
+    start = time.perf_counter()
+    result = function(*args)
+    return result, time.perf_counter() - start
+
+def main():
+    rng = np.random.default_rng(0)
+    mask = np.zeros((SIZE, SIZE), dtype=np.uint8)
+    for x, y in rng.integers(0, SIZE, size=(SPOTS, 2)):
+        cv2.circle(mask, (int(x), int(y)), int(rng.integers(2, 8)), 255, -1)
+    contours = list(cv2.findContours(mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)[0])
+    img = Image.fromarray(rng.integers(0, 256, (SIZE, SIZE), dtype=np.uint8))
+    data = GetContourData(contours, 1, 1, 1)
+    options = (True, True, False)
+
+    old, t_old = timed(draw_labels_per_contour_conversion, img, data, *options)
+    new, t_new = timed(DrawLabels, img, data, *options)
+
+    overlay = LabelOverlay()
+    _, t_full = timed(overlay.update, img, data, *options)
+    t_highlight = 0
+    same = np.array_equal(old, new)
+    for index in rng.integers(0, len(data), EDITS):
+        _, t = timed(overlay.update, img, data, *options, int(index))
+        t_highlight += t / EDITS
+    same &= np.array_equal(overlay.labeled, DrawLabels(img, data, *options, int(index)))
+
+    def delete(position):
+        contours_left = [item['contour'] for i, item in enumerate(data) if i != position]
+        return GetContourData(contours_left, 1, 1, 1)
+
+    # Names after the deleted contour are renumbered, so their labels change too
+    t_delete_last = 0
+    for _ in range(EDITS):
+        data = delete(len(data) - 1)
+        _, t = timed(overlay.update, img, data, *options)
+        t_delete_last += t / EDITS
+    same &= np.array_equal(overlay.labeled, DrawLabels(img, data, *options))
+    t_delete_tail = 0
+    for _ in range(EDITS):
+        data = delete(len(data) - 200)
+        _, t = timed(overlay.update, img, data, *options)
+        t_delete_tail += t / EDITS
+    same &= np.array_equal(overlay.labeled, DrawLabels(img, data, *options))
+    t_delete_first = 0
+    for _ in range(EDITS):
+        data = delete(0)
+        _, t = timed(overlay.update, img, data, *options)
+        t_delete_first += t / EDITS
+    same &= np.array_equal(overlay.labeled, DrawLabels(img, data, *options))
+
+    print(f"{len(contours)} contours on {SIZE}x{SIZE}, contours and labels drawn:")
+    print(f"  DrawLabels, conversion per contour: {t_old * 1e3:9.1f} ms")
+    print(f"  DrawLabels, one conversion:         {t_new * 1e3:9.1f} ms")
+    print(f"  overlay full draw:                  {t_full * 1e3:9.1f} ms")
+    print(f"  overlay highlight:                  {t_highlight * 1e3:9.2f} ms")
+    print(f"  overlay delete last contour:        {t_delete_last * 1e3:9.2f} ms")
+    print(f"  overlay delete, 200 renumbered:     {t_delete_tail * 1e3:9.2f} ms")
+    print(f"  overlay delete first contour:       {t_delete_first * 1e3:9.2f} ms (full redraw)")
+    print(f"  same images: {same}")
+
+if __name__ == '__main__':
+    main()
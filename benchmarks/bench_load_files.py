@@ -0,0 +1,65 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmark for loading a folder of files.
+
+Measures files/second of iter_loaded_files for different worker counts on a
+synthetic folder of .s94 and .stp files, and the speedup over one worker.
+
+@author: rlewandkow
+"""
+
+import os, sys
+
+sys.path.insert(1, "/".join(os.path.realpath(__file__).split("/")[0:-2]))
+
+import tempfile
+import time
+import numpy as np
+
+# Measure decoding, not the scan cache
+os.environ["QNA_CACHE_ENABLE"] = "0"
+
+from data.files.load_files import iter_loaded_files, available_cpu_count, DEFAULT_LOAD_WORKERS
+from data.files.write_stp import write_STP_file
+
+from bench_read_s94 import write_synthetic_s94
+
+NUMBER_OF_FILES = 200
+SIZE = 512
+
+def create_synthetic_folder(folder_path, rng):
+    for i in range(NUMBER_OF_FILES):
+        write_synthetic_s94(os.path.join(folder_path, f"{i}.S94"), SIZE, rng)
+        write_STP_file(
+            output_dir_name=".", file_name=os.path.join(folder_path, str(i)),
+            x_points=SIZE, y_points=SIZE, z_amplitude=1.0, image_mode=1,
+            x_size=80.0, y_size=80.0, x_offset=0.0, y_offset=0.0, z_gain=3.0,
+            data=list(rng.random(SIZE * SIZE))
+        )
+
+def measure(file_paths, file_type, max_workers):
+    start = time.perf_counter()
+    loaded = 0
+    for _, result, error in iter_loaded_files(file_paths, file_type, max_workers):
+        # Touch the data so lazily mapped files are actually read
+        if error is None:
+            float(np.sum(result['data']))
+            loaded += 1
+    return loaded / (time.perf_counter() - start)
+
+def main():
+    rng = np.random.default_rng(0)
+    worker_counts = sorted({1, 2, 4, 8, available_cpu_count()})
+    print(f"{available_cpu_count()} CPUs available, {DEFAULT_LOAD_WORKERS} workers by default")
+    with tempfile.TemporaryDirectory() as folder_path:
+        create_synthetic_folder(folder_path, rng)
+        for file_type in (".s94", ".stp"):
+            file_paths = sorted(os.path.join(folder_path, f) for f in os.listdir(folder_path) if f.lower().endswith(file_type))
+            single = None
+            for max_workers in worker_counts:
+                rate = measure(file_paths, file_type, max_workers)
+                single = single or rate
+                print(f"{file_type} x{len(file_paths)}: {max_workers:2d} workers {rate:8.1f} files/s, {rate / single:4.2f}x")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,55 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmark for the operation result cache.
+
+Scrubs a slider back and forth over a few values on a large image and
+compares recomputing every preview with looking results up in the cache.
+
+@author: rlewandkow
+"""
+
+import os, sys
+
+sys.path.insert(1, "/".join(os.path.realpath(__file__).split("/")[0:-2]))
+
+import time
+import numpy as np
+from PIL import Image
+
+from ui.main_window.tabs.operation_cache import OperationCache
+from ui.main_window.tabs.preprocessing.preprocessing_operations import perform_gaussian_filter
+
+SIZE = 2048
+SIGMAS = (1.0, 2.0, 3.0, 4.0, 5.0)
+PASSES = 4
+
+def main():
+    rng = np.random.default_rng(0)
+    img = Image.fromarray(rng.integers(0, 256, size=(SIZE, SIZE), dtype=np.uint8))
+    scrub = [sigma for _ in range(PASSES) for sigma in SIGMAS + SIGMAS[::-1]]
+
+    start = time.perf_counter()
+    for sigma in scrub:
+        params = {'sigma': sigma}
+        perform_gaussian_filter(params, img)
+    t_uncached = time.perf_counter() - start
+
+    cache = OperationCache()
+    hit_times = []
+    start = time.perf_counter()
+    for sigma in scrub:
+        params = {'sigma': sigma}
+        hits = cache.hits
+        step_start = time.perf_counter()
+        cache.get_or_compute("GaussianFilter", params, img, lambda: perform_gaussian_filter(params, img))
+        if cache.hits > hits:
+            hit_times.append(time.perf_counter() - step_start)
+    t_cached = time.perf_counter() - start
+
+    stats = cache.stats()
+    print(f"{SIZE}x{SIZE}, {len(scrub)} previews: uncached {t_uncached * 1e3 / len(scrub):6.1f} ms/preview | "
+          f"cached {t_cached * 1e3 / len(scrub):6.1f} ms/preview ({t_uncached / t_cached:4.1f}x), "
+          f"{np.mean(hit_times) * 1e3:.1f} ms per hit | hits {stats['hits']}, misses {stats['misses']}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,68 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmark for the precision modes of the preprocessing chain.
+
+Runs the same chain of operations on synthetic data in the uint8 and float64
+precision modes and reports time and the number of distinct levels left in the
+result, which shows how much z-resolution each mode keeps.
+
+@author: rlewandkow
+"""
+
+import os, sys
+
+sys.path.insert(1, "/".join(os.path.realpath(__file__).split("/")[0:-2]))
+
+import time
+import numpy as np
+from PIL import Image
+
+from data.processing.data_process import (
+    normalize_data_to_image_range,
+    quantize_image,
+    scale_data_to_image_range
+)
+from ui.main_window.tabs.preprocessing.preprocessing_operations import (
+    perform_gaussian_filter,
+    perform_plane_leveling,
+    perform_polynomial_leveling,
+    perform_white_top_hat
+)
+
+SIZE = 512
+CHAIN = (
+    (perform_plane_leveling, {}),
+    (perform_gaussian_filter, {'sigma': 1.0}),
+    (perform_polynomial_leveling, {'order': 3}),
+    (perform_white_top_hat, {'selem_type': "disk", 'selem_size': 12}),
+)
+
+def synthetic_data(size, seed=0):
+    """Strongly tilted surface with small spots, so the signal uses few uint8 levels."""
+    rng = np.random.default_rng(seed)
+    y, x = np.mgrid[0:size, 0:size] / size
+    data = 5.0 * x + 3.0 * y
+    centres = rng.integers(0, size, size=(100, 2))
+    yy, xx = np.mgrid[0:size, 0:size]
+    for cy, cx in centres:
+        data += 0.05 * np.exp(-((yy - cy) ** 2 + (xx - cx) ** 2) / 20.0)
+    return data + rng.normal(scale=0.005, size=data.shape)
+
+def run_chain(img, precision):
+    start = time.perf_counter()
+    for function, params in CHAIN:
+        _, img = function(dict(params, precision=precision), img)
+    return np.asarray(img), time.perf_counter() - start
+
+def main():
+    data = synthetic_data(SIZE)
+    result_uint8, t_uint8 = run_chain(Image.fromarray(normalize_data_to_image_range(data)), "uint8")
+    result_float, t_float = run_chain(scale_data_to_image_range(data), "float64")
+    display = quantize_image(result_float)
+
+    print(f"uint8:   {t_uint8 * 1e3:7.1f} ms, {len(np.unique(result_uint8)):6d} distinct levels in the result")
+    print(f"float64: {t_float * 1e3:7.1f} ms, {len(np.unique(result_float)):6d} distinct levels in the result, "
+          f"{len(np.unique(display))} after quantizing for display")
+
+if __name__ == '__main__':
+    main()
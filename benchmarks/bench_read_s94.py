@@ -0,0 +1,74 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmark for reading .s94 files.
+
+Compares read_s94_file with the previous per-sample decoding loop on
+synthetic scans and checks that both give the same data.
+
+@author: rlewandkow
+"""
+
+import os, sys
+
+sys.path.insert(1, "/".join(os.path.realpath(__file__).split("/")[0:-2]))
+
+import struct
+import tempfile
+import time
+import numpy as np
+
+from data.files.read_s94 import read_s94_file, FORMAT_STRING, NUMBER_OF_BYTES, S94_DATA_SCALE
+
+SIZES = (256, 512, 1024)
+
+def write_synthetic_s94(file_name, size, rng):
+    """Write a synthetic square .s94 scan and return its raw samples."""
+    # The previous decoder multiplied int16 scalars, which wraps for |raw| > 1638
+    raw = rng.integers(-1638, 1639, size=(size, size), dtype=np.int16)
+    header = struct.pack(FORMAT_STRING, size, size, 0, 1, 1, 80.0, 80.0, 0.0, 0.0, 2500.0, 200.0, 3, 2, 0.0, 0.0, 0.0, 0, 80, 0)
+    with open(file_name, "wb") as file:
+        file.write(header)
+        raw.astype('<i2').tofile(file)
+    return raw
+
+def legacy_read_s94_data(file_name):
+    """Decode .s94 data the way read_s94_file did before vectorization."""
+    with open(file_name, 'rb') as file:
+        x_points, y_points = struct.unpack(FORMAT_STRING, file.read(NUMBER_OF_BYTES))[:2]
+        current = []
+        image_data = np.fromfile(file, dtype=np.int16, count=x_points * y_points).reshape((x_points, y_points))
+        for i in reversed(range(x_points)):
+            for j in reversed(range(y_points)):
+                current.append((20 * image_data[i][j]) / 65536)
+        return np.reshape(current, (x_points, y_points))
+
+def best_time(func, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+def main():
+    rng = np.random.default_rng(0)
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for size in SIZES:
+            file_name = os.path.join(tmp_dir, f"{size}.S94")
+            write_synthetic_s94(file_name, size, rng)
+
+            legacy = legacy_read_s94_data(file_name)
+            current = read_s94_file(file_name, use_cache=False)['data']
+            mapped = read_s94_file(file_name, mmap=True, use_cache=False)['data']
+            assert np.array_equal(legacy, current), "read_s94_file output differs from legacy decoder"
+            assert np.array_equal(legacy, mapped * S94_DATA_SCALE), "mmap output differs from legacy decoder"
+
+            t_legacy = best_time(lambda: legacy_read_s94_data(file_name), 1)
+            t_current = best_time(lambda: read_s94_file(file_name, use_cache=False), 5)
+            t_mapped = best_time(lambda: read_s94_file(file_name, mmap=True), 5)
+            print(f"{size}x{size}: legacy {t_legacy * 1e3:9.2f} ms | "
+                  f"vectorized {t_current * 1e3:7.2f} ms ({t_legacy / t_current:7.1f}x) | "
+                  f"mmap {t_mapped * 1e3:7.2f} ms ({t_legacy / t_mapped:7.1f}x)")
+
+if __name__ == '__main__':
+    main()
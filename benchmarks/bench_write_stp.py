@@ -0,0 +1,69 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmark for writing .stp files.
+
+Compares write_STP_file with the previous per-sample struct.pack writer and
+checks that both produce byte-for-byte identical files.
+
+@author: rlewandkow
+"""
+
+import os, sys
+
+sys.path.insert(1, "/".join(os.path.realpath(__file__).split("/")[0:-2]))
+
+import struct
+import tempfile
+import time
+import numpy as np
+
+from data.files.write_stp import write_STP_file
+
+SIZES = (256, 512, 1024)
+
+def stp_arguments(file_name, size, data):
+    return dict(
+        output_dir_name="I-ISETmap", file_name=file_name, x_points=size, y_points=size,
+        z_amplitude=3.7, image_mode=1, x_size=81.817, y_size=81.817, x_offset=0.0,
+        y_offset=0.0, z_gain=3.0, data=data
+    )
+
+def legacy_write_STP_file(output_name, header, data):
+    """Write a .stp file the way write_STP_file did before bulk writing."""
+    with open(output_name, "wb") as out:
+        out.write(header)
+        for i in data:
+            out.write(struct.pack('d', i))
+
+def main():
+    rng = np.random.default_rng(0)
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for size in SIZES:
+            data = rng.normal(size=(size, size))
+            file_name = os.path.join(tmp_dir, f"{size}_I-ISET")
+            output_name = os.path.join(tmp_dir, "I-ISETmap", f"{size}_I-ISET.STP")
+
+            start = time.perf_counter()
+            write_STP_file(**stp_arguments(file_name, size, data))
+            t_current = time.perf_counter() - start
+            with open(output_name, "rb") as file:
+                current = file.read()
+
+            # The header is unchanged, so reuse it for the legacy payload
+            header = current[:len(current) - data.size * 8]
+            legacy_name = output_name + ".legacy"
+            start = time.perf_counter()
+            legacy_write_STP_file(legacy_name, header, [i for row in data for i in row])
+            t_legacy = time.perf_counter() - start
+            with open(legacy_name, "rb") as file:
+                assert file.read() == current, "write_STP_file output differs from legacy writer"
+
+            # Lists are still accepted and give the same file
+            write_STP_file(**stp_arguments(file_name, size, [i for row in data for i in row]))
+            with open(output_name, "rb") as file:
+                assert file.read() == current, "write_STP_file output differs for list input"
+
+            print(f"{size}x{size}: legacy {t_legacy * 1e3:8.2f} ms | bulk {t_current * 1e3:6.2f} ms ({t_legacy / t_current:6.1f}x) | identical bytes")
+
+if __name__ == '__main__':
+    main()
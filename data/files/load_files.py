@@ -0,0 +1,89 @@
+# -*- coding: utf-8 -*-
+"""
+Load data files.
+
+This module contains functions to read .s94, .stp and .mpp files concurrently.
+
+@author: rlewandkow
+"""
+
+import os, sys
+
+sys.path.insert(1, "/".join(os.path.realpath(__file__).split("/")[0:-2]))
+
+import itertools
+import logging
+
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from data.files.read_mpp import read_mpp_file
+from data.files.read_s94 import read_s94_file
+from data.files.read_stp import read_stp_file
+
+logger = logging.getLogger(__name__)
+
+def available_cpu_count():
+    """Number of CPUs the process may run on, which can be fewer than os.cpu_count()."""
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+# Default number of files decoded concurrently; workers beyond the available CPUs only add overhead
+DEFAULT_LOAD_WORKERS = min(8, available_cpu_count())
+
+def read_file(file_path, file_type):
+    """Read the file based on its type."""
+    if file_type == ".s94":
+        return read_s94_file(file_path)
+    elif file_type == ".stp":
+        return read_stp_file(file_path)
+    elif file_type == ".mpp":
+        return read_mpp_file(file_path)
+
+def iter_loaded_files(file_paths, file_type, max_workers=DEFAULT_LOAD_WORKERS, cancel_event=None):
+    """
+    Read files concurrently and yield the results in input order.
+
+    Files are decoded in a thread pool; the readers spend most of their time in
+    numpy I/O, which releases the GIL, and memory-mapped results are shared without
+    copying. A failing file is reported and does not stop the batch.
+
+    Args:
+        file_paths (list): Paths of the files to read.
+        file_type (str): File extension (".s94", ".stp" or ".mpp").
+        max_workers (int, optional): Number of files decoded concurrently.
+        cancel_event (threading.Event, optional): Stop submitting new files when set.
+
+    Yields:
+        tuple: (file_path, result, error) where result is the dictionary returned by the
+            reader, or None and an error message if the file could not be read.
+    """
+    if not isinstance(max_workers, int) or max_workers < 1:
+        msg = "iter_loaded_files: max_workers must be a positive integer."
+        logger.error(msg)
+        raise ValueError(msg)
+
+    paths = iter(file_paths)
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        # Keep a bounded window of submitted files so results stream in order
+        pending = deque(
+            (file_path, executor.submit(read_file, file_path, file_type))
+            for file_path in itertools.islice(paths, 2 * max_workers)
+        )
+        while pending:
+            file_path, future = pending.popleft()
+            try:
+                result = future.result()
+                error = None if result is not None else "file could not be read"
+            except Exception as e:
+                result, error = None, str(e)
+            if error is not None:
+                logger.error(f"iter_loaded_files: Error loading file '{file_path}': {error}")
+
+            if cancel_event is None or not cancel_event.is_set():
+                next_path = next(paths, None)
+                if next_path is not None:
+                    pending.append((next_path, executor.submit(read_file, next_path, file_type)))
+
+            yield file_path, result, error
@@ -6,26 +6,138 @@ sys.path.insert(1, "/".join(os.path.realpath(__file__).split("/")[0:-2]))
 """
 Read .mpp file.
 
-This module contains a function to read data from a .mpp file.
+This module contains a function to read data from a .mpp file and a lazy
+frame reader for .mpp movies.
 
 @author: rlewandkow
 """
 import numpy as np
-import struct
 import re
 import logging
 
+from collections import OrderedDict
+
+from data.files.scan_cache import load_cached_scan, store_cached_scan
+
 logger = logging.getLogger(__name__)
 
-def read_mpp_file(file_name):
+# Number of decoded frames kept in memory by MppMovie
+MPP_FRAME_CACHE_SIZE = 16
+
+class MppMovie:
+    """
+    Lazy, random-access view of the frames stored in a .mpp file.
+
+    The payload is memory-mapped once and each frame is decoded on demand. Only the
+    most recently used frames are kept in memory.
+
+    Attributes:
+        file_name (str): The path to the .mpp file.
+        data_offset (int): Byte offset of the first frame.
+        num_frames (int): Number of frames.
+        num_rows (int): Number of rows of a frame.
+        num_columns (int): Number of columns of a frame.
+        cache_size (int): Maximum number of decoded frames kept in memory.
+    """
+    def __init__(self, file_name, data_offset, num_frames, num_rows, num_columns, cache_size=MPP_FRAME_CACHE_SIZE):
+        self.file_name = file_name
+        self.data_offset = data_offset
+        self.num_frames = num_frames
+        self.num_rows = num_rows
+        self.num_columns = num_columns
+        self.cache_size = cache_size
+
+        # Assuming double precision floating-point data
+        self._frames = np.memmap(file_name, dtype='<f8', mode='r', offset=data_offset,
+                                 shape=(num_frames, num_rows, num_columns))
+        self._cache = OrderedDict()
+
+    @property
+    def frame_offsets(self):
+        """list: Byte offset of every frame in the file."""
+        frame_size = self.num_rows * self.num_columns * 8
+        return [self.data_offset + i * frame_size for i in range(self.num_frames)]
+
+    def __len__(self):
+        return self.num_frames
+
+    def __iter__(self):
+        for i in range(self.num_frames):
+            yield self[i]
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(self.num_frames))]
+        index = self._check_index(index)
+
+        frame = self._cache.get(index)
+        if frame is not None:
+            self._cache.move_to_end(index)
+            return frame
+
+        frame = np.array(self._frames[index])
+        frame.setflags(write=False)
+        self._cache[index] = frame
+        if len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+        return frame
+
+    def view(self, index):
+        """
+        Get a frame without decoding it into memory.
+
+        Args:
+            index (int): Index of the frame.
+
+        Returns:
+            numpy.memmap: Read-only memory-mapped view of the frame.
+        """
+        return self._frames[self._check_index(index)]
+
+    def views(self):
+        """Iterate over memory-mapped views of all frames."""
+        for i in range(self.num_frames):
+            yield self._frames[i]
+
+    def clear_cache(self):
+        """Drop all decoded frames."""
+        self._cache.clear()
+
+    def _check_index(self, index):
+        index = int(index)
+        if index < 0:
+            index += self.num_frames
+        if index < 0 or index >= self.num_frames:
+            raise IndexError(f"MppMovie: frame index {index} out of range")
+        return index
+
+def iter_mpp_frames(frames):
+    """
+    Iterate over MPP frames without decoding the whole movie.
+
+    Args:
+        frames (MppMovie or list): Frames of an MPP file.
+
+    Returns:
+        iterator: Memory-mapped views for an MppMovie, the frames themselves otherwise.
+    """
+    if isinstance(frames, MppMovie):
+        return frames.views()
+    return iter(frames)
+
+def read_mpp_file(file_name, cache_size=MPP_FRAME_CACHE_SIZE, use_cache=True):
     """
     Read data from a .mpp file.
 
+    Only the header is parsed; frames are returned on demand by an MppMovie.
+
     Args:
         file_name (str): The path to the .mpp file.
+        cache_size (int, optional): Maximum number of decoded frames kept in memory.
+        use_cache (bool, optional): Take the parsed header from the scan cache. Defaults to True.
 
     Returns:
-        dict: A dictionary containing the file name, header information, data array, and header length.
+        dict: A dictionary containing the file name, header information, frames (MppMovie), and header length.
     """
     if not isinstance(file_name, str):
         msg = "read_mpp_file: Invalid input. filename must be strings."
@@ -33,53 +145,45 @@ def read_mpp_file(file_name):
         raise ValueError(msg)
     
     try:
-        header_info = {}
-        data_frames = []
-        header_length = None
+        cached = load_cached_scan(file_name) if use_cache else None
 
-        # Read header information
         with open(file_name, "rb") as file:
-            current_section = None
-            while True:
-                line = file.readline().decode().strip()
-                if line == "[Header end]":
-                    break
-                elif line.startswith("Image header size: "):
-                    header_length = int(re.search(r'\d+', line).group())
-                elif line.startswith("[") and line.endswith("]"):
-                    current_section = line[1:-1]
-                    header_info[current_section] = {}
-                elif ":" in line and current_section:
-                    key, value = line.split(":", 1)
-                    key = key.strip()
-                    value = value.strip()
-                    header_info[current_section][key] = value
-
-            # Extract dimensions from header
-            num_columns = int(header_info.get("General Info", {}).get("Number of columns", 0))
-            num_rows = int(header_info.get("General Info", {}).get("Number of rows", 0))
-            num_frames = int(header_info.get("General Info", {}).get("Number of Frames", 0))
-
-            if num_columns == 0 or num_rows == 0 or num_frames == 0:
-                msg = "read_mpp_file: Invalid dimensions in header."
-                logger.error(msg)
-                raise ValueError(msg)
-
-            for _ in range(num_frames):
-                frame_data = []
-                for _ in range(num_columns * num_rows):
-                    raw_data = file.read(8)  # Assuming double precision floating-point data
-                    if not raw_data:
-                        break
-                    value = struct.unpack('d', raw_data)[0]
-                    frame_data.append(value)
-                data_array = np.array(frame_data).reshape((num_rows, num_columns))
-                data_frames.append(data_array)
+            if cached is not None:
+                header_info = cached["header_info"]
+                header_length = cached["header_length"]
+                data_offset = cached["data_offset"]
+            else:
+                header_info, header_length, data_offset = read_mpp_header(file)
+                if use_cache:
+                    # The frames are already double arrays, so only the header is cached
+                    store_cached_scan(file_name, {
+                        "header_info": header_info,
+                        "header_length": header_length,
+                        "data_offset": data_offset
+                    })
+            data_size = os.fstat(file.fileno()).st_size - data_offset
+
+        # Extract dimensions from header
+        num_columns = int(header_info.get("General Info", {}).get("Number of columns", 0))
+        num_rows = int(header_info.get("General Info", {}).get("Number of rows", 0))
+        num_frames = int(header_info.get("General Info", {}).get("Number of Frames", 0))
+
+        if num_columns == 0 or num_rows == 0 or num_frames == 0:
+            msg = "read_mpp_file: Invalid dimensions in header."
+            logger.error(msg)
+            raise ValueError(msg)
+
+        if data_size < num_frames * num_rows * num_columns * 8:
+            msg = "read_mpp_file: File is shorter than the frames described in header."
+            logger.error(msg)
+            raise ValueError(msg)
+
+        movie = MppMovie(file_name, data_offset, num_frames, num_rows, num_columns, cache_size)
 
         return {
             "file_name": file_name,
             "header_info": header_info,
-            "data": data_frames,
+            "data": movie,
             "header_length": header_length
         }
     
@@ -93,6 +197,40 @@ def read_mpp_file(file_name):
         logger.error(f"An unexpected error occurred: {e}")
         raise Exception(f"An unexpected error occurred: {e}")
 
+def read_mpp_header(file):
+    """
+    Read the text header of a .mpp file.
+
+    Args:
+        file (file object): The .mpp file opened in binary mode.
+
+    Returns:
+        tuple: Header information dictionary, image header size and the byte offset of the first frame.
+    """
+    header_info = {}
+    header_length = None
+    current_section = None
+    while True:
+        line = file.readline()
+        if not line:
+            msg = "read_mpp_file: Missing '[Header end]' in header."
+            logger.error(msg)
+            raise ValueError(msg)
+        line = line.decode().strip()
+        if line == "[Header end]":
+            break
+        elif line.startswith("Image header size: "):
+            header_length = int(re.search(r'\d+', line).group())
+        elif line.startswith("[") and line.endswith("]"):
+            current_section = line[1:-1]
+            header_info[current_section] = {}
+        elif ":" in line and current_section:
+            key, value = line.split(":", 1)
+            key = key.strip()
+            value = value.strip()
+            header_info[current_section][key] = value
+    return header_info, header_length, file.tell()
+
 def main():
     file_name = "test_files/cut3_upper_part_of_stm_movie.mpp"
     try:
@@ -46,6 +46,8 @@ import struct
 import logging
 import numpy as np
 
+from data.files.scan_cache import load_cached_scan, store_cached_scan
+
 #  Image modes
 S94_IMAGE_MODE = {
     "S94_TOPOGRAPHY": 0,
@@ -58,14 +60,25 @@ FORMAT_STRING = "<hhhhiffffffhhffffhh"
 # The size (in bytes) of the binary data structure
 NUMBER_OF_BYTES = struct.calcsize(FORMAT_STRING)
 
+# Scale factor converting raw int16 samples to data values (20 * raw / 65536)
+S94_DATA_SCALE = 20 / 65536
+
 logger = logging.getLogger(__name__)
 
-def read_s94_file(file_name):
+def read_s94_file(file_name, mmap=False, use_cache=True):
     """
     Read data from a .s94 file.
 
+    The image is rotated by 180 degrees and scaled by S94_DATA_SCALE in a single
+    vectorized step.
+
     Args:
         file_name (str): The path to the .s94 file.
+        mmap (bool, optional): If True, 'data' is a read-only memory-mapped view of the
+            raw int16 samples (already rotated, not scaled). Multiply by S94_DATA_SCALE
+            to get data values. Defaults to False.
+        use_cache (bool, optional): Read and store the raw samples in the scan cache,
+            if the cache is enabled. Defaults to True.
 
     Returns:
         dict: A dictionary containing the file name, header information, and data array.
@@ -76,6 +89,16 @@ def read_s94_file(file_name):
         raise ValueError(msg)
     
     try:
+        if use_cache and not mmap:
+            cached = load_cached_scan(file_name, mmap=True)
+            if cached is not None:
+                # Scaled as on a miss, so the data is a new in-memory array either way
+                return {
+                    "file_name": file_name,
+                    "header_info": cached["header_info"],
+                    "data": cached["data"] * S94_DATA_SCALE
+                }
+
         with open(file_name, 'rb') as file:
             # Unpack binary data using the specified format
             data = file.read(NUMBER_OF_BYTES)
@@ -87,13 +110,17 @@ def read_s94_file(file_name):
             x_points, y_points, Swapped, image_mode, Image_Number, x_size, y_size, x_offset, y_offset, Scan_Speed, \
                 Bias_Voltage, z_gain, Section, Kp, Tn, Tv, It, Scan_Angle, z_Flag = struct.unpack(FORMAT_STRING, data)
 
-            current = []
-            image_data = np.fromfile(file, dtype=np.int16, count=x_points * y_points).reshape((x_points, y_points))
-            for i in reversed(range(x_points)):
-                for j in reversed(range(y_points)):
-                    current.append((20 * image_data[i][j]) / 65536)
-
-            current = np.reshape(current,(x_points, y_points))
+            if mmap:
+                image_data = np.memmap(file, dtype='<i2', mode='r', offset=NUMBER_OF_BYTES, shape=(x_points, y_points))
+                current = image_data[::-1, ::-1]
+            else:
+                image_data = np.fromfile(file, dtype='<i2', count=x_points * y_points)
+                if image_data.size != x_points * y_points:
+                    msg = "read_s94_file: Incomplete image data read"
+                    logger.error(msg)
+                    raise ValueError(msg)
+                samples = image_data.reshape((x_points, y_points))[::-1, ::-1]
+                current = samples * S94_DATA_SCALE
 
         # Construct header information dictionary
         header_info = {
@@ -118,6 +145,10 @@ def read_s94_file(file_name):
             "z_Flag": z_Flag,
         }
 
+        if use_cache and not mmap:
+            # The int16 samples take a quarter of the space of the scaled data
+            store_cached_scan(file_name, {"header_info": header_info}, samples)
+
         # Construct dictionary with relevant information
         result = {
             "file_name": file_name,
@@ -11,22 +11,33 @@ import os, sys
 
 sys.path.insert(1, "/".join(os.path.realpath(__file__).split("/")[0:-2]))
 
-import struct
 import numpy as np
 
 import logging
 
+from data.files.scan_cache import load_cached_scan, store_cached_scan
+
 logger = logging.getLogger(__name__)
 
-def read_stp_file(file_name):
+def read_stp_file(file_name, mmap=False, use_cache=True):
     """
     Read data from a .stp file.
 
+    The text header is parsed once and the double precision payload that follows
+    '[Header end]' is read with a single call.
+
     Args:
         file_name (str): The path to the .stp file.
+        mmap (bool, optional): If True, 'data' is a read-only memory-mapped view of the
+            payload instead of an array in memory. The view keeps the file open until
+            it is released, which on Windows prevents overwriting or deleting the file.
+            Defaults to False.
+        use_cache (bool, optional): Take the parsed header from the scan cache.
+            Defaults to True.
 
     Returns:
-        dict: A dictionary containing the file name, header information, and data array.
+        dict: A dictionary containing the file name, header information, data array,
+            and the byte offset of the data.
     """
     
     if not isinstance(file_name, str):
@@ -34,21 +45,17 @@ def read_stp_file(file_name):
         logger.error(msg)
         raise ValueError(msg)
     try:
-        data = []
-        header_info = {}
+        cached = load_cached_scan(file_name) if use_cache else None
 
         with open(file_name, "rb") as file:
-            # Skip header lines until the end of the header section
-            while True:
-                line = file.readline().decode().strip()
-                if line == "[Header end]":
-                    break
-                elif ":" in line:
-                    key, value = line.split(":", 1)
-                    key = key.strip()
-                    value = value.strip()
-                    header_info[key] = value
-                
+            if cached is not None:
+                header_info, data_offset = cached["header_info"], cached["data_offset"]
+            else:
+                header_info, data_offset = read_stp_header(file)
+                if use_cache:
+                    # The payload is already a double array, so only the header is cached
+                    store_cached_scan(file_name, {"header_info": header_info, "data_offset": data_offset})
+
             num_columns = int(header_info.get("Number of columns", 0))
             num_rows = int(header_info.get("Number of rows", 0))
 
@@ -57,21 +64,25 @@ def read_stp_file(file_name):
                 logger.error(msg)
                 raise ValueError(msg)
 
-            # Read data points
-            while True:
-                raw_data = file.read(8)  # Assuming double precision floating-point data
-                if not raw_data:
-                    break
-                value = struct.unpack('d', raw_data)[0]
-                data.append(value)
-        
-            data_array = np.array(data).reshape((num_rows, num_columns))
+            # Data points are double precision floating-point values
+            data_size = os.fstat(file.fileno()).st_size - data_offset
+            if data_size != num_rows * num_columns * 8:
+                msg = f"read_stp_file: Expected {num_rows * num_columns} data points, found {data_size / 8}."
+                logger.error(msg)
+                raise ValueError(msg)
+
+            if mmap:
+                data_array = np.memmap(file, dtype='<f8', mode='r', offset=data_offset, shape=(num_rows, num_columns))
+            else:
+                file.seek(data_offset)
+                data_array = np.fromfile(file, dtype='<f8', count=num_rows * num_columns).reshape((num_rows, num_columns))
 
         # Construct dictionary with relevant information
         result = {
             "file_name": file_name,
             "header_info": header_info,
-            "data": data_array
+            "data": data_array,
+            "data_offset": data_offset
         }
 
         return result
@@ -80,10 +91,6 @@ def read_stp_file(file_name):
         error_msg = f"read_stp_file: File '{file_name}' not found."
         logger.error(error_msg)
         print(error_msg)
-    except struct.error as e:
-        error_msg = f"read_stp_file: Error unpacking struct '{file_name}': {e}"
-        logger.error(error_msg)
-        print(error_msg)
     except ValueError as e:
         error_msg = f"read_stp_file: Error reading file '{file_name}': {e}"
         logger.error(error_msg)
@@ -93,6 +100,34 @@ def read_stp_file(file_name):
         logger.error(error_msg)
         print(error_msg)
 
+def read_stp_header(file):
+    """
+    Read the text header of a .stp file.
+
+    Args:
+        file (file object): The .stp file opened in binary mode.
+
+    Returns:
+        tuple: Header information dictionary and the byte offset of the data.
+    """
+    header_info = {}
+    # Read header lines until the end of the header section
+    while True:
+        line = file.readline()
+        if not line:
+            msg = "read_stp_file: Missing '[Header end]' in header."
+            logger.error(msg)
+            raise ValueError(msg)
+        line = line.decode().strip()
+        if line == "[Header end]":
+            break
+        elif ":" in line:
+            key, value = line.split(":", 1)
+            key = key.strip()
+            value = value.strip()
+            header_info[key] = value
+    return header_info, file.tell()
+
 def main():
     file_name = "test_files/t/ISETmap/28933_I-ISET.stp"
     f = read_stp_file(file_name)
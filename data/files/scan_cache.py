@@ -0,0 +1,261 @@
+# -*- coding: utf-8 -*-
+"""
+Cache of parsed scan files.
+
+This module stores the parsed header of .s94, .stp and .mpp files, and the raw
+samples of .s94 files, in a cache directory, so files read again in a later
+session skip parsing. The cache is off unless enabled with QNA_CACHE_ENABLE.
+Entries are keyed by file path, size, modification time and optionally a hash
+of the file content.
+
+The cache can be inspected or invalidated from the command line:
+
+    python -m data.files.scan_cache info
+    python -m data.files.scan_cache clear [FILE ...]
+
+Settings are read from environment variables:
+    QNA_CACHE_DIR: Cache directory (default: user cache directory).
+    QNA_CACHE_SIZE_LIMIT: Maximum cache size in bytes.
+    QNA_CACHE_HASH: Set to 1 to include a hash of the file content in the key.
+    QNA_CACHE_ENABLE: Set to 1 to enable the cache.
+
+@author: rlewandkow
+"""
+
+import os, sys
+
+sys.path.insert(1, "/".join(os.path.realpath(__file__).split("/")[0:-2]))
+
+import argparse
+import hashlib
+import json
+import logging
+import threading
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Bump when the layout of cache entries changes
+CACHE_VERSION = 2
+
+DEFAULT_CACHE_SIZE_LIMIT = 2 * 1024 ** 3
+
+_cache_lock = threading.Lock()
+_cache_size = None
+
+def get_cache_dir():
+    """Return the cache directory."""
+    cache_dir = os.environ.get("QNA_CACHE_DIR")
+    if not cache_dir:
+        base_dir = os.environ.get("LOCALAPPDATA") or os.environ.get("XDG_CACHE_HOME") \
+            or os.path.join(os.path.expanduser("~"), ".cache")
+        cache_dir = os.path.join(base_dir, "qna", "scans")
+    return cache_dir
+
+def get_cache_size_limit():
+    """Return the maximum cache size in bytes."""
+    try:
+        return int(os.environ.get("QNA_CACHE_SIZE_LIMIT", DEFAULT_CACHE_SIZE_LIMIT))
+    except ValueError:
+        return DEFAULT_CACHE_SIZE_LIMIT
+
+def is_cache_enabled():
+    return os.environ.get("QNA_CACHE_ENABLE", "0") == "1"
+
+def hash_file(file_name, chunk_size=1024 * 1024):
+    """Return the SHA-1 hex digest of the file content."""
+    sha1 = hashlib.sha1()
+    with open(file_name, "rb") as file:
+        for chunk in iter(lambda: file.read(chunk_size), b""):
+            sha1.update(chunk)
+    return sha1.hexdigest()
+
+def get_cache_key(file_name, use_hash=None):
+    """
+    Compute the cache key of a file.
+
+    Args:
+        file_name (str): The path to the file.
+        use_hash (bool, optional): Include a hash of the file content. Defaults to QNA_CACHE_HASH.
+
+    Returns:
+        str: The cache key.
+    """
+    if use_hash is None:
+        use_hash = os.environ.get("QNA_CACHE_HASH", "0") == "1"
+    stat = os.stat(file_name)
+    key = f"{CACHE_VERSION}|{os.path.abspath(file_name)}|{stat.st_size}|{stat.st_mtime_ns}"
+    if use_hash:
+        key += "|" + hash_file(file_name)
+    return hashlib.sha1(key.encode()).hexdigest()
+
+def load_cached_scan(file_name, mmap=False):
+    """
+    Load a cached scan.
+
+    Args:
+        file_name (str): The path to the scan file.
+        mmap (bool, optional): Return the cached array as a read-only memory map
+            instead of reading it into memory. Defaults to False.
+
+    Returns:
+        dict or None: The cached entry with 'data' holding the cached array (if any),
+            or None if the file is not cached.
+    """
+    if not is_cache_enabled():
+        return None
+    try:
+        entry_path = os.path.join(get_cache_dir(), get_cache_key(file_name))
+        if not os.path.exists(entry_path + ".json"):
+            return None
+        with open(entry_path + ".json", "r") as file:
+            entry = json.load(file)
+        if entry.get("has_data"):
+            entry["data"] = np.load(entry_path + ".npy", mmap_mode="r" if mmap else None)
+        # Mark the entry as recently used for eviction
+        os.utime(entry_path + ".json")
+        return entry
+    except Exception as e:
+        logger.error(f"load_cached_scan: Failed to read cache for '{file_name}': {e}")
+        return None
+
+def store_cached_scan(file_name, entry, data=None):
+    """
+    Store a parsed scan in the cache.
+
+    Args:
+        file_name (str): The path to the scan file.
+        entry (dict): JSON serializable information, e.g. the header.
+        data (numpy.ndarray, optional): Decoded data array.
+    """
+    global _cache_size
+    if not is_cache_enabled():
+        return
+    try:
+        cache_dir = get_cache_dir()
+        os.makedirs(cache_dir, exist_ok=True)
+        entry_path = os.path.join(cache_dir, get_cache_key(file_name))
+
+        entry = dict(entry, source=os.path.abspath(file_name), has_data=data is not None)
+        stored_size = 0
+        if data is not None:
+            write_atomically(entry_path + ".npy", lambda file: np.save(file, np.ascontiguousarray(data)))
+            stored_size += os.path.getsize(entry_path + ".npy")
+        write_atomically(entry_path + ".json", lambda file: file.write(json.dumps(entry).encode()))
+        stored_size += os.path.getsize(entry_path + ".json")
+
+        with _cache_lock:
+            if _cache_size is None:
+                _cache_size = sum(size for _, _, size in list_cache_files(cache_dir))
+            else:
+                _cache_size += stored_size
+            if _cache_size > get_cache_size_limit():
+                _cache_size = evict_cache(get_cache_size_limit())
+    except Exception as e:
+        logger.error(f"store_cached_scan: Failed to cache '{file_name}': {e}")
+
+def write_atomically(file_name, write):
+    """Write a file through a temporary file and rename it."""
+    tmp_name = f"{file_name}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        with open(tmp_name, "wb") as file:
+            write(file)
+        os.replace(tmp_name, file_name)
+    finally:
+        if os.path.exists(tmp_name):
+            os.remove(tmp_name)
+
+def list_cache_files(cache_dir=None):
+    """Return (path, last use time, size) of every file in the cache."""
+    cache_dir = cache_dir or get_cache_dir()
+    if not os.path.isdir(cache_dir):
+        return []
+    files = []
+    for item in os.scandir(cache_dir):
+        if item.is_file() and not item.name.endswith(".tmp"):
+            stat = item.stat()
+            files.append((item.path, stat.st_mtime, stat.st_size))
+    return files
+
+def evict_cache(size_limit):
+    """
+    Remove least recently used entries until the cache fits in size_limit.
+
+    Args:
+        size_limit (int): Maximum cache size in bytes.
+
+    Returns:
+        int: The cache size after eviction.
+    """
+    entries = {}
+    for path, _, size in list_cache_files():
+        key = os.path.splitext(os.path.basename(path))[0]
+        entries.setdefault(key, [0.0, 0, []])
+        entries[key][1] += size
+        entries[key][2].append(path)
+        if path.endswith(".json"):
+            entries[key][0] = os.path.getmtime(path)
+
+    total_size = sum(size for _, size, _ in entries.values())
+    for last_used, size, paths in sorted(entries.values(), key=lambda entry: entry[0]):
+        if total_size <= size_limit:
+            break
+        for path in paths:
+            try:
+                os.remove(path)
+            except OSError as e:
+                logger.error(f"evict_cache: Failed to remove '{path}': {e}")
+        total_size -= size
+    return total_size
+
+def clear_cache(file_names=None):
+    """
+    Invalidate cached scans.
+
+    Args:
+        file_names (list, optional): Scan files whose entries are removed. All entries
+            are removed if not given.
+
+    Returns:
+        int: Number of removed cache files.
+    """
+    global _cache_size
+    cache_dir = get_cache_dir()
+    sources = None if not file_names else {os.path.abspath(f) for f in file_names}
+    removed = 0
+    for path, _, _ in list_cache_files(cache_dir):
+        if sources is not None:
+            json_path = os.path.splitext(path)[0] + ".json"
+            try:
+                with open(json_path, "r") as file:
+                    if json.load(file).get("source") not in sources:
+                        continue
+            except (OSError, ValueError):
+                pass
+        try:
+            os.remove(path)
+            removed += 1
+        except OSError as e:
+            logger.error(f"clear_cache: Failed to remove '{path}': {e}")
+    with _cache_lock:
+        _cache_size = None
+    return removed
+
+def main():
+    parser = argparse.ArgumentParser(description="Manage the cache of parsed scan files.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    subparsers.add_parser("info", help="show cache location and size")
+    clear_parser = subparsers.add_parser("clear", help="invalidate cached scans")
+    clear_parser.add_argument("files", nargs="*", help="scan files to invalidate (default: all)")
+    args = parser.parse_args()
+
+    if args.command == "info":
+        files = list_cache_files()
+        print(f"Cache directory: {get_cache_dir()}")
+        print(f"Entries: {sum(1 for path, _, _ in files if path.endswith('.json'))}")
+        print(f"Size: {sum(size for _, _, size in files) / 1024 ** 2:.1f} MB of {get_cache_size_limit() / 1024 ** 2:.1f} MB")
+    elif args.command == "clear":
+        print(f"Removed {clear_cache(args.files)} cache files.")
+
+if __name__ == '__main__':
+    main()
@@ -9,22 +9,12 @@ import os, sys
 
 sys.path.insert(1, "/".join(os.path.realpath(__file__).split("/")[0:-2]))
 
-from PIL import Image
+from data.processing.data_process import convert_data_to_greyscale_image
 
 def save_bmp_from_s94(file_name, tab):
     try:
-        # Create a new grayscale image
-        img = Image.new('L', (len(tab[0]), len(tab)))
-
-        # Normalize the values in tab to the range [0, 255]
-        max_z = max(map(max, tab))
-        min_z = min(map(min, tab))
-        if max_z == min_z:
-            max_z += 1
-        for i in range(len(tab)):
-            for j in range(len(tab[i])):
-                val = int(255 * (tab[i][j] - min_z) / (max_z - min_z))
-                img.putpixel((j, i), val)
+        # Create a grayscale image normalized to the range [0, 255]
+        img = convert_data_to_greyscale_image(tab)
 
         # Save the image to a file
         output_name = file_name[:-4] + ".bmp"
@@ -11,24 +11,62 @@ import os, sys
 
 sys.path.insert(1, "/".join(os.path.realpath(__file__).split("/")[0:-2]))
 
-import struct
-import os
+import numpy as np
 
-from read_mpp import read_mpp_file
+from data.files.read_mpp import read_mpp_file, iter_mpp_frames
 
-def write_mpp_file(file_name, header_info, data_frames, header_length):
+def create_mpp_header(header_info):
+    """
+    Create the text header of an MPP file.
+
+    Args:
+        header_info (dict): Header information dictionary.
+
+    Returns:
+        bytes: The header, with 'Image header size' set to its own length in bytes.
+    """
+    sections = ""
+    for section, content in header_info.items():
+        sections += f"[{section}]\n\n"
+        for key, value in content.items():
+            sections += f"    {key}: {value}\n"
+        sections += "\n"
+    sections += "[Header end]\n"
+
+    # The size includes its own digits, so repeat until the number of digits is stable
+    header_length = 0
+    while True:
+        header = f"WSxM file copyright UAM\nMovie Image file\nImage header size: {header_length}\n\n{sections}".encode()
+        if len(header) == header_length:
+            return header
+        header_length = len(header)
+
+def write_mpp_file(file_name, header_info, data_frames):
     """
     Write data to an MPP file.
 
+    Frames are written one at a time, so data_frames may be a generator and only one
+    frame is held in memory.
+
     Args:
         file_name (str): The path to the MPP file.
         header_info (dict): Header information dictionary.
-        data_frames (list): List of data frames.
+        data_frames (iterable): Frames (2D arrays), e.g. a list, an MppMovie or a generator.
 
     Raises:
         ValueError: If the header information is incomplete or invalid.
     """
 
+    try:
+        num_columns = int(header_info.get("General Info", {}).get("Number of columns", 0))
+        num_rows = int(header_info.get("General Info", {}).get("Number of rows", 0))
+        num_frames = int(header_info.get("General Info", {}).get("Number of Frames", 0))
+    except (AttributeError, ValueError):
+        raise ValueError("write_mpp_file: Invalid dimensions in header.")
+    if num_columns == 0 or num_rows == 0 or num_frames == 0:
+        raise ValueError("write_mpp_file: Invalid dimensions in header.")
+
+    tmp_name = None
     try:
         # Create directory
         output_dir = os.path.join(os.path.dirname(file_name), "ISETmap")
@@ -36,53 +74,38 @@ def write_mpp_file(file_name, header_info, data_frames, header_length):
             os.makedirs(output_dir)
         
         output_name = os.path.join(output_dir, os.path.basename(file_name) + ".MPP")
+        tmp_name = output_name + ".tmp"
 
-        # num_columns = int(header_info.get("General Info", {}).get("Number of columns", 0))
-        # num_rows = int(header_info.get("General Info", {}).get("Number of rows", 0))
-        # num_frames = int(header_info.get("General Info", {}).get("Number of Frames", 0))
-
-        # Write header information
-        with open(output_name, "wb") as file:
-            file.write(f"WSxM file copyright UAM\nMovie Image file\nImage header size: {header_length}\n\n".encode())
-            for section, content in header_info.items():
-                file.write(f"[{section}]\n\n".encode())
-                for key, value in content.items():
-                    file.write(f"    {key}: {value}\n".encode())
-                file.write("\n".encode())
-            file.write("[Header end]\n".encode())
-
-            # reversed_frames = []
-            # for i, frame in enumerate(data_frames):
-            #     half_col = int(num_columns / 2)
-            #     first_half = []
-            #     second_half = []
-            #     for j, data in enumerate(frame):
-            #         if j < half_col:
-            #             first_half.append(data)
-            #         else:
-            #             second_half.append(data)
-            #     reversed_frames += second_half
-            #     reversed_frames += first_half
+        with open(tmp_name, "wb") as file:
+            file.write(create_mpp_header(header_info))
 
             # Write data
-            for frame in data_frames:
-                for i in frame:
-                    file.write(struct.pack('d', i))
-            
-            # for data in reversed_frames:
-            #     file.write(struct.pack('d', data))
-            
-            
-
+            written_frames = 0
+            for frame in iter_mpp_frames(data_frames):
+                frame = np.ascontiguousarray(frame, dtype='<f8')
+                if frame.size != num_columns * num_rows:
+                    raise ValueError(f"write_mpp_file: Frame {written_frames + 1} has {frame.size} points, expected {num_columns * num_rows}.")
+                frame.tofile(file)
+                written_frames += 1
+
+        if written_frames != num_frames:
+            raise ValueError(f"write_mpp_file: Header describes {num_frames} frames, {written_frames} were given.")
+        os.replace(tmp_name, output_name)
+
+    except ValueError:
+        raise
     except Exception as e:
         raise RuntimeError(f"An unexpected error occurred: {e}")
+    finally:
+        if tmp_name and os.path.exists(tmp_name):
+            os.remove(tmp_name)
 
 
 def main():
     file_name = "test_files/cut_2_raw_low_part_of_stm_movie.mpp"
     try:
         result = read_mpp_file(file_name)
-        write_mpp_file(file_name, result["header_info"], result["data"], result["header_length"])
+        write_mpp_file(file_name, result["header_info"], result["data"])
     except Exception as e:
         print(f"Error: {e}")
 
@@ -11,8 +11,8 @@ import os, sys
 
 sys.path.insert(1, "/".join(os.path.realpath(__file__).split("/")[0:-2]))
 
-import struct
 import logging
+import numpy as np
 
 logger = logging.getLogger(__name__)
 
@@ -28,7 +28,8 @@ def write_STP_file(
         x_offset, 
         y_offset, 
         z_gain, 
-        data):
+        data,
+        raise_errors=False):
     
     """
     Write data to a .stp file.
@@ -45,7 +46,8 @@ def write_STP_file(
         x_offset (float): X offset.
         y_offset (float): Y offset.
         z_gain (float): Z gain.
-        data (list or tuple): List or tuple of data points.
+        data (numpy.ndarray, list or tuple): Data points, written in row-major order.
+        raise_errors (bool, optional): Raise errors writing the file instead of reporting them. Defaults to False.
 
     Raises:
         ValueError: If any input parameter is invalid.
@@ -53,7 +55,7 @@ def write_STP_file(
     
     # Input validation
     if not all(isinstance(arg, (int, float)) for arg in [x_points, y_points, z_amplitude, x_size, y_size, x_offset, y_offset, z_gain]) \
-            or not isinstance(image_mode, int) or not isinstance(data, (list, tuple)):
+            or not isinstance(image_mode, int) or not isinstance(data, (np.ndarray, list, tuple)):
         msg = "write_STP_file: Invalid input. Check input parameter types."
         logger.error(msg)
         raise ValueError(msg)
@@ -79,17 +81,26 @@ def write_STP_file(
 
     output_name = os.path.join(output_dir, os.path.basename(file_name) + ".STP")
 
+    # Write through a temporary file so an interrupted write never leaves a truncated .STP
+    tmp_name = output_name + ".tmp"
     try:
-        with open(output_name, "wb") as out:
+        payload = np.ascontiguousarray(data, dtype='<f8')
+        with open(tmp_name, "wb") as out:
             out.write("".join(header_lines).encode())
-
-            for i in data:
-                out.write(struct.pack('d', i))
+            payload.tofile(out)
+        os.replace(tmp_name, output_name)
     except (OSError, IOError) as e:
         error_msg = f"write_STP_file: Error occurred while writing the file: {e}"
         print(error_msg)
         logger.error(error_msg)
+        if raise_errors:
+            raise
     except Exception as e:
         error_msg = f"write_STP_file: An unexpected error occurred: {e}"
         print(error_msg)
-        logger.error(error_msg)
\ No newline at end of file
+        logger.error(error_msg)
+        if raise_errors:
+            raise
+    finally:
+        if os.path.exists(tmp_name):
+            os.remove(tmp_name)
\ No newline at end of file
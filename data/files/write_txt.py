@@ -15,7 +15,7 @@ import logging
 
 logger = logging.getLogger(__name__)
 
-def write_txt_file(filename, l0, frame_name = None):
+def write_txt_file(filename, l0, frame_name = None, raise_errors=False):
     """
     Write data to a .txt file.
 
@@ -23,6 +23,7 @@ def write_txt_file(filename, l0, frame_name = None):
         filename (str): The name of the file.
         l0 (float): The value to write to the file.
         frame_name (str, optional): The number of the frame. Defaults to None.
+        raise_errors (bool, optional): Raise errors writing the file instead of reporting them. Defaults to False.
 
     Raises:
         ValueError: If any input parameter is invalid.
@@ -53,11 +54,17 @@ def write_txt_file(filename, l0, frame_name = None):
         error_msg = f"write_txt_file: Error: {e}. The specified file or directory does not exist."
         print(error_msg)
         logger.error(error_msg)
+        if raise_errors:
+            raise
     except PermissionError as e:
         error_msg = f"write_txt_file: Error: {e}. Permission denied while trying to write the file."
         print(error_msg)
         logger.error(error_msg)
+        if raise_errors:
+            raise
     except Exception as e:
         error_msg = f"write_txt_file: An unexpected error occurred: {e}"
         print(error_msg)
-        logger.error(error_msg)
\ No newline at end of file
+        logger.error(error_msg)
+        if raise_errors:
+            raise
\ No newline at end of file
@@ -14,10 +14,17 @@ import cv2
 
 import numpy as np
 
+from scipy.spatial import KDTree
+
+from data.processing.contours.contour_features import ContourFeatures
+
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Number of nearest points queried per centroid, including the centroid itself
+NEAREST_NEIGHBOUR_QUERY_SIZE = 4
+
 def ContourFinder(img):
     """
     Find contours in the input image.
@@ -66,65 +73,127 @@ def distance_between_points_in_nm(point1, point2, x_coeff, y_coeff):
     
     return distance_nm
 
+def nearest_neighbours(points):
+    """
+    Find the nearest neighbour of every point.
+
+    Args:
+        points (numpy.ndarray): Array of shape (n, 2).
+
+    Returns:
+        tuple: Distance to and index of the nearest other point, with index -1 and distance 0.0
+            when there is no other point. Of equally near points the one with the lowest index is chosen.
+    """
+    n = len(points)
+    distances = np.zeros(n)
+    indices = np.full(n, -1, dtype=np.intp)
+    if n < 2:
+        return distances, indices
+
+    # Query a few extra neighbours so points at the same distance, or at the same position, are ties
+    tree = KDTree(points)
+    k = min(n, NEAREST_NEIGHBOUR_QUERY_SIZE)
+    rows = np.arange(n)
+    while len(rows):
+        neighbour_distances, neighbour_indices = tree.query(points[rows], k=k)
+        furthest = neighbour_distances[:, -1].copy()
+        neighbour_distances[neighbour_indices == rows[:, None]] = np.inf
+        min_distances = neighbour_distances.min(axis=1)
+        candidates = np.where(neighbour_distances == min_distances[:, None], neighbour_indices, n)
+        indices[rows] = candidates.min(axis=1)
+        if k == n:
+            break
+        # All queried neighbours tie, so more points at that distance may be left out; query again with more
+        rows = rows[furthest <= min_distances]
+        k = min(n, 2 * k)
+    # Same distance formula as distance_between_points_in_nm
+    distances = np.sqrt(np.sum((points - points[indices]) ** 2, axis=1))
+    return distances, indices
+
 def GetContourData(filtered_contours, x_size_coefficient, y_size_coefficient, avg_coefficient):
-    contour_data = []
-    centroids = []
+    """
+    Calculate area, moments and nearest neighbour of contours.
+
+    Args:
+        filtered_contours (list): Contours.
+        x_size_coefficient (float): Nanometers per pixel along x.
+        y_size_coefficient (float): Nanometers per pixel along y.
+        avg_coefficient (float): Area of a pixel in square nanometers.
+
+    Returns:
+        list: Dictionaries with name, contour, area, moments, distance to the nearest neighbour
+            and its name, '-01' if there is none.
+    """
+    return GetContourDataFromFeatures(
+        ContourFeatures.from_contours(filtered_contours),
+        x_size_coefficient,
+        y_size_coefficient,
+        avg_coefficient
+    )
+
+def GetContourDataFromFeatures(features, x_size_coefficient, y_size_coefficient, avg_coefficient):
+    """
+    Calculate the data of GetContourData from the feature table of the contours.
+
+    Nearest neighbours are found with a KD-tree of the centroids scaled to nanometers.
+
+    Args:
+        features (ContourFeatures): Features of the contours.
+        x_size_coefficient (float): Nanometers per pixel along x.
+        y_size_coefficient (float): Nanometers per pixel along y.
+        avg_coefficient (float): Area of a pixel in square nanometers.
+
+    Returns:
+        list: Dictionaries as returned by GetContourData.
+    """
     area_coefficient = avg_coefficient
-    for i, contour in enumerate(filtered_contours):
-        M = cv2.moments(contour)
-        if M["m00"] != 0:
-            cX = int(M["m10"] / M["m00"])
-            cY = int(M["m01"] / M["m00"])
-            centroids.append((cX, cY))
-
-    for i, contour in enumerate(filtered_contours):
-        name = f"{i:03}"
-        # calculate nearest neighbour for filtered_contour
-        distances_to_other_contours = []
-        min_distance = None
-        min_index = None
-        area = cv2.contourArea(contour)
-        M = cv2.moments(contour)
-        if M["m00"] != 0:
-            cX = int(M["m10"] / M["m00"])
-            cY = int(M["m01"] / M["m00"])
-        if centroids:
-            for j in range(len(filtered_contours)):
-                if i != j:
-                    distance = distance_between_points_in_nm(centroids[i], centroids[j], x_size_coefficient, y_size_coefficient)
-                    distances_to_other_contours.append((distance, j))
-            if len(distances_to_other_contours) > 1:
-                min_distance, min_index = min(distances_to_other_contours)
-        else:
-            min_distance = 0.0
-        # add distance and nearest_neighbour to dic
-        if not min_distance:
-            min_distance = 0.0
-        if not min_index:
-            min_index = -1
-        
+
+    # Contours without area have no centroid and no nearest neighbour
+    with_centroid = np.flatnonzero(features.has_centroid)
+    centroids_nm = np.column_stack((
+        features.centroid_x[with_centroid] * x_size_coefficient,
+        features.centroid_y[with_centroid] * y_size_coefficient
+    )).astype(np.float64)
+    distances, indices = nearest_neighbours(centroids_nm)
+
+    min_distances = np.zeros(len(features))
+    min_indices = np.full(len(features), -1)
+    found = indices >= 0
+    min_distances[with_centroid[found]] = distances[found]
+    min_indices[with_centroid[found]] = with_centroid[indices[found]]
+
+    contour_data = []
+    for i, contour in enumerate(features.contours):
         contour_data.append({
-            "name": name,
+            "name": f"{i:03}",
             "contour": contour,
-            "area": area * area_coefficient,
-            "moments": M,
-            "distance_to_nearest_neighbour": min_distance,
-            "nearest_neighbour": f"{min_index:03}"
+            "area": features.area[i] * area_coefficient,
+            "moments": features.moments(i),
+            "distance_to_nearest_neighbour": min_distances[i],
+            "nearest_neighbour": f"{min_indices[i]:03}"
         })
 
     return contour_data
 
-def ContourFilter(contours, circularity_low=0.1, circularity_high=0.9, min_area=0.0, max_area=200):
-    filtered_contours = []
-    for contour in contours:
-        area = AreaOfContour(contour)
-        perimeter = PerimieterOfContour(contour)
-        circularity = FindCircularityOfContour(area, perimeter)
+def ContourFilter(contours, circularity_low=0.1, circularity_high=0.9, min_area=0.0, max_area=200, features=None):
+    """
+    Select contours by circularity and area.
 
-        if circularity_low < circularity < circularity_high and max_area > area > min_area:
-            filtered_contours.append(contour)
-    
-    return filtered_contours
+    Args:
+        contours (list): Contours.
+        circularity_low (float, optional): Lower bound of the circularity.
+        circularity_high (float, optional): Upper bound of the circularity.
+        min_area (float, optional): Lower bound of the area in pixels.
+        max_area (float, optional): Upper bound of the area in pixels.
+        features (ContourFeatures, optional): Features of the contours, computed if not given.
+
+    Returns:
+        list: Contours with circularity and area strictly inside the bounds.
+    """
+    if features is None:
+        features = ContourFeatures.from_contours(contours)
+    mask = features.filter_mask(circularity_low, circularity_high, min_area, max_area)
+    return [contour for contour, selected in zip(contours, mask) if selected]
 
 def calculate_contour_avg_area(contour_data):
     total_area = sum(contour['area'] for contour in contour_data)
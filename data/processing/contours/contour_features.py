@@ -0,0 +1,149 @@
+# -*- coding: utf-8 -*-
+"""
+Geometric features of contours as a columnar table.
+
+@author: rlewandkow
+"""
+
+import os, sys
+
+sys.path.insert(1, "/".join(os.path.realpath(__file__).split("/")[0:-2]))
+
+import cv2
+
+import numpy as np
+
+import logging
+
+logger = logging.getLogger(__name__)
+
+class ContourFeatures:
+    """
+    Features of contours, one array per feature with one row per contour.
+
+    All features are computed once, together for all contours, with the same formulas
+    as cv2.contourArea, cv2.arcLength, cv2.boundingRect and cv2.moments. The full moments
+    of a contour are computed with cv2.moments on first use and kept.
+
+    Attributes:
+        contours (list): The contours.
+        area (numpy.ndarray): Areas in pixels.
+        perimeter (numpy.ndarray): Perimeters of the closed contours in pixels.
+        circularity (numpy.ndarray): 4 * pi * area / perimeter**2, 0 for a zero perimeter.
+        m00, m10, m01 (numpy.ndarray): Spatial moments of order 0 and 1.
+        has_centroid (numpy.ndarray): True where m00 is not zero.
+        centroid_x, centroid_y (numpy.ndarray): Centroids truncated to pixels, 0 without centroid.
+        bounding_box (numpy.ndarray): Rows of (x, y, width, height).
+        equivalent_diameter (numpy.ndarray): Diameter of the circle with the same area.
+    """
+    def __init__(self, contours, area, perimeter, m00, m10, m01, bounding_box, moments=None):
+        self.contours = list(contours)
+        self.area = area
+        self.perimeter = perimeter
+        self.m00 = m00
+        self.m10 = m10
+        self.m01 = m01
+        self.bounding_box = bounding_box
+        self._moments = moments if moments is not None else [None] * len(self.contours)
+
+        self.circularity = np.zeros(len(self.contours))
+        np.divide(4 * np.pi * area, perimeter * perimeter, out=self.circularity, where=perimeter > 0)
+        self.has_centroid = m00 != 0
+        safe_m00 = np.where(self.has_centroid, m00, 1)
+        self.centroid_x = np.where(self.has_centroid, m10 / safe_m00, 0).astype(np.int64)
+        self.centroid_y = np.where(self.has_centroid, m01 / safe_m00, 0).astype(np.int64)
+        self.equivalent_diameter = np.sqrt(4 * area / np.pi)
+
+    @classmethod
+    def from_contours(cls, contours):
+        """
+        Compute the features of contours.
+
+        Args:
+            contours (list): Contours as returned by cv2.findContours.
+
+        Returns:
+            ContourFeatures: The table.
+        """
+        n = len(contours)
+        if n == 0:
+            empty = np.zeros(0)
+            return cls([], empty, empty, empty, empty, empty, np.zeros((0, 4), dtype=np.int64))
+
+        lengths = np.array([len(contour) for contour in contours])
+        starts = np.concatenate(([0], np.cumsum(lengths)[:-1]))
+        points = np.concatenate([np.asarray(contour).reshape(-1, 2) for contour in contours]).astype(np.int64)
+        x = points[:, 0]
+        y = points[:, 1]
+        # Previous point of every point in its closed contour
+        previous = np.arange(len(points)) - 1
+        previous[starts] = starts + lengths - 1
+        x_prev = x[previous]
+        y_prev = y[previous]
+
+        # Moments of the polygon, as cv2.moments computes them for a contour
+        dxy = (x_prev * y - x * y_prev).astype(np.float64)
+        a00 = np.add.reduceat(dxy, starts)
+        a10 = np.add.reduceat(dxy * (x_prev + x), starts)
+        a01 = np.add.reduceat(dxy * (y_prev + y), starts)
+        sign = np.where(a00 < 0, -1.0, 1.0)
+        m00 = a00 * (sign * 0.5)
+        m10 = a10 * (sign * (1.0 / 6))
+        m01 = a01 * (sign * (1.0 / 6))
+        # Contours of fewer than three points have no area
+        degenerate = lengths < 3
+        m00[degenerate] = m10[degenerate] = m01[degenerate] = 0
+        area = np.abs(m00)
+
+        # Segment lengths in single precision, as cv2.arcLength sums them
+        dx = (x - x_prev).astype(np.float32)
+        dy = (y - y_prev).astype(np.float32)
+        segment_lengths = np.sqrt(dx * dx + dy * dy).astype(np.float64)
+        perimeter = np.add.reduceat(segment_lengths, starts)
+
+        x_min = np.minimum.reduceat(x, starts)
+        y_min = np.minimum.reduceat(y, starts)
+        bounding_box = np.column_stack((
+            x_min, y_min,
+            np.maximum.reduceat(x, starts) - x_min + 1,
+            np.maximum.reduceat(y, starts) - y_min + 1
+        ))
+        return cls(contours, area, perimeter, m00, m10, m01, bounding_box)
+
+    def __len__(self):
+        return len(self.contours)
+
+    def moments(self, index):
+        """Moments of a contour as returned by cv2.moments."""
+        M = self._moments[index]
+        if M is None:
+            M = cv2.moments(self.contours[index])
+            self._moments[index] = M
+        return M
+
+    def filter_mask(self, circularity_low, circularity_high, min_area, max_area):
+        """Rows with circularity and area strictly inside the ranges, as ContourFilter selects them."""
+        return ((circularity_low < self.circularity) & (self.circularity < circularity_high)
+                & (max_area > self.area) & (self.area > min_area))
+
+    def select(self, rows):
+        """
+        Table of a subset of the contours.
+
+        Args:
+            rows (numpy.ndarray): Boolean mask or indices of the rows.
+
+        Returns:
+            ContourFeatures: The table of the selected contours, sharing computed moments.
+        """
+        indices = np.flatnonzero(rows) if np.asarray(rows).dtype == bool else np.asarray(rows, dtype=np.intp)
+        return ContourFeatures(
+            [self.contours[i] for i in indices],
+            self.area[indices],
+            self.perimeter[indices],
+            self.m00[indices],
+            self.m10[indices],
+            self.m01[indices],
+            self.bounding_box[indices],
+            [self._moments[i] for i in indices]
+        )
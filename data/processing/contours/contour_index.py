@@ -0,0 +1,109 @@
+# -*- coding: utf-8 -*-
+"""
+Label raster for finding the contour at a pixel.
+
+@author: rlewandkow
+"""
+
+import os, sys
+
+sys.path.insert(1, "/".join(os.path.realpath(__file__).split("/")[0:-2]))
+
+import cv2
+
+import numpy as np
+
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Raster value of pixels outside of all contours
+NO_CONTOUR = -1
+
+class ContourLabelIndex:
+    """
+    Raster of contour ids covering the filled contours, for constant time hit-testing.
+
+    A pixel belongs to the first contour containing it, as a scan of the contours in
+    order with cv2.pointPolygonTest finds it. Ids are the positions of the contours when
+    the index is built; removing a contour keeps the ids of the other contours and only
+    updates the positions they map to.
+    """
+    def __init__(self, contours):
+        self.contours = list(contours)
+        self.bounding_boxes = [cv2.boundingRect(contour) for contour in self.contours]
+        # Position in the current list of contours of every id, NO_CONTOUR once removed
+        self.positions = np.arange(len(self.contours))
+        self.ids = list(range(len(self.contours)))
+
+        width = max((x + w for x, _, w, _ in self.bounding_boxes), default=0)
+        height = max((y + h for _, y, _, h in self.bounding_boxes), default=0)
+        self.raster = np.full((height, width), NO_CONTOUR, dtype=np.int32)
+        self._draw(range(len(self.contours)), self.raster, (0, 0))
+
+    def __len__(self):
+        return len(self.ids)
+
+    def _draw(self, ids, raster, offset):
+        # Drawn in reverse so the first contour wins where contours overlap
+        for contour_id in sorted(ids, reverse=True):
+            cv2.drawContours(raster, [self.contours[contour_id]], 0, int(contour_id), thickness=cv2.FILLED, offset=offset)
+
+    def find(self, x, y):
+        """
+        Position of the contour containing a point.
+
+        Args:
+            x (float): The x-coordinate of the point in pixels.
+            y (float): The y-coordinate of the point in pixels.
+
+        Returns:
+            int or None: Position of the contour in the current list, or None outside of all contours.
+        """
+        column, row = int(np.floor(x)), int(np.floor(y))
+        if not (0 <= row < self.raster.shape[0] and 0 <= column < self.raster.shape[1]):
+            return None
+        contour_id = self.raster[row, column]
+        if contour_id == NO_CONTOUR:
+            return None
+        return int(self.positions[contour_id])
+
+    def remove(self, position):
+        """
+        Remove the contour at a position of the current list.
+
+        Only the pixels of the removed contour are updated; contours it covered are drawn again there.
+
+        Args:
+            position (int): Position of the contour in the current list.
+        """
+        contour_id = self.ids.pop(position)
+        self.positions[contour_id] = NO_CONTOUR
+        self.positions[self.positions > position] -= 1
+
+        x, y, w, h = self.bounding_boxes[contour_id]
+        region = self.raster[y:y + h, x:x + w]
+        removed = region == contour_id
+        overlapping = [
+            other for other in self.ids
+            if boxes_intersect(self.bounding_boxes[other], (x, y, w, h))
+        ]
+        # Drawn on a raster covering the overlapping contours whole, so they are filled as in a full draw
+        x0 = min([x] + [self.bounding_boxes[other][0] for other in overlapping])
+        y0 = min([y] + [self.bounding_boxes[other][1] for other in overlapping])
+        x1 = max([x + w] + [self.bounding_boxes[other][0] + self.bounding_boxes[other][2] for other in overlapping])
+        y1 = max([y + h] + [self.bounding_boxes[other][1] + self.bounding_boxes[other][3] for other in overlapping])
+        redrawn = np.full((y1 - y0, x1 - x0), NO_CONTOUR, dtype=np.int32)
+        self._draw(overlapping, redrawn, (-x0, -y0))
+        region[removed] = redrawn[y - y0:y - y0 + h, x - x0:x - x0 + w][removed]
+
+    def matches(self, contours):
+        """Check if the index covers exactly these contours, in this order."""
+        return len(contours) == len(self.ids) and all(
+            contour is self.contours[contour_id] for contour, contour_id in zip(contours, self.ids)
+        )
+
+def boxes_intersect(box, other):
+    x, y, w, h = box
+    other_x, other_y, other_w, other_h = other
+    return x < other_x + other_w and other_x < x + w and y < other_y + other_h and other_y < y + h
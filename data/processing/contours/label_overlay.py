@@ -0,0 +1,277 @@
+# -*- coding: utf-8 -*-
+"""
+Contour labels drawn over an image, redrawn only where they change.
+
+@author: rlewandkow
+"""
+
+import os, sys
+
+sys.path.insert(1, "/".join(os.path.realpath(__file__).split("/")[0:-2]))
+
+import functools
+import operator
+
+import cv2
+
+import numpy as np
+
+import logging
+
+logger = logging.getLogger(__name__)
+
+LABEL_FONT = cv2.FONT_HERSHEY_SIMPLEX
+LABEL_FONT_SCALE = 0.3
+LABEL_THICKNESS = 1
+
+# Fraction of the contours changed above which the whole overlay is drawn again
+FULL_REDRAW_FRACTION = 0.25
+
+def label_color(color, highlighted):
+    """Color of the label and contour: white, grey when highlighted, otherwise black."""
+    if color:
+        return (255, 255, 255)
+    elif highlighted:
+        return (169, 169, 169)
+    return (0, 0, 0)
+
+def label_position(M):
+    """Centroid where the label is written, or None for a contour without area."""
+    if M["m00"] == 0:
+        return None
+    return int(M["m10"] / M["m00"]), int(M["m01"] / M["m00"])
+
+def draw_contour_label(img, item, text_color, draw_contours, draw_labels, offset=(0, 0)):
+    """
+    Draw the label and the contour of an item of the contours data in place.
+
+    Args:
+        img (numpy.ndarray): The image to draw on.
+        item (dict): Item of the contours data, with 'name', 'contour' and 'moments'.
+        text_color (tuple): The color.
+        draw_contours (bool): Draw the contour.
+        draw_labels (bool): Write the name at the centroid.
+        offset (tuple, optional): Shift of the image coordinates, for drawing on a part of an image.
+    """
+    position = label_position(item['moments'])
+    if draw_labels and position is not None:
+        origin = (position[0] + offset[0], position[1] + offset[1])
+        cv2.putText(img, item['name'], origin, LABEL_FONT, LABEL_FONT_SCALE, text_color, LABEL_THICKNESS)
+    if draw_contours:
+        cv2.drawContours(img, [item['contour']], 0, text_color, 1, offset=offset)
+
+@functools.lru_cache(maxsize=65536)
+def text_size(name):
+    """Size and baseline of a label, as cv2.getTextSize returns them."""
+    return cv2.getTextSize(name, LABEL_FONT, LABEL_FONT_SCALE, LABEL_THICKNESS)
+
+def label_boxes(items, draw_contours, draw_labels, shape):
+    """
+    Boxes containing every pixel drawn for items of the contours data.
+
+    Args:
+        items (list): Items of the contours data.
+        draw_contours (bool): The contours are drawn.
+        draw_labels (bool): The names are written.
+        shape (tuple): Shape of the image the boxes are clipped to.
+
+    Returns:
+        numpy.ndarray: Rows of (x0, y0, x1, y1), empty for items where nothing is drawn.
+    """
+    lower = np.full((len(items), 2), np.iinfo(np.int64).max)
+    upper = np.full((len(items), 2), np.iinfo(np.int64).min)
+    if draw_contours:
+        rects = np.array([cv2.boundingRect(item['contour']) for item in items], dtype=np.int64).reshape(-1, 4)
+        lower = np.minimum(lower, rects[:, :2])
+        upper = np.maximum(upper, rects[:, :2] + rects[:, 2:])
+    if draw_labels:
+        rows, texts = [], []
+        for i, item in enumerate(items):
+            position = label_position(item['moments'])
+            if position is not None:
+                (w, h), baseline = text_size(item['name'])
+                rows.append(i)
+                texts.append((position[0], position[1] - h, position[0] + w, position[1] + baseline))
+        if rows:
+            texts = np.array(texts, dtype=np.int64)
+            lower[rows] = np.minimum(lower[rows], texts[:, :2])
+            upper[rows] = np.maximum(upper[rows], texts[:, 2:])
+    # One pixel more on each side for the line ends
+    height, width = shape[:2]
+    boxes = np.column_stack((
+        np.clip(lower - 1, 0, (width, height)),
+        np.clip(upper + 1, 0, (width, height))
+    ))
+    boxes[upper[:, 0] < lower[:, 0]] = 0
+    return boxes
+
+class LabelOverlay:
+    """
+    Labeled image kept between updates of the contours data.
+
+    The base image is converted once. An update with the same image and drawing options,
+    where the contours are the previous contours with some removed, only redraws the boxes
+    of the removed contours and of the contours whose name or color changed; everything
+    else triggers a full redraw.
+
+    Attributes:
+        image (PIL.Image.Image): The image the labels are drawn on.
+        labeled (numpy.ndarray): The labeled image. Partial updates change it in place,
+            a full redraw replaces it with a new array.
+    """
+    def __init__(self):
+        self.image = None
+        self.base = None
+        self.labeled = None
+        self._options = None
+        self._items = []
+        self._highlight = None
+        self._boxes = np.zeros((0, 4), dtype=np.int64)
+        self._sorted_ids = np.zeros(0, dtype=np.uintp)
+        self._id_order = np.zeros(0, dtype=np.intp)
+
+    def update(self, img, contours_data, draw_contours=False, draw_labels=False, color=False, highlight_index=None):
+        """
+        Draw the labels of contours data over an image.
+
+        Args:
+            img (PIL.Image.Image): The greyscale image.
+            contours_data (list): Items with 'name', 'contour' and 'moments', as returned by GetContourData.
+            draw_contours (bool, optional): Draw the contours.
+            draw_labels (bool, optional): Write the contour names.
+            color (bool, optional): Draw in white instead of black.
+            highlight_index (int, optional): Index of the contour drawn in grey.
+
+        Returns:
+            list or None: Boxes (x0, y0, x1, y1) of labeled changed in place, or None after a full redraw.
+        """
+        options = (draw_contours, draw_labels, color)
+        items = list(contours_data)
+        if img is not self.image or options != self._options or self.labeled is None:
+            self.redraw(img, items, highlight_index, options)
+            return None
+
+        if len(items) == len(self._items) and all(map(operator.is_, items, self._items)):
+            # Same data, only the highlight may have changed
+            kept = None
+            changed = set()
+        else:
+            kept = self.kept_positions(items)
+            if kept is None:
+                self.redraw(img, items, highlight_index, options)
+                return None
+            changed = set()
+            if draw_labels:
+                changed.update(i for i, j in enumerate(kept.tolist()) if items[i]['name'] != self._items[j]['name'])
+        if not color:
+            changed.update(self.highlight_changes(kept, highlight_index, len(items)))
+
+        removed = [] if kept is None else np.setdiff1d(np.arange(len(self._items)), kept)
+        if len(removed) + len(changed) > FULL_REDRAW_FRACTION * max(len(items), 1):
+            self.redraw(img, items, highlight_index, options)
+            return None
+
+        boxes = self._boxes if kept is None else self._boxes[kept]
+        dirty = [tuple(self._boxes[i]) for i in removed]
+        for i in sorted(changed):
+            dirty.append(tuple(boxes[i]))
+            boxes[i] = label_boxes([items[i]], draw_contours, draw_labels, self.base.shape)[0]
+            dirty.append(tuple(boxes[i]))
+        self._items = items
+        self._highlight = highlight_index
+        self._boxes = boxes
+        if kept is not None:
+            # Sorted ids of the kept contours, with their new positions
+            in_kept = np.isin(self._id_order, kept)
+            self._sorted_ids = self._sorted_ids[in_kept]
+            self._id_order = np.searchsorted(kept, self._id_order[in_kept])
+        dirty = [box for box in dirty if box[0] < box[2] and box[1] < box[3]]
+        for box in dirty:
+            self.redraw_box(box)
+        return dirty
+
+    def kept_positions(self, items):
+        """
+        Previous positions of the items, if the items are the previous items with some removed.
+
+        Items are matched by their contour objects.
+
+        Returns:
+            numpy.ndarray or None: Increasing positions, or None if the items are not such a subsequence.
+        """
+        if len(items) > len(self._items):
+            return None
+        ids = contour_ids(items)
+        found = np.searchsorted(self._sorted_ids, ids)
+        if np.any(found >= len(self._sorted_ids)):
+            return None
+        if not np.array_equal(self._sorted_ids[found], ids):
+            return None
+        kept = self._id_order[found]
+        if np.any(np.diff(kept) <= 0):
+            return None
+        return kept
+
+    def highlight_changes(self, kept, highlight_index, count):
+        """Positions whose highlight differs from the previous update."""
+        previous = self._highlight
+        if kept is not None and previous is not None:
+            # Position of the previously highlighted contour, if it was kept
+            position = int(np.searchsorted(kept, previous))
+            previous = position if position < len(kept) and kept[position] == previous else None
+        if previous == highlight_index:
+            return set()
+        return {i for i in (previous, highlight_index) if i is not None and 0 <= i < count}
+
+    def index_contours(self):
+        """Sort the ids of the contours for matching the contours of the next update."""
+        ids = contour_ids(self._items)
+        self._id_order = np.argsort(ids, kind="stable")
+        self._sorted_ids = ids[self._id_order]
+
+    def redraw(self, img, items, highlight_index, options):
+        """Draw all labels over a fresh copy of the base image."""
+        if img is not self.image or self.base is None:
+            self.base = np.array(img).astype(np.uint8)
+            self.image = img
+        draw_contours, draw_labels, color = options
+        self.labeled = self.base.copy()
+        for i, item in enumerate(items):
+            draw_contour_label(self.labeled, item, label_color(color, highlight_index == i), draw_contours, draw_labels)
+        self._options = options
+        self._items = items
+        self._highlight = highlight_index
+        self._boxes = label_boxes(items, draw_contours, draw_labels, self.base.shape)
+        self.index_contours()
+
+    def redraw_box(self, box):
+        """
+        Draw a box of the labeled image again from the base image.
+
+        The contours reaching into the box are drawn in order on a copy of the base covering
+        all of them, so they are clipped only at the image border, as when drawn on the
+        whole image, and the box is copied back.
+        """
+        x0, y0, x1, y1 = box
+        boxes = self._boxes
+        touching = np.flatnonzero(
+            (boxes[:, 0] < x1) & (x0 < boxes[:, 2]) & (boxes[:, 1] < y1) & (y0 < boxes[:, 3])
+        )
+        if len(touching) == 0:
+            self.labeled[y0:y1, x0:x1] = self.base[y0:y1, x0:x1]
+            return
+        cx0 = min(x0, boxes[touching, 0].min())
+        cy0 = min(y0, boxes[touching, 1].min())
+        cx1 = max(x1, boxes[touching, 2].max())
+        cy1 = max(y1, boxes[touching, 3].max())
+        canvas = self.base[cy0:cy1, cx0:cx1].copy()
+        draw_contours, draw_labels, color = self._options
+        offset = (-int(cx0), -int(cy0))
+        for i in touching:
+            text_color = label_color(color, self._highlight == i)
+            draw_contour_label(canvas, self._items[i], text_color, draw_contours, draw_labels, offset)
+        self.labeled[y0:y1, x0:x1] = canvas[y0 - cy0:y1 - cy0, x0 - cx0:x1 - cx0]
+
+def contour_ids(items):
+    """Ids of the contour objects of items of the contours data."""
+    return np.fromiter((id(item['contour']) for item in items), dtype=np.uintp, count=len(items))
@@ -102,42 +102,147 @@ def calculate_l0(data, mapISET = None):
         logger.error(f"Error in calculate_l0: {e}")
         raise
 
-def convert_data_to_greyscale_image(points):
+def calculate_moments(data):
+    """
+    Calculate the mean and variance of data.
+
+    Parameters:
+        data (numpy.ndarray): The data array.
+
+    Returns:
+        tuple: The mean and the variance of data.
+
+    Raises:
+        ValueError: If data is not a non-empty numpy array.
+    """
+    if not isinstance(data, np.ndarray) or not data.size:
+        msg = "ValueError in calculate_moments: data must be a non-empty numpy array."
+        logger.error(msg)
+        raise ValueError(msg)
+    data = np.asarray(data, dtype=np.float64)
+    mean = data.mean()
+    return float(mean), float(np.mean((data - mean) ** 2))
+
+def calculate_l0_from_moments(mean, variance, ISETs):
+    """
+    Calculate l0 for many ISET values from the mean and variance of data.
+
+    Uses mean((I - ISET)^2) = var(I) + (mean(I) - ISET)^2, so the data is not needed
+    again for each ISET.
+
+    Parameters:
+        mean (float): Mean of the data.
+        variance (float): Variance of the data.
+        ISETs (array_like): ISET values.
+
+    Returns:
+        numpy.ndarray: l0 for each ISET value.
+    """
+    ISETs = np.asarray(ISETs, dtype=np.float64)
+    return np.sqrt(variance + (mean - ISETs) ** 2)
+
+def scale_data_to_image_range(points, bit_depth=8, clip_percentiles=None):
+    """
+    Scale data to the range of an unsigned integer image without quantizing it.
+
+    Values are mapped linearly from [min, max] to [0, 2**bit_depth - 1].
+
+    Parameters:
+        points (array_like): 2D data.
+        bit_depth (int, optional): 8 or 16. Default is 8.
+        clip_percentiles (tuple, optional): Lower and upper percentile used instead of
+            min and max; values outside are clipped. Default is None.
+
+    Returns:
+        numpy.ndarray: float64 array with the scaled data.
+
+    Raises:
+        ValueError: If bit_depth is not 8 or 16, or clip_percentiles is invalid.
+    """
+    if bit_depth not in (8, 16):
+        raise ValueError("bit_depth must be 8 or 16.")
+
+    data = np.asarray(points, dtype=np.float64)
+    if clip_percentiles is None:
+        min_z, max_z = data.min(), data.max()
+    else:
+        low, high = clip_percentiles
+        if not 0 <= low < high <= 100:
+            raise ValueError("clip_percentiles must satisfy 0 <= low < high <= 100.")
+        min_z, max_z = np.percentile(data, [low, high])
+        data = np.clip(data, min_z, max_z)
+    if max_z == min_z:
+        max_z += 1
+
+    max_value = 255 if bit_depth == 8 else 65535
+    scaled = max_value * (data - min_z)
+    scaled /= (max_z - min_z)
+    return scaled
+
+def normalize_data_to_image_range(points, bit_depth=8, clip_percentiles=None):
+    """
+    Normalize data to the range of an unsigned integer image.
+
+    Values are mapped linearly from [min, max] to [0, 2**bit_depth - 1] and truncated,
+    i.e. int(255 * (value - min) / (max - min)) for 8-bit output.
+
+    Parameters:
+        points (array_like): 2D data.
+        bit_depth (int, optional): 8 or 16. Default is 8.
+        clip_percentiles (tuple, optional): Lower and upper percentile used instead of
+            min and max; values outside are clipped. Default is None.
+
+    Returns:
+        numpy.ndarray: uint8 or uint16 array with the normalized data.
+
+    Raises:
+        ValueError: If bit_depth is not 8 or 16, or clip_percentiles is invalid.
+    """
+    scaled = scale_data_to_image_range(points, bit_depth, clip_percentiles)
+    return scaled.astype(np.uint8 if bit_depth == 8 else np.uint16)
+
+def quantize_image(image):
+    """
+    Quantize an image in the 0-255 range to uint8 for display.
+
+    Values are clipped to [0, 255] and truncated, like normalize_data_to_image_range,
+    so a float image scaled from data shows exactly as its greyscale image.
+
+    Parameters:
+        image (array_like): 2D image.
+
+    Returns:
+        numpy.ndarray: uint8 array.
+    """
+    image = np.asarray(image)
+    if image.dtype == np.uint8:
+        return image
+    return np.clip(image, 0, 255).astype(np.uint8)
+
+def convert_data_to_greyscale_image(points, bit_depth=8, clip_percentiles=None):
     """
     Create a grayscale image from input data.
 
     Parameters:
-        points (list): List of lists containing the data points.
+        points (array_like): 2D data.
+        bit_depth (int, optional): 8 for an 'L' image, 16 for an 'I;16' image. Default is 8.
+        clip_percentiles (tuple, optional): Lower and upper percentile used for normalization. Default is None.
 
     Returns:
         PIL.Image.Image: The created grayscale image.
 
     Raises:
-        ValueError: If points is not a list of lists.
+        ValueError: If points is not 2D or the options are invalid.
     """
     try:
-        # Input validation
-        # if not isinstance(points, list) or not all(isinstance(row, list) for row in points):
-        #     raise ValueError("Input points must be a list of lists.")
-
-        # Create a new grayscale image
-        img = Image.new('L', (len(points[0]), len(points)))
-
-        # Normalize the values in data to the range [0, 255]
-        max_z = max(map(max, points))
-        min_z = min(map(min, points))
-        if max_z == min_z:
-            max_z += 1
-        for i in range(len(points)):
-            for j in range(len(points[i])):
-                val = int(255 * (points[i][j] - min_z) / (max_z - min_z))
-                img.putpixel((j, i), val)
-
-        return img
+        if np.ndim(points) != 2:
+            raise ValueError("Input points must be 2D.")
+
+        return Image.fromarray(normalize_data_to_image_range(points, bit_depth, clip_percentiles))
     except ValueError as ve:
         msg = f"ValueError in create_greyscale_image: {ve}"
         logger.error(msg)
         raise ValueError(msg)
     except Exception as e:
         logger.error(f"Error in create_greyscale_image: {e}")
-        raise
\ No newline at end of file
+        raise
@@ -10,12 +10,16 @@ import os, sys
 sys.path.insert(1, "/".join(os.path.realpath(__file__).split("/")[0:-2]))
 
 import re
+import csv
 import numpy as np
 
 from data.files.write_stp import write_STP_file
 from data.files.write_txt import write_txt_file
-from data.processing.data_process import calculate_I_ISET_square, calculate_l0
+from data.processing.data_process import (
+    calculate_I_ISET_square, calculate_l0, calculate_moments, calculate_l0_from_moments
+)
 from data.files.read_s94 import S94_IMAGE_MODE
+from data.files.read_mpp import iter_mpp_frames
 
 import logging
 
@@ -193,13 +197,15 @@ def calculate_z_amplitude_from_S94_file(z_gain, data):
     max_z, min_z = np.max(height_array), np.min(height_array)
     return max_z - min_z
 
-def process_stp_files_I_ISET_map(data, ISET):
+def process_stp_files_I_ISET_map(data, ISET, raise_errors=False):
     """
     Process STP files to generate I-ISET maps.
 
     Args:
         data (list of dict): List of dictionaries, where each dictionary contains 'data', 'header_info', and 'file_name' keys.
         ISET (int or float): Value of ISET.
+        raise_errors (bool, optional): Raise the error of a failing data set instead of reporting it and
+            continuing with the next one. Defaults to False.
 
     Raises:
         ValueError: If data is not provided as a list or if any dictionary in the list is missing required keys.
@@ -237,19 +243,23 @@ def process_stp_files_I_ISET_map(data, ISET):
                 x_offset= float(header_info['X-Offset'][:-3]),
                 y_offset= float(header_info['Y-Offset'][:-3]),
                 z_gain= float(header_info['Z Gain']),
-                data= [i for row in mapISET for i in row]
+                data= mapISET,
+                raise_errors= raise_errors
             )
         except Exception as e:
             error_msg = f"proccess_stp_files_I_ISET_map: Error processing data set: {data_set['file_name']}. Error: {e}"
             logger.error(error_msg)
             print(error_msg)
+            if raise_errors:
+                raise
 
-def convert_s94_files_to_stp(file):
+def convert_s94_files_to_stp(file, raise_errors=False):
     """
     Convert S94 file data to STP file format.
 
     Args:
         file (dict): Dictionary containing 'data', 'header_info', and 'file_name' keys.
+        raise_errors (bool, optional): Raise errors writing the file instead of reporting them. Defaults to False.
 
     Raises:
         ValueError: If the input file is not provided as a dictionary or is missing required keys.
@@ -273,16 +283,19 @@ def convert_s94_files_to_stp(file):
         x_offset= header_info['x_offset'],
         y_offset= header_info['y_offset'],
         z_gain= header_info['z_gain'],
-        data= [i for row in file['data'] for i in row]
+        data= file['data'],
+        raise_errors= raise_errors
     )
 
-def process_s94_files_I_ISET_map(data, ISET):
+def process_s94_files_I_ISET_map(data, ISET, raise_errors=False):
     """
     Process a list of S94 files to calculate I_ISET square and generate corresponding I-ISET maps.
 
     Args:
         data (list): A list of dictionaries, each containing 'data', 'header_info', and 'file_name' keys.
         ISET (int, float): The ISET value used for calculating the I_ISET square.
+        raise_errors (bool, optional): Raise the error of a failing data set instead of reporting it and
+            continuing with the next one. Defaults to False.
 
     Raises:
         ValueError: If input data is not provided as a list, or if ISET is not a numeric value.
@@ -323,24 +336,31 @@ def process_s94_files_I_ISET_map(data, ISET):
                 x_offset= header_info['x_offset'],
                 y_offset= header_info['y_offset'],
                 z_gain= header_info['z_gain'],
-                data= [i for row in mapISET for i in row]
+                data= mapISET,
+                raise_errors= raise_errors
             )
         except KeyError as ke:
             error_msg = f"proccess_s94_files_I_ISET_map: KeyError: {ke}. Missing key in header_info."
             logger.error(error_msg)
             print(error_msg)
+            if raise_errors:
+                raise
         except Exception as e:
             error_msg = f"proccess_s94_files_I_ISET_map: Error processing data set: {data_set['file_name']}. Error: {e}"
             logger.error(error_msg)
             print(error_msg)
+            if raise_errors:
+                raise
 
-def process_mpp_files_I_ISET_map(data, ISET):
+def process_mpp_files_I_ISET_map(data, ISET, raise_errors=False):
     """
     Process a list of MPP files to calculate I_ISET square and generate corresponding I-ISET maps for each frame.
 
     Args:
         data (list): A list of dictionaries, each containing 'data' and 'header_info' keys.
         ISET (int, float): The ISET value used for calculating the I_ISET square.
+        raise_errors (bool, optional): Raise the error of a failing data set instead of reporting it and
+            continuing with the next one. Defaults to False.
 
     Raises:
         ValueError: If input data is not provided as a list, or if ISET is not a numeric value.
@@ -364,7 +384,7 @@ def process_mpp_files_I_ISET_map(data, ISET):
             num_columns = int(header_info.get("General Info", {}).get("Number of columns", 0))
             num_rows = int(header_info.get("General Info", {}).get("Number of rows", 0))
             
-            for i, frame in enumerate(data_set['data'], start=1):
+            for i, frame in enumerate(iter_mpp_frames(data_set['data']), start=1):
                 data_array = np.array(frame).reshape((num_rows, num_columns))
                 mapISET = calculate_I_ISET_square(data= data_array, ISET= ISET)
 
@@ -384,24 +404,138 @@ def process_mpp_files_I_ISET_map(data, ISET):
                     x_offset= float(extracted_header_info['x_offset']),
                     y_offset= float(extracted_header_info['y_offset']),
                     z_gain= int(extracted_header_info['z_gain']),
-                    data= [i for row in mapISET for i in row]
+                    data= mapISET,
+                    raise_errors= raise_errors
                 )
         except KeyError as ke:
             error_msg = f"proccess_mpp_files_I_ISET_map: KeyError: {ke}. Missing key in header_info."
             logger.error(error_msg)
             print(error_msg)
+            if raise_errors:
+                raise
         except Exception as e:
             error_msg = f"proccess_mpp_files_I_ISET_map: Error processing data set: {data_set['file_name']}. Error: {e}"
             logger.error(error_msg)
             print(error_msg)
+            if raise_errors:
+                raise
 
-def process_stp_and_s94_files_l0(data, ISET):
+def create_l0_result(file_name, frame, ISET, l0):
+    """
+    Create a summary record of a calculated l0 value.
+
+    Args:
+        file_name (str): The name of the file.
+        frame (int or None): The number of the frame for MPP files.
+        ISET (int, float or None): The ISET value, None if l0 was calculated from an (I - ISET)^2 map.
+        l0 (float): The calculated l0 value.
+
+    Returns:
+        dict: A dictionary with 'file_name', 'frame', 'ISET' and 'l0' keys.
+    """
+    return {"file_name": file_name, "frame": frame, "ISET": ISET, "l0": float(l0)}
+
+def create_ISET_range(start, stop, step):
+    """
+    Create evenly spaced ISET values from start to stop (inclusive).
+
+    Args:
+        start (int, float): The first ISET value.
+        stop (int, float): The last ISET value.
+        step (int, float): The spacing between ISET values.
+
+    Returns:
+        list: ISET values.
+
+    Raises:
+        ValueError: If the range is empty or step is not positive.
+    """
+    if step <= 0 or stop < start:
+        error_msg = "create_ISET_range: step must be positive and stop must not be smaller than start."
+        logger.error(error_msg)
+        raise ValueError(error_msg)
+    count = int(np.floor((stop - start) / step + 1e-9)) + 1
+    return [round(float(ISET), 12) for ISET in start + step * np.arange(count)]
+
+def process_files_l0_sweep(data, ISETs, output_file=None, raise_errors=False):
+    """
+    Calculate l0 for many ISET values for every file and frame in a single pass.
+
+    The mean and variance of each image or frame are computed once, and l0 for all ISET
+    values follows from them. Results are written as one table instead of per-file l0 text files.
+
+    Args:
+        data (list): A list of dictionaries, each containing 'data' and 'file_name' keys. MPP data sets
+            also need 'header_info'.
+        ISETs (list): ISET values.
+        output_file (str, optional): Path of a .csv file with 'file_name', 'frame', 'ISET' and 'l0' columns.
+        raise_errors (bool, optional): Raise the error of a failing data set instead of reporting it and
+            continuing with the next one. Defaults to False.
+
+    Returns:
+        list: A dictionary with 'file_name', 'frame', 'ISET' and 'l0' keys for each file, frame and ISET.
+
+    Raises:
+        ValueError: If input data is not provided as a list, or if ISETs are not numeric values.
+    """
+    if not isinstance(data, list):
+        error_msg = "process_files_l0_sweep: Input data must be provided as a list."
+        logger.error(error_msg)
+        raise ValueError(error_msg)
+    if not all(isinstance(d, dict) and 'data' in d and 'file_name' in d for d in data):
+        error_msg = "process_files_l0_sweep: Each element of the input data list must be a dictionary with 'data' and 'file_name' keys."
+        logger.error(error_msg)
+        raise ValueError(error_msg)
+    if not ISETs or not all(isinstance(ISET, (int, float)) for ISET in ISETs):
+        error_msg = "process_files_l0_sweep: ISETs must be a non-empty list of numeric values."
+        logger.error(error_msg)
+        raise ValueError(error_msg)
+
+    results = []
+    out = open(output_file, "w", newline="") if output_file else None
+    try:
+        writer = None
+        if out:
+            writer = csv.DictWriter(out, fieldnames=["file_name", "frame", "ISET", "l0"])
+            writer.writeheader()
+
+        for data_set in data:
+            try:
+                if data_set['file_name'][-3:].lower() == "mpp":
+                    frames = enumerate(iter_mpp_frames(data_set['data']), start=1)
+                else:
+                    frames = [(None, data_set['data'])]
+
+                for frame_number, frame in frames:
+                    mean, variance = calculate_moments(np.asarray(frame))
+                    l0_values = calculate_l0_from_moments(mean, variance, ISETs)
+                    records = [create_l0_result(data_set['file_name'], frame_number, ISET, l0) for ISET, l0 in zip(ISETs, l0_values)]
+                    if writer:
+                        writer.writerows(records)
+                    results += records
+            except Exception as e:
+                error_msg = f"process_files_l0_sweep: Error processing data set: {data_set['file_name']}. Error: {e}"
+                logger.error(error_msg)
+                print(error_msg)
+                if raise_errors:
+                    raise
+    finally:
+        if out:
+            out.close()
+    return results
+
+def process_stp_and_s94_files_l0(data, ISET, raise_errors=False):
     """
     Process a list of STP and S94 files to calculate l0 parameter for each file, and write it to a text file.
 
     Args:
         data (list): A list of dictionaries, each containing 'data' and 'file_name' keys.
         ISET (int, float): The ISET value used for calculating the I_ISET square.
+        raise_errors (bool, optional): Raise the error of a failing data set instead of reporting it and
+            continuing with the next one. Defaults to False.
+
+    Returns:
+        list: A dictionary with 'file_name', 'frame', 'ISET' and 'l0' keys for each processed file.
 
     Raises:
         ValueError: If input data is not provided as a list, or if ISET is not a numeric value.
@@ -419,27 +553,39 @@ def process_stp_and_s94_files_l0(data, ISET):
         logger.error(error_msg)
         raise ValueError(error_msg)
     
+    results = []
     for data_set in data:
         try:
             mapISET = calculate_I_ISET_square(data_set['data'], ISET)
             l0 = calculate_l0(data_set['data'], mapISET.flatten())
-            write_txt_file(data_set['file_name'], l0)
+            write_txt_file(data_set['file_name'], l0, raise_errors=raise_errors)
+            results.append(create_l0_result(data_set['file_name'], None, ISET, l0))
         except KeyError as ke:
             error_msg = f"process_stp_and_s94_files_l0: KeyError: {ke}. Missing key in data_set."
             logger.error(error_msg)
             print(error_msg)
+            if raise_errors:
+                raise
         except Exception as e:
             error_msg = f"process_stp_and_s94_files_l0: Error processing data set: {data_set['file_name']}. Error: {e}"
             logger.error(error_msg)
             print(error_msg)
+            if raise_errors:
+                raise
+    return results
 
-def process_mpp_files_l0(data, ISET):
+def process_mpp_files_l0(data, ISET, raise_errors=False):
     """
     Process a list of MPP files to calculate l0 parameter for each frame, and write it to a text file.
 
     Args:
         data (list): A list of dictionaries, each containing 'data', 'header_info', and 'file_name' keys.
         ISET (int, float): The ISET value used for calculating the I_ISET square.
+        raise_errors (bool, optional): Raise the error of a failing data set instead of reporting it and
+            continuing with the next one. Defaults to False.
+
+    Returns:
+        list: A dictionary with 'file_name', 'frame', 'ISET' and 'l0' keys for each processed frame.
 
     Raises:
         ValueError: If input data is not provided as a list, or if any element of the input data list does not have the required keys.
@@ -457,32 +603,44 @@ def process_mpp_files_l0(data, ISET):
         logger.error(error_msg)
         raise ValueError(error_msg)
 
+    results = []
     for data_set in data:
         try:
             header_info = data_set['header_info']
             num_columns = int(header_info.get("General Info", {}).get("Number of columns", 0))
             num_rows = int(header_info.get("General Info", {}).get("Number of rows", 0))
-            for i, frame in enumerate(data_set['data'], start=1):
+            for i, frame in enumerate(iter_mpp_frames(data_set['data']), start=1):
                 data_array = np.array(frame).reshape((num_rows, num_columns))
 
                 mapISET = calculate_I_ISET_square(data= data_array, ISET= ISET)
                 l0 = calculate_l0(data_array, mapISET.flatten())
-                write_txt_file(data_set['file_name'], l0, f"frame {i}")
+                write_txt_file(data_set['file_name'], l0, f"frame {i}", raise_errors=raise_errors)
+                results.append(create_l0_result(data_set['file_name'], i, ISET, l0))
         except KeyError as ke:
             error_msg = f"proccess_mpp_files_l0: KeyError: {ke}. Missing key in data_set."
             logger.error(error_msg)
             print(error_msg)
+            if raise_errors:
+                raise
         except Exception as e:
             error_msg = f"proccess_mpp_files_l0: Error processing data set: {data_set['file_name']}. Error: {e}"
             logger.error(error_msg)
             print(error_msg)
+            if raise_errors:
+                raise
+    return results
 
-def process_stp_and_s94_files_l0_from_I_ISET_map(data):
+def process_stp_and_s94_files_l0_from_I_ISET_map(data, raise_errors=False):
     """
     Calculate l0 parameter from the provided data (assuming data is I-ISET square) from .s94 or .stp files, and write it to a text file.
 
     Args:
         data (list): A list of dictionaries, each containing 'data' and 'file_name' keys.
+        raise_errors (bool, optional): Raise the error of a failing data set instead of reporting it and
+            continuing with the next one. Defaults to False.
+
+    Returns:
+        list: A dictionary with 'file_name', 'frame', 'ISET' and 'l0' keys for each processed file.
 
     Raises:
         ValueError: If input data is not provided as a list, or if any element of the input data list does not have the required keys.
@@ -497,25 +655,37 @@ def process_stp_and_s94_files_l0_from_I_ISET_map(data):
         logger.error(error_msg)
         raise ValueError(error_msg)
 
+    results = []
     for data_set in data:
         try:
             l0 = calculate_l0(data_set['data'])
-            write_txt_file(data_set['file_name'], l0)
+            write_txt_file(data_set['file_name'], l0, raise_errors=raise_errors)
+            results.append(create_l0_result(data_set['file_name'], None, None, l0))
         except KeyError as ke:
             error_msg = f"proccess_stp_and_s94_files_l0_from_I_ISET_map: KeyError: {ke}. Missing key in data_set."
             logger.error(error_msg)
             print(error_msg)
+            if raise_errors:
+                raise
         except Exception as e:
             error_msg = f"proccess_stp_and_s94_files_l0_from_I_ISET_map: Error processing data set: {data_set['file_name']}. Error: {e}"
             logger.error(error_msg)
             print(error_msg)
+            if raise_errors:
+                raise
+    return results
 
-def process_mpp_files_l0_from_I_ISET_map(data):
+def process_mpp_files_l0_from_I_ISET_map(data, raise_errors=False):
     """
     Calculate l0 parameter from the provided data (assuming data is I-ISET square) from .mpp files, and write it to a text file.
 
     Args:
         data (list): A list of dictionaries, each containing 'data' and 'header_info' keys.
+        raise_errors (bool, optional): Raise the error of a failing data set instead of reporting it and
+            continuing with the next one. Defaults to False.
+
+    Returns:
+        list: A dictionary with 'file_name', 'frame', 'ISET' and 'l0' keys for each processed frame.
 
     Raises:
         ValueError: If input data is not provided as a list, or if any element of the input data list does not have the required keys.
@@ -529,22 +699,29 @@ def process_mpp_files_l0_from_I_ISET_map(data):
         logger.error(error_msg)
         raise ValueError(error_msg)
 
+    results = []
     for data_set in data:
         try:
             header_info = data_set['header_info']
             num_columns = int(header_info.get("General Info", {}).get("Number of columns", 0))
             num_rows = int(header_info.get("General Info", {}).get("Number of rows", 0))
 
-            for i, frame in enumerate(data_set['data'], start=1):
+            for i, frame in enumerate(iter_mpp_frames(data_set['data']), start=1):
                 data_array = np.array(frame).reshape((num_rows, num_columns))
                 l0 = calculate_l0(data_array)
-                write_txt_file(data_set['file_name'], l0, f"frame {i}")
+                write_txt_file(data_set['file_name'], l0, f"frame {i}", raise_errors=raise_errors)
+                results.append(create_l0_result(data_set['file_name'], i, None, l0))
 
         except KeyError as ke:
             error_msg = f"proccess_mpp_files_l0_from_I_ISET_map: KeyError: {ke}. Missing key in data_set."
             logger.error(error_msg)
             print(error_msg)
+            if raise_errors:
+                raise
         except Exception as e:
             error_msg = f"proccess_mpp_files_l0_from_I_ISET_map: Error processing data set: {data_set['file_name']}. Error: {e}"
             logger.error(error_msg)
-            print(error_msg)
\ No newline at end of file
+            print(error_msg)
+            if raise_errors:
+                raise
+    return results
@@ -23,31 +23,29 @@ import logging
 
 from data.processing.file_process import calculate_pixels_from_nm
 
-from data.processing.contours.contour_detection import (
-    ContourFilter
-)
+from data.processing.contours.contour_features import ContourFeatures
+from data.processing.contours.label_overlay import draw_contour_label, label_color
 
 logger = logging.getLogger(__name__)
 
 def DrawLabels(img, contours_data, draw_contours=False, draw_labels=False, color=False, highlight_index=None):
+    """
+    Draw the labels and contours of contours data on a copy of an image.
+
+    Args:
+        img (PIL.Image.Image): The greyscale image.
+        contours_data (list): Items with 'name', 'contour' and 'moments'.
+        draw_contours (bool, optional): Draw the contours.
+        draw_labels (bool, optional): Write the contour names at their centroids.
+        color (bool, optional): Draw in white instead of black.
+        highlight_index (int, optional): Index of the contour drawn in grey.
+
+    Returns:
+        numpy.ndarray: The labeled image.
+    """
+    img = np.array(img).astype(np.uint8)
     for i, item in enumerate(contours_data):
-        if color:
-            text_color = (255,255,255)
-        elif highlight_index == i:
-            text_color = (169, 169, 169)
-        else:
-            text_color = (0,0,0)
-        M = item['moments']
-        name = item['name']
-        img = np.array(img).astype(np.uint8)
-        if M["m00"] != 0:
-            cX = int(M["m10"] / M["m00"])
-            cY = int(M["m01"] / M["m00"])
-            if draw_labels:
-                img = cv2.putText(img, name, (cX, cY), cv2.FONT_HERSHEY_SIMPLEX, 0.3, text_color, 1)
-        if draw_contours:
-                img = cv2.drawContours(img, [item['contour']], 0, text_color, 1)
-    
+        draw_contour_label(img, item, label_color(color, highlight_index == i), draw_contours, draw_labels)
     return img
 
 def DrawContours(image, contours, color=(255, 255, 255), thickness=1):
@@ -103,20 +101,32 @@ def concatenate_four_images(processed_img, original_img, edged_image, filtered_c
 
     return img
 
-def process_contours_filters(filter_params, edge_img, contours, coeff):
-    min_area_nm = filter_params['min_area_[nm2]']
-    max_area_nm = filter_params['max_area_[nm2]']
+def filter_contour_features(filter_params, features, coeff):
+    """
+    Select the contours of a feature table matching the contour filter parameters.
 
-    min_area_px = calculate_pixels_from_nm(min_area_nm, coeff)
-    max_area_px = calculate_pixels_from_nm(max_area_nm, coeff)
-    
-    filtered_contours = ContourFilter(
-            contours= contours,
-            circularity_low= filter_params['circularity_low'],
-            circularity_high= filter_params['circularity_high'],
-            min_area= min_area_px,
-            max_area= max_area_px
-        )
+    Args:
+        filter_params (dict): Contour filter parameters.
+        features (ContourFeatures): Features of the contours.
+        coeff (float): Area of a pixel in nm2.
+
+    Returns:
+        ContourFeatures: Features of the selected contours.
+    """
+    min_area_px = calculate_pixels_from_nm(filter_params['min_area_[nm2]'], coeff)
+    max_area_px = calculate_pixels_from_nm(filter_params['max_area_[nm2]'], coeff)
+    mask = features.filter_mask(
+        circularity_low= filter_params['circularity_low'],
+        circularity_high= filter_params['circularity_high'],
+        min_area= min_area_px,
+        max_area= max_area_px
+    )
+    return features.select(mask)
+
+def process_contours_filters(filter_params, edge_img, contours, coeff, features=None):
+    if features is None:
+        features = ContourFeatures.from_contours(contours)
+    filtered_contours = filter_contour_features(filter_params, features, coeff).contours
     result_image = DrawContours(
             image= edge_img,
             contours= filtered_contours
@@ -10,62 +10,151 @@ import os, sys
 sys.path.insert(1, "/".join(os.path.realpath(__file__).split("/")[0:-2]))
 
 import cv2
+import hashlib
+import threading
 import numpy as np
-from scipy.optimize import least_squares
 from skimage import img_as_float
 import matplotlib.pyplot as plt
-from sklearn.preprocessing import PolynomialFeatures
-from sklearn.linear_model import LinearRegression
 from skimage.morphology import disk, opening
-
-def fit_plane(image, region=None):
-    rows, cols = image.shape
-    
-    # If a region is specified, use that region for fitting
-    if region is not None:
-        x_start, y_start, width, height = region
-        x_end = x_start + width
-        y_end = y_start + height
-        image_region = image[y_start:y_end, x_start:x_end]
-        
-        X_region, Y_region = np.meshgrid(np.arange(x_start, x_end), np.arange(y_start, y_end))
-        X_flat = X_region.flatten()
-        Y_flat = Y_region.flatten()
-        Z_flat = image_region.flatten()
+from collections import OrderedDict
+
+from data.processing.data_process import quantize_image
+
+# Memory of the polynomial leveling bases kept in memory; a basis with a mask
+# at 1024x1024 and order 3 takes about 80 MB
+POLYNOMIAL_BASIS_CACHE_MAX_BYTES = 256 * 1024 * 1024
+
+# Bases with their sizes, shared by the recipe workers and the preview thread
+_polynomial_basis_cache = OrderedDict()
+_polynomial_basis_cache_size = 0
+_polynomial_basis_cache_lock = threading.Lock()
+
+# Disk radius used on the downsampled image by the pyramid background estimation
+ADAPTIVE_LEVELING_PYRAMID_RADIUS = 10
+
+def plane_fit_weights(shape, region=None, mask=None):
+    """
+    Create weights of the pixels used for plane fitting.
+
+    Args:
+        shape (tuple): Shape (rows, cols) of the image.
+        region (tuple, optional): (x_start, y_start, width, height) of the region used for fitting.
+        mask (numpy.ndarray, optional): Boolean array, True for pixels excluded from fitting
+            (e.g. adsorbates or steps).
+
+    Returns:
+        numpy.ndarray: float64 array with 1 for used and 0 for excluded pixels.
+    """
+    rows, cols = shape
+    if region is None:
+        weights = np.ones((rows, cols))
     else:
-        # Use the whole image
-        X, Y = np.meshgrid(np.arange(cols), np.arange(rows))
-        X_flat = X.flatten()
-        Y_flat = Y.flatten()
-        Z_flat = image.flatten()
-
-    # Define the function to fit the plane
-    def plane(params, x, y, z):
-        a, b, c = params
-        return a*x + b*y + c - z
-
-    # Initial guess for the plane parameters
-    initial_guess = [0, 0, np.mean(Z_flat)]
-
-    # Perform least squares fitting
-    result = least_squares(plane, initial_guess, args=(X_flat, Y_flat, Z_flat))
-
-    # Get the fitted plane parameters
-    a, b, c = result.x
-    print(f'Plane parameters: a={a}, b={b}, c={c}')
-
-    # Create the fitted plane for the whole image
-    X, Y = np.meshgrid(np.arange(cols), np.arange(rows))
-    fitted_plane = a * X + b * Y + c
+        x_start, y_start, width, height = region
+        weights = np.zeros((rows, cols))
+        weights[y_start:y_start + height, x_start:x_start + width] = 1.0
+    if mask is not None:
+        weights[np.asarray(mask, dtype=bool)] = 0.0
+    return weights
+
+def fit_plane_coefficients(image, region=None, mask=None):
+    """
+    Fit a plane z = a*x + b*y + c to an image or a stack of images.
+
+    The 3x3 normal equations are accumulated from row and column sums, so no coordinate
+    grids are created. Coordinates are centered for numerical stability. All frames of a
+    stack share the normal matrix and are solved together.
+
+    Args:
+        image (numpy.ndarray): 2D image or 3D stack (frames, rows, cols).
+        region (tuple, optional): (x_start, y_start, width, height) of the region used for fitting.
+        mask (numpy.ndarray, optional): Boolean array, True for pixels excluded from fitting.
+
+    Returns:
+        numpy.ndarray: Coefficients (a, b, c) with shape (3,) for an image or (frames, 3) for a stack.
+
+    Raises:
+        ValueError: If fewer than three pixels are used for fitting.
+    """
+    data = np.asarray(image, dtype=np.float64)
+    rows, cols = data.shape[-2:]
+    weights = plane_fit_weights((rows, cols), region, mask)
+
+    x = np.arange(cols) - (cols - 1) / 2
+    y = np.arange(rows) - (rows - 1) / 2
+    col_weights = weights.sum(axis=0)
+    row_weights = weights.sum(axis=1)
+    n = col_weights.sum()
+    if n < 3:
+        raise ValueError("At least three pixels are needed to fit a plane.")
+
+    sx, sy = col_weights @ x, row_weights @ y
+    normal_matrix = np.array([
+        [col_weights @ x ** 2, y @ weights @ x, sx],
+        [y @ weights @ x, row_weights @ y ** 2, sy],
+        [sx, sy, n]
+    ])
+
+    weighted = data * weights
+    rhs = np.stack([weighted.sum(axis=-2) @ x, weighted.sum(axis=-1) @ y, weighted.sum(axis=(-2, -1))], axis=-1)
+    a, b, c = np.linalg.lstsq(normal_matrix, np.atleast_2d(rhs).T, rcond=None)[0]
+
+    # Move the constant term from centered to pixel coordinates
+    c = c - a * (cols - 1) / 2 - b * (rows - 1) / 2
+    coefficients = np.stack([a, b, c], axis=-1)
+    return coefficients[0] if data.ndim == 2 else coefficients
+
+def evaluate_plane(coefficients, shape):
+    """
+    Evaluate planes z = a*x + b*y + c on a pixel grid.
+
+    Args:
+        coefficients (numpy.ndarray): (a, b, c) or an array of them with shape (frames, 3).
+        shape (tuple): Shape (rows, cols) of the image.
+
+    Returns:
+        numpy.ndarray: The plane(s) with shape (rows, cols) or (frames, rows, cols).
+    """
+    rows, cols = shape
+    coefficients = np.asarray(coefficients, dtype=np.float64)
+    a, b, c = (coefficients[..., i, None, None] for i in range(3))
+    return a * np.arange(cols) + b * np.arange(rows)[:, None] + c
+
+def fit_plane(image, region=None, mask=None):
+    """Fit a plane to the image (or region) and evaluate it for the whole image."""
+    rows, cols = np.shape(image)[-2:]
+    return evaluate_plane(fit_plane_coefficients(image, region, mask), (rows, cols))
+
+def level_plane(data, region=None, mask=None):
+    """
+    Subtract the best fitting plane from data in float64.
+
+    Works on raw data (e.g. original_data) and on stacks of frames.
+
+    Args:
+        data (numpy.ndarray): 2D image or 3D stack (frames, rows, cols).
+        region (tuple, optional): (x_start, y_start, width, height) of the region used for fitting.
+        mask (numpy.ndarray, optional): Boolean array, True for pixels excluded from fitting.
+
+    Returns:
+        numpy.ndarray: The leveled data.
+    """
+    data = np.asarray(data, dtype=np.float64)
+    return data - fit_plane(data, region, mask)
+
+def PlaneLeveling(img, dtype=np.uint8):
+    """Level the image by subtracting the best fitting plane."""
+    leveled_image = level_plane(np.array(img))
+    leveled_image_normalized = cv2.normalize(leveled_image, None, 0, 255, cv2.NORM_MINMAX)
+    leveled_image_normalized = leveled_image_normalized.astype(dtype)
 
-    return fitted_plane
+    return leveled_image_normalized
 
-def RegionLeveling(img):
+def RegionLeveling(img, dtype=np.uint8):
     image = np.array(img)
 
     # Display the original image for ROI selection
-    cv2.imshow("Select ROI", image)
-    roi = cv2.selectROI("Select ROI", image, fromCenter=False, showCrosshair=True)
+    cv2.imshow("Select ROI", quantize_image(image))
+    roi = cv2.selectROI("Select ROI", quantize_image(image), fromCenter=False, showCrosshair=True)
     cv2.destroyAllWindows()
 
     # Check if ROI is selected, if not use the whole image
@@ -80,11 +169,11 @@ def RegionLeveling(img):
     # Subtract the fitted plane from the original image
     leveled_image = image - fitted_plane
     leveled_image_normalized = cv2.normalize(leveled_image, None, 0, 255, cv2.NORM_MINMAX)
-    leveled_image_normalized = leveled_image_normalized.astype(np.uint8)
+    leveled_image_normalized = leveled_image_normalized.astype(dtype)
 
     return leveled_image_normalized
 
-def ThreePointLeveling(img):
+def ThreePointLeveling(img, dtype=np.uint8):
 
     image = np.array(img)
 
@@ -97,7 +186,7 @@ def ThreePointLeveling(img):
             if len(points) == 3:
                 cv2.destroyAllWindows()
 
-    image_display = cv2.cvtColor(image, cv2.COLOR_GRAY2BGR)
+    image_display = cv2.cvtColor(quantize_image(image), cv2.COLOR_GRAY2BGR)
 
     # Display the image and set up the callback for capturing points
     points = []
@@ -135,50 +224,183 @@ def ThreePointLeveling(img):
     leveled_image = image - fitted_plane
 
     leveled_image_normalized = cv2.normalize(leveled_image, None, 0, 255, cv2.NORM_MINMAX)
-    leveled_image_normalized = leveled_image_normalized.astype(np.uint8)
+    leveled_image_normalized = leveled_image_normalized.astype(dtype)
 
     return leveled_image_normalized
 
-def fit_polynomial_surface(image, order=3):
-    """Fit a polynomial surface to the image."""
-    m, n = image.shape
-    Y, X = np.mgrid[:m, :n]
-    X = X.flatten()
-    Y = Y.flatten()
-    Z = image.flatten()
-
-    poly = PolynomialFeatures(degree=order)
-    X_poly = poly.fit_transform(np.column_stack((X, Y)))
-
-    model = LinearRegression()
-    model.fit(X_poly, Z)
-    Z_poly = model.predict(X_poly)
+def polynomial_basis_1d(length, order):
+    """Orthonormal polynomial basis (columns of degree 0..order) on length points."""
+    t = np.linspace(-1.0, 1.0, length)
+    # Legendre polynomials keep the QR well conditioned for high orders
+    vander = np.polynomial.legendre.legvander(t, min(order, length - 1))
+    basis, _ = np.linalg.qr(vander)
+    return basis
+
+def get_polynomial_basis(shape, order, mask=None):
+    """
+    Get the cached least squares basis for polynomial leveling.
+
+    The space of polynomials of total degree <= order is spanned by products of 1D
+    orthonormal polynomials of degrees i (rows) and j (columns) with i + j <= order.
+    Without a mask these products are orthonormal on the grid, so the fit is a projection
+    computed with two small matrices. With a mask, the pseudo-inverse of the basis at the
+    used pixels is computed once.
+
+    Args:
+        shape (tuple): Shape (rows, cols) of the image.
+        order (int): Order of the polynomial.
+        mask (numpy.ndarray, optional): Boolean array, True for pixels excluded from fitting.
+
+    Returns:
+        dict: The cached basis.
+    """
+    rows, cols = shape
+    mask_key = None
+    if mask is not None:
+        mask = np.asarray(mask, dtype=bool)
+        mask_key = hashlib.sha1(np.packbits(mask).tobytes()).hexdigest()
+    key = (rows, cols, int(order), mask_key)
+
+    with _polynomial_basis_cache_lock:
+        entry = _polynomial_basis_cache.get(key)
+        if entry is not None:
+            _polynomial_basis_cache.move_to_end(key)
+            return entry[0]
+
+    basis_y = polynomial_basis_1d(rows, order)
+    basis_x = polynomial_basis_1d(cols, order)
+    degrees = np.add.outer(np.arange(basis_y.shape[1]), np.arange(basis_x.shape[1]))
+    terms = degrees <= order
+    basis = {"basis_y": basis_y, "basis_x": basis_x, "terms": terms, "used": None, "pinv": None}
+
+    if mask is not None:
+        used = ~mask.ravel()
+        term_y, term_x = np.nonzero(terms)
+        used_y, used_x = np.divmod(np.flatnonzero(used), cols)
+        design = basis_y[used_y][:, term_y] * basis_x[used_x][:, term_x]
+        basis["used"] = used
+        basis["pinv"] = np.linalg.pinv(design)
+
+    store_polynomial_basis(key, basis)
+    return basis
+
+def store_polynomial_basis(key, basis):
+    """Cache a basis, evicting least recently used bases beyond POLYNOMIAL_BASIS_CACHE_MAX_BYTES."""
+    global _polynomial_basis_cache_size
+    size = sum(value.nbytes for value in basis.values() if value is not None)
+    if size > POLYNOMIAL_BASIS_CACHE_MAX_BYTES:
+        return
+    with _polynomial_basis_cache_lock:
+        if key in _polynomial_basis_cache:
+            _polynomial_basis_cache_size -= _polynomial_basis_cache.pop(key)[1]
+        _polynomial_basis_cache[key] = (basis, size)
+        _polynomial_basis_cache_size += size
+        while _polynomial_basis_cache_size > POLYNOMIAL_BASIS_CACHE_MAX_BYTES:
+            _, (_, evicted_size) = _polynomial_basis_cache.popitem(last=False)
+            _polynomial_basis_cache_size -= evicted_size
+
+def fit_polynomial_surface(image, order=3, mask=None):
+    """
+    Fit a polynomial surface to the image.
+
+    Args:
+        image (numpy.ndarray): 2D image or 3D stack (frames, rows, cols). All frames are fitted
+            with a single batched matrix product.
+        order (int, optional): Order of the polynomial. Defaults to 3.
+        mask (numpy.ndarray, optional): Boolean array, True for pixels excluded from fitting.
+
+    Returns:
+        numpy.ndarray: The fitted surface(s), same shape as image.
+    """
+    data = np.asarray(image, dtype=np.float64)
+    rows, cols = data.shape[-2:]
+    basis = get_polynomial_basis((rows, cols), order, mask)
+    basis_y, basis_x, terms = basis["basis_y"], basis["basis_x"], basis["terms"]
+
+    if basis["pinv"] is None:
+        coefficients = basis_y.T @ data @ basis_x
+        coefficients *= terms
+    else:
+        used_values = data.reshape(data.shape[:-2] + (rows * cols,))[..., basis["used"]]
+        coefficients = np.zeros(data.shape[:-2] + terms.shape)
+        coefficients[..., terms] = used_values @ basis["pinv"].T
 
-    fitted_surface = Z_poly.reshape(m, n)
-    return fitted_surface
+    return basis_y @ coefficients @ basis_x.T
 
-def level_image_polynomial(image, order):
-    """Level the image by subtracting the fitted polynomial surface."""
-    polynomial_surface = fit_polynomial_surface(image, order=order)
+def level_image_polynomial(image, order, mask=None):
+    """Level the image (or stack of frames) by subtracting the fitted polynomial surface."""
+    polynomial_surface = fit_polynomial_surface(image, order=order, mask=mask)
     leveled_image = image - polynomial_surface
     return leveled_image
 
-def PolynomialLeveling(img, order):
+def PolynomialLeveling(img, order, dtype=np.uint8):
     image = img_as_float(img)
 
     # Level the image using polynomial fitting
     leveled_image = level_image_polynomial(image, order=order)
 
     leveled_image_normalized = cv2.normalize(leveled_image, None, 0, 255, cv2.NORM_MINMAX)
-    leveled_image_normalized = leveled_image_normalized.astype(np.uint8)
+    leveled_image_normalized = leveled_image_normalized.astype(dtype)
 
     return leveled_image_normalized
 
-def AdaptiveLeveling(img, disk_size=50):
+def decomposed_disk(radius):
+    """Disk footprint decomposed into a sequence of small footprints, if supported."""
+    try:
+        return disk(radius, decomposition="crosses")
+    except TypeError:
+        # scikit-image < 0.20 has no footprint decomposition
+        return disk(radius)
+
+def pyramid_opening(img, disk_size):
+    """
+    Approximate opening with a large disk on a downsampled image.
+
+    The image is reduced by a block minimum, opened with a proportionally smaller disk
+    and upsampled bilinearly. The result is clipped to the image, like an exact opening.
+    """
+    image = np.asarray(img)
+    factor = max(1, disk_size // ADAPTIVE_LEVELING_PYRAMID_RADIUS)
+    if factor == 1:
+        return opening(image, decomposed_disk(disk_size))
+
+    rows, cols = image.shape
+    pad_rows, pad_cols = -rows % factor, -cols % factor
+    padded = np.pad(image, ((0, pad_rows), (0, pad_cols)), mode="edge")
+    reduced = padded.reshape(padded.shape[0] // factor, factor, padded.shape[1] // factor, factor).min(axis=(1, 3))
+
+    background = opening(reduced, decomposed_disk(max(1, round(disk_size / factor))))
+    background = cv2.resize(background.astype(np.float64), (padded.shape[1], padded.shape[0]), interpolation=cv2.INTER_LINEAR)
+    background = background[:rows, :cols]
+    return np.minimum(background, image).astype(image.dtype)
+
+def estimate_background(img, disk_size, method="disk"):
+    """
+    Estimate the background of an image by morphological opening with a disk.
+
+    Args:
+        img (numpy.ndarray): The input image.
+        disk_size (int): Radius of the disk.
+        method (str, optional): "disk" for an exact opening (cost grows with the disk area),
+            "decomposed" for an opening with a disk decomposed into small footprints (cost grows
+            with the radius, nearly identical result) or "pyramid" for an approximate opening on
+            a downsampled image. Defaults to "disk".
+
+    Returns:
+        numpy.ndarray: The background.
+    """
+    if method == "disk":
+        return opening(img, disk(disk_size))
+    elif method == "decomposed":
+        return opening(img, decomposed_disk(disk_size))
+    elif method == "pyramid":
+        return pyramid_opening(img, disk_size)
+    raise ValueError(f"Invalid background estimation method: {method}")
+
+def AdaptiveLeveling(img, disk_size=50, method="disk", dtype=np.uint8):
     """Level the image using morphological opening."""
-    selem = disk(disk_size)
-    background = opening(img, selem)
+    background = estimate_background(img, disk_size, method)
     leveled_image = img - background
     leveled_image_normalized = cv2.normalize(leveled_image, None, 0, 255, cv2.NORM_MINMAX)
-    leveled_image_normalized = leveled_image_normalized.astype(np.uint8)
+    leveled_image_normalized = leveled_image_normalized.astype(dtype)
     return leveled_image_normalized
\ No newline at end of file
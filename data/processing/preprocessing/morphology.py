@@ -76,7 +76,7 @@ def Propagation(img, type, marker_value):
 
     return reconstructed_image
 
-def WhiteTopHatTransformation(img, selem_type, selem_size):
+def WhiteTopHatTransformation(img, selem_type, selem_size, dtype=np.uint8):
     image = img_as_float(img) 
     selem = binary_selem(selem_type, selem_size)
 
@@ -84,11 +84,11 @@ def WhiteTopHatTransformation(img, selem_type, selem_size):
     tophat_image = white_tophat(image, selem)
 
     leveled_image_normalized = cv2.normalize(tophat_image, None, 0, 255, cv2.NORM_MINMAX)
-    leveled_image_normalized = leveled_image_normalized.astype(np.uint8)
+    leveled_image_normalized = leveled_image_normalized.astype(dtype)
 
     return leveled_image_normalized
 
-def BlackTopHatTransformation(img, selem_type, selem_size):
+def BlackTopHatTransformation(img, selem_type, selem_size, dtype=np.uint8):
     image = img_as_float(img) 
     selem = binary_selem(selem_type, selem_size)
 
@@ -96,7 +96,7 @@ def BlackTopHatTransformation(img, selem_type, selem_size):
     tophat_image = black_tophat(image, selem)
 
     leveled_image_normalized = cv2.normalize(tophat_image, None, 0, 255, cv2.NORM_MINMAX)
-    leveled_image_normalized = leveled_image_normalized.astype(np.uint8)
+    leveled_image_normalized = leveled_image_normalized.astype(dtype)
 
     return leveled_image_normalized
 
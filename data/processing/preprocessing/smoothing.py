@@ -71,12 +71,12 @@ def GaussianFilter(img, sigma=4):
         raise ValueError(msg)
     
 
-def LocalMedianFilter(image, size=5):
+def LocalMedianFilter(image, size=5, dtype=np.uint8):
     image = img_as_float(image)
     """Apply median filter to smooth the background."""
     smoothed_image = median_filter(image, size=size)
 
     leveled_image_normalized = cv2.normalize(smoothed_image, None, 0, 255, cv2.NORM_MINMAX)
-    leveled_image_normalized = leveled_image_normalized.astype(np.uint8)
+    leveled_image_normalized = leveled_image_normalized.astype(dtype)
 
     return leveled_image_normalized
@@ -10,6 +10,8 @@ import os, sys
 
 sys.path.insert(1, "/".join(os.path.realpath(__file__).split("/")[0:-2]))
 
+from collections import OrderedDict
+
 from PIL import Image, ImageTk
 
 def scale_factor_resize_image(img, scale_factor):
@@ -23,4 +25,227 @@ def scale_factor_resize_image(img, scale_factor):
     Returns:
         PIL.Image.Image: The resized image.
     """
-    return img.resize((int(img.width * scale_factor), int(img.height * scale_factor)), Image.LANCZOS)
\ No newline at end of file
+    return img.resize((int(img.width * scale_factor), int(img.height * scale_factor)), Image.LANCZOS)
+
+# Number of image pyramids kept for recently displayed images
+PYRAMID_CACHE_SIZE = 4
+
+# Extra canvas pixels rendered around the visible region, so small pans reuse the tile
+VIEWPORT_MARGIN = 256
+
+class ImagePyramid:
+    """
+    Multi-resolution copies of an image for rendering it at any scale.
+
+    Level k is the image reduced by 2**k with a box filter; levels are built on demand.
+    A region is rendered from the smallest level that still has at least the requested
+    resolution, so the cost depends on the region size, not on the image size.
+    """
+    def __init__(self, img):
+        self.levels = [img]
+
+    @property
+    def size(self):
+        return self.levels[0].size
+
+    def scaled_size(self, scale_factor):
+        """Size of the whole image at a scale, as scale_factor_resize_image computes it."""
+        width, height = self.size
+        return int(width * scale_factor), int(height * scale_factor)
+
+    def get_level(self, scale_factor):
+        """Return (level image, level downscale factor) to render at scale_factor."""
+        level = 0
+        while scale_factor * 2 ** (level + 1) <= 1 and min(self.levels[level].size) >= 2:
+            level += 1
+            if level == len(self.levels):
+                self.levels.append(self.levels[-1].reduce(2))
+        return self.levels[level], 2 ** level
+
+    def render_region(self, scale_factor, region):
+        """
+        Render a region of the scaled image.
+
+        Args:
+            scale_factor (float): The scale factor of the whole image.
+            region (tuple): (x0, y0, x1, y1) in scaled image pixels.
+
+        Returns:
+            PIL.Image.Image: The region, of size (x1 - x0, y1 - y0).
+        """
+        x0, y0, x1, y1 = region
+        width, height = self.scaled_size(scale_factor)
+        level_img, _ = self.get_level(scale_factor)
+        # Map scaled pixels to level pixels using the same ratio as a full resize
+        ratio_x = level_img.width / width
+        ratio_y = level_img.height / height
+        box = (x0 * ratio_x, y0 * ratio_y, x1 * ratio_x, y1 * ratio_y)
+        return level_img.resize((x1 - x0, y1 - y0), Image.LANCZOS, box=box)
+
+    def update_region(self, box):
+        """
+        Rebuild the reduced levels inside a box of the image, after it was changed in place.
+
+        Args:
+            box (tuple): (x0, y0, x1, y1) in image pixels.
+        """
+        x0, y0, x1, y1 = box
+        for level in range(1, len(self.levels)):
+            # Blocks of the level covering the box, aligned as reduce() groups pixels
+            x0, y0, x1, y1 = x0 // 2, y0 // 2, -(-x1 // 2), -(-y1 // 2)
+            source = self.levels[level - 1]
+            block = source.crop((2 * x0, 2 * y0, min(2 * x1, source.width), min(2 * y1, source.height)))
+            self.levels[level].paste(block.reduce(2), (x0, y0))
+
+class CanvasImageRenderer:
+    """
+    Display an image on a canvas at a scale, rendering only the visible region.
+
+    The image is logically placed at (0, 0) with its scaled size, so canvas coordinates
+    divided by the scale factor are image coordinates, as with a fully resized image.
+    The rendered tile is re-rendered when the view moves outside of it, and its
+    PhotoImage is reused when the tile size does not change.
+    """
+    def __init__(self, canvas):
+        self.canvas = canvas
+        self._pyramids = OrderedDict()
+        self._pyramid = None
+        self._scale_factor = 1.0
+        self._photo = None
+        self._item = None
+        self._tile_region = None
+        self._tile_key = None
+        self._render_pending = False
+
+    def bind_scrollbars(self, x_scrollbar, y_scrollbar):
+        """Connect the canvas scrollbars and re-render when the view changes."""
+        def x_scroll(first, last):
+            x_scrollbar.set(first, last)
+            self.schedule_render()
+
+        def y_scroll(first, last):
+            y_scrollbar.set(first, last)
+            self.schedule_render()
+
+        self.canvas.configure(xscrollcommand=x_scroll, yscrollcommand=y_scroll)
+
+    def get_pyramid(self, img):
+        """Return the cached pyramid of an image."""
+        key = id(img)
+        entry = self._pyramids.get(key)
+        if entry is not None and entry[0] is img:
+            self._pyramids.move_to_end(key)
+            return entry[1]
+        pyramid = ImagePyramid(img)
+        # Keep the image so its id is not reused while cached
+        self._pyramids[key] = (img, pyramid)
+        while len(self._pyramids) > PYRAMID_CACHE_SIZE:
+            self._pyramids.popitem(last=False)
+        return pyramid
+
+    def display(self, img, scale_factor):
+        """
+        Display an image at a scale.
+
+        Args:
+            img (PIL.Image.Image): The image.
+            scale_factor (float): The scale factor.
+
+        Returns:
+            tuple: Width and height of the scaled image.
+        """
+        self._pyramid = self.get_pyramid(img)
+        self._scale_factor = scale_factor
+        self._tile_key = None
+        self.render()
+        return self._pyramid.scaled_size(scale_factor)
+
+    @property
+    def image(self):
+        """The displayed image, or None."""
+        return self._pyramid.levels[0] if self._pyramid is not None else None
+
+    def update_regions(self, img, boxes):
+        """
+        Show changes of an image made in place inside boxes.
+
+        Args:
+            img (PIL.Image.Image): The image.
+            boxes (list): Boxes (x0, y0, x1, y1) in image pixels.
+        """
+        entry = self._pyramids.get(id(img))
+        if entry is None or entry[0] is not img:
+            return
+        for box in boxes:
+            entry[1].update_region(box)
+        if entry[1] is self._pyramid and boxes:
+            self._tile_key = None
+            self.render()
+
+    def scrollregion(self):
+        """Scroll region covering the scaled image and all other canvas items."""
+        bbox = self.canvas.bbox("all")
+        if self._pyramid is None:
+            return bbox
+        width, height = self._pyramid.scaled_size(self._scale_factor)
+        if bbox is None:
+            return 0, 0, width, height
+        return min(bbox[0], 0), min(bbox[1], 0), max(bbox[2], width), max(bbox[3], height)
+
+    def schedule_render(self):
+        if not self._render_pending:
+            self._render_pending = True
+            self.canvas.after_idle(self._render_idle)
+
+    def _render_idle(self):
+        self._render_pending = False
+        self.render()
+
+    def visible_region(self, margin=0):
+        """Visible region extended by a margin, clipped to the scaled image."""
+        width, height = self._pyramid.scaled_size(self._scale_factor)
+        x0 = int(self.canvas.canvasx(0)) - margin
+        y0 = int(self.canvas.canvasy(0)) - margin
+        x1 = x0 + self.canvas.winfo_width() + 2 * margin
+        y1 = y0 + self.canvas.winfo_height() + 2 * margin
+        return max(x0, 0), max(y0, 0), min(x1, width), min(y1, height)
+
+    def render(self):
+        """Render the visible region if the current tile does not cover it."""
+        if self._pyramid is None:
+            return
+        item_exists = self._item is not None and self.canvas.type(self._item) == "image"
+        visible = self.visible_region()
+        if visible[2] <= visible[0] or visible[3] <= visible[1]:
+            # The view is outside of the image until the scroll region is updated
+            if item_exists:
+                self.canvas.delete(self._item)
+            self._item = None
+            return
+
+        key = (id(self._pyramid), self._scale_factor)
+        if item_exists and self._tile_key == key and self.covers(self._tile_region, visible):
+            return
+
+        region = self.visible_region(VIEWPORT_MARGIN)
+        tile = self._pyramid.render_region(self._scale_factor, region)
+        if self._photo is not None and (self._photo.width(), self._photo.height()) == tile.size:
+            self._photo.paste(tile)
+        else:
+            self._photo = ImageTk.PhotoImage(tile)
+
+        if item_exists:
+            self.canvas.itemconfigure(self._item, image=self._photo)
+            self.canvas.coords(self._item, region[0], region[1])
+        else:
+            self._item = self.canvas.create_image(region[0], region[1], anchor="nw", image=self._photo)
+            self.canvas.tag_lower(self._item)
+        self._tile_region = region
+        self._tile_key = key
+
+    @staticmethod
+    def covers(tile_region, region):
+        if tile_region is None:
+            return False
+        return (tile_region[0] <= region[0] and tile_region[1] <= region[1]
+                and tile_region[2] >= region[2] and tile_region[3] >= region[3])
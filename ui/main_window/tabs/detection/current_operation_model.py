@@ -10,6 +10,9 @@ import os, sys
 
 sys.path.insert(1, "/".join(os.path.realpath(__file__).split("/")[0:-2]))
 
+from data.processing.contours.contour_features import ContourFeatures
+from data.processing.contours.contour_index import ContourLabelIndex
+
 class CurrentOperation:
     def __init__(self):
         self._processed_image = None
@@ -17,7 +20,10 @@ class CurrentOperation:
         self._filtered_contours_img = None
         self._process_name = ""
         self._contours = []
+        self._contour_features = None
         self._contours_data = []
+        self._contour_index = None
+        self._contours_data_outdated = False
         self._labels = []
         self._labeled_image = None
         self._image_to_process = None
@@ -78,6 +84,18 @@ class CurrentOperation:
     @contours.setter
     def contours(self, value):
         self._contours = value
+        self._contour_features = None
+
+    @property
+    def contour_features(self):
+        """ContourFeatures of the contours, computed on first use."""
+        if self._contour_features is None:
+            self._contour_features = ContourFeatures.from_contours(self._contours)
+        return self._contour_features
+
+    @contour_features.setter
+    def contour_features(self, value):
+        self._contour_features = value
 
     @property
     def contours_data(self):
@@ -86,6 +104,29 @@ class CurrentOperation:
     @contours_data.setter
     def contours_data(self, value):
         self._contours_data = value
+        self._contours_data_outdated = False
+        # Data recalculated for the same contours keeps the index
+        if self._contour_index is not None and not self._contour_index.matches([item['contour'] for item in value]):
+            self._contour_index = None
+
+    @property
+    def contour_index(self):
+        """ContourLabelIndex of the contours in contours_data, built on first use."""
+        if self._contour_index is None:
+            self._contour_index = ContourLabelIndex([item['contour'] for item in self._contours_data])
+        return self._contour_index
+
+    @property
+    def contours_data_outdated(self):
+        """True after a contour was removed, until contours_data is recalculated."""
+        return self._contours_data_outdated
+
+    def remove_contour_data(self, index):
+        """Remove a contour from contours_data, updating the contour index in place."""
+        self._contours_data.pop(index)
+        self._contours_data_outdated = True
+        if self._contour_index is not None:
+            self._contour_index.remove(index)
 
     @property
     def labels(self):
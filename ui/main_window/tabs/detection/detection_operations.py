@@ -10,10 +10,54 @@ import os, sys
 
 sys.path.insert(1, "/".join(os.path.realpath(__file__).split("/")[0:-2]))
 
+import threading
+
+from collections import OrderedDict
+
 import cv2
 import numpy as np
 from PIL import Image, ImageTk
 
+from data.processing.detection.edge_detection import CannyScaleSpace, EdgeDetection
+from data.processing.contours.contour_detection import ContourFinder, GetContourDataFromFeatures
+from data.processing.contours.contour_features import ContourFeatures
+from data.processing.img_process import DrawContours, DrawLabels, process_contours_filters, filter_contour_features
+
+from ui.main_window.tabs.operation_cache import image_fingerprint
+
+# Number of images whose Canny scale space is kept
+SCALE_SPACE_CACHE_SIZE = 4
+
+class ScaleSpaceCache:
+    """
+    Canny scale spaces of recently processed images, looked up by image content.
+
+    Images are compared by content because the tab creates a new image object
+    each time a preprocessed image is selected.
+    """
+    def __init__(self, max_images=SCALE_SPACE_CACHE_SIZE):
+        self.max_images = max_images
+        self._scale_spaces = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, img):
+        """Return the CannyScaleSpace of an image, creating it for a new image."""
+        key = image_fingerprint(img)
+        with self._lock:
+            scale_space = self._scale_spaces.get(key)
+            if scale_space is not None:
+                self._scale_spaces.move_to_end(key)
+                return scale_space
+            scale_space = CannyScaleSpace(np.array(img))
+            self._scale_spaces[key] = scale_space
+            while len(self._scale_spaces) > self.max_images:
+                self._scale_spaces.popitem(last=False)
+            return scale_space
+
+    def clear(self):
+        with self._lock:
+            self._scale_spaces.clear()
+
 def get_mouse_position_in_canvas(scale_factor, x_canvas, y_canvas, event):
     """
     Calculate the mouse position on the canvas accounting for a given scale factor.
@@ -40,6 +84,8 @@ def get_contour_info_at_position(current_operation, x, y):
     """
     Check if a point (x, y) is inside any contour in the current operation.
 
+    The contour is looked up in the label raster of the current operation.
+
     Args:
         current_operation: The current operation containing contour data.
         x (float): The x-coordinate of the point.
@@ -48,12 +94,10 @@ def get_contour_info_at_position(current_operation, x, y):
     Returns:
         dict or None: The contour data if the point is inside a contour, otherwise None.
     """
-    # Iterate through contours and check if the mouse position is within any contour
-    contours_data = current_operation.contours_data
-    for item in contours_data:
-        if is_point_inside_contour((x, y), item['contour']):
-            return item
-    return None
+    position = current_operation.contour_index.find(x, y)
+    if position is None:
+        return None
+    return current_operation.contours_data[position]
 
 def is_point_inside_contour(point, contour):
     """
@@ -73,4 +117,78 @@ def is_point_inside_contour(point, contour):
     # Use cv2.pointPolygonTest to determine if the point is inside the contour
     distance = cv2.pointPolygonTest(contour_np, point_tuple, False)
     # If distance is positive, point is inside the contour
-    return distance >= 0
\ No newline at end of file
+    return distance >= 0
+
+def create_sigma_data(img, sigma_value, detection_option, filter_params, area_coefficient, from_data_listbox,
+                      scale_space_cache=None):
+    """
+    Detect edges and contours for a sigma value.
+
+    Args:
+        img (PIL.Image.Image): The image to process.
+        sigma_value (float): Sigma of the edge detection.
+        detection_option (str): The selected detection method.
+        filter_params (dict): Contour filter parameters.
+        area_coefficient (float): Area of a pixel in nm2.
+        from_data_listbox (bool): True if img is the greyscale image of the data, not a preprocessed one.
+        scale_space_cache (ScaleSpaceCache, optional): Cache of the Canny stages computed for other sigma values.
+
+    Returns:
+        dict: Values of the processed_image, edge_image, filtered_contours_img, contours
+            and contour_features attributes of the current operation.
+    """
+    result_image = None
+    if detection_option == "Canny" and scale_space_cache is not None:
+        result_image = scale_space_cache.get(img).edges(sigma_value)
+    elif detection_option == "Canny":
+        result_image = EdgeDetection(
+            img=np.asanyarray(img),
+            sigma=sigma_value
+        )
+    contours = ContourFinder(result_image)
+    contour_features = ContourFeatures.from_contours(contours)
+    edge_img = Image.fromarray(result_image)
+    result_filtered_image, _ = process_contours_filters(filter_params, edge_img, contours, area_coefficient, contour_features)
+    preprocessed_img = Image.fromarray(np.zeros_like(img)) if from_data_listbox else img
+    return {
+        "processed_image": preprocessed_img,
+        "edge_image": edge_img,
+        "filtered_contours_img": Image.fromarray(result_filtered_image),
+        "contours": contours,
+        "contour_features": contour_features
+    }
+
+def filter_and_label_contours(filter_params, edge_img, contour_features, original_img, x_size_coefficient,
+                              y_size_coefficient, area_coefficient, draw_contours, write_labels,
+                              label_color, highlight_index=None):
+    """
+    Filter contours and draw their labels on the original image.
+
+    Contours are selected with a mask over their feature table, so geometry is not measured again.
+
+    Args:
+        filter_params (dict): Contour filter parameters.
+        edge_img (PIL.Image.Image): The edge image.
+        contour_features (ContourFeatures): Features of the detected contours.
+        original_img (PIL.Image.Image): The greyscale image the labels are drawn on.
+        x_size_coefficient (float): Pixel size in x in nm.
+        y_size_coefficient (float): Pixel size in y in nm.
+        area_coefficient (float): Area of a pixel in nm2.
+        draw_contours (bool): Draw the contours.
+        write_labels (bool): Write the contour names.
+        label_color (bool): Draw in white instead of black.
+        highlight_index (int, optional): Index of the highlighted contour.
+
+    Returns:
+        tuple: (filtered contours image, contours data, labeled image).
+    """
+    filtered_features = filter_contour_features(filter_params, contour_features, area_coefficient)
+    result_image = DrawContours(image=edge_img, contours=filtered_features.contours)
+    contours_data = GetContourDataFromFeatures(
+        features=filtered_features,
+        x_size_coefficient=x_size_coefficient,
+        y_size_coefficient=y_size_coefficient,
+        avg_coefficient=area_coefficient
+    )
+    labeled_image = DrawLabels(original_img, contours_data, draw_contours, write_labels, label_color, highlight_index)
+    return result_image, contours_data, labeled_image
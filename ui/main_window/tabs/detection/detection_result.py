@@ -0,0 +1,173 @@
+# -*- coding: utf-8 -*-
+"""
+Compact, read-only records of saved detection results.
+
+@author: rlewandkow
+"""
+
+import os, sys
+
+sys.path.insert(1, "/".join(os.path.realpath(__file__).split("/")[0:-2]))
+
+import cv2
+
+import numpy as np
+
+import logging
+
+from ui.main_window.tabs.detection.current_operation_model import CurrentOperation
+
+logger = logging.getLogger(__name__)
+
+def read_only(array):
+    array.flags.writeable = False
+    return array
+
+class PackedContours:
+    """
+    Contours stored in one int32 buffer of points with the offsets of every contour.
+
+    Attributes:
+        points (numpy.ndarray): Points of all contours, of shape (N, 2).
+        offsets (numpy.ndarray): Contour i is points[offsets[i]:offsets[i + 1]].
+    """
+    def __init__(self, contours):
+        lengths = [len(contour) for contour in contours]
+        self.offsets = read_only(np.concatenate(([0], np.cumsum(lengths, dtype=np.int64))))
+        if contours:
+            points = np.concatenate([np.asarray(contour, dtype=np.int32).reshape(-1, 2) for contour in contours])
+        else:
+            points = np.zeros((0, 2), dtype=np.int32)
+        self.points = read_only(points)
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, index):
+        """Contour as cv2.findContours returns it, a read-only view of the buffer."""
+        return self.points[self.offsets[index]:self.offsets[index + 1]].reshape(-1, 1, 2)
+
+    def unpack(self):
+        return [self[i] for i in range(len(self))]
+
+    @property
+    def nbytes(self):
+        return self.points.nbytes + self.offsets.nbytes
+
+class DetectionResult:
+    """
+    Saved detection result of a CurrentOperation.
+
+    Detected contours are packed, the filtered contours are kept as indices into them,
+    and the data of the filtered contours as numpy columns; moments are computed again
+    when the result is opened. Images are held by reference, since operations replace
+    their images instead of changing them, and the labeled image is drawn again when
+    the result is displayed.
+    """
+    def __init__(self, operation):
+        self._raw_data_index = operation.raw_data_index
+        self._process_name = operation.process_name
+        self._image_to_process = operation.image_to_process
+        self._processed_image = operation.processed_image
+        self._edge_image = operation.edge_image
+        self._filtered_contours_img = operation.filtered_contours_img
+
+        detected = list(operation.contours)
+        self._detected = PackedContours(detected)
+        contours_data = operation.contours_data
+        filtered = [item['contour'] for item in contours_data]
+        positions = {id(contour): i for i, contour in enumerate(detected)}
+        if all(id(contour) in positions for contour in filtered):
+            # Filtered contours are the detected contour objects, as the filters select them
+            self._filtered_indices = read_only(np.array([positions[id(contour)] for contour in filtered], dtype=np.int64))
+            self._filtered = None
+        else:
+            self._filtered_indices = None
+            self._filtered = PackedContours(filtered)
+
+        self._names = read_only(np.array([item['name'] for item in contours_data], dtype=str))
+        self._area = read_only(np.array([item['area'] for item in contours_data], dtype=np.float64))
+        self._distance_to_nearest_neighbour = read_only(
+            np.array([item['distance_to_nearest_neighbour'] for item in contours_data], dtype=np.float64)
+        )
+        self._nearest_neighbours = read_only(np.array([item['nearest_neighbour'] for item in contours_data], dtype=str))
+
+    def __len__(self):
+        return len(self._names)
+
+    @property
+    def raw_data_index(self):
+        return self._raw_data_index
+
+    @property
+    def image_to_process(self):
+        return self._image_to_process
+
+    @property
+    def names(self):
+        return self._names
+
+    @property
+    def area(self):
+        return self._area
+
+    @property
+    def distance_to_nearest_neighbour(self):
+        return self._distance_to_nearest_neighbour
+
+    @property
+    def nearest_neighbours(self):
+        return self._nearest_neighbours
+
+    @property
+    def nbytes(self):
+        """Memory of the arrays owned by the result, without the images held by reference."""
+        size = self._detected.nbytes + self._names.nbytes + self._area.nbytes
+        size += self._distance_to_nearest_neighbour.nbytes + self._nearest_neighbours.nbytes
+        if self._filtered_indices is not None:
+            size += self._filtered_indices.nbytes
+        else:
+            size += self._filtered.nbytes
+        return size
+
+    def to_operation(self):
+        """
+        Create an operation from the result, for displaying and editing it.
+
+        Changes to the operation do not change the result.
+
+        Returns:
+            CurrentOperation: The operation, with contours data as GetContourData returns it.
+        """
+        operation = CurrentOperation()
+        operation.raw_data_index = self._raw_data_index
+        operation.process_name = self._process_name
+        operation.image_to_process = self._image_to_process
+        operation.processed_image = self._processed_image
+        operation.edge_image = self._edge_image
+        operation.filtered_contours_img = self._filtered_contours_img
+
+        detected = self._detected.unpack()
+        operation.contours = detected
+        if self._filtered_indices is not None:
+            filtered = [detected[i] for i in self._filtered_indices]
+        else:
+            filtered = self._filtered.unpack()
+        operation.contours_data = [
+            {
+                "name": str(self._names[i]),
+                "contour": contour,
+                "area": self._area[i],
+                "moments": cv2.moments(contour),
+                "distance_to_nearest_neighbour": self._distance_to_nearest_neighbour[i],
+                "nearest_neighbour": str(self._nearest_neighbours[i])
+            }
+            for i, contour in enumerate(filtered)
+        ]
+        return operation
+
+def format_size(size):
+    """Size in bytes as text."""
+    if size < 1024 * 1024:
+        return f"{size / 1024:.1f} kB"
+    return f"{size / (1024 * 1024):.1f} MB"
@@ -10,9 +10,12 @@ import os, sys
 
 sys.path.insert(1, "/".join(os.path.realpath(__file__).split("/")[0:-2]))
 
-def create_preprocess_operation(processed_img, process_name, params):
-    return {
+def create_preprocess_operation(processed_img, process_name, params, processed_data=None):
+    operation = {
         "processed_image": processed_img,
         "process_name": process_name,
         "params": params
-    }
\ No newline at end of file
+    }
+    if processed_data is not None:
+        operation["processed_data"] = processed_data
+    return operation
\ No newline at end of file
@@ -12,9 +12,8 @@ sys.path.insert(1, "/".join(os.path.realpath(__file__).split("/")[0:-2]))
 
 import tkinter as tk
 from tkinter import ttk
-from PIL import Image, ImageTk
+from PIL import Image
 import numpy as np
-import copy
 
 from data.processing.detection.edge_detection import (
     EdgeDetection
@@ -33,6 +32,8 @@ from data.processing.img_process import (
     process_contours_filters
 )
 
+from data.processing.contours.label_overlay import LabelOverlay
+
 from data.processing.file_process import (
     calculate_avg_nm_per_px, 
     calculate_pixel_to_nm_coefficients,
@@ -75,12 +76,14 @@ from ui.main_window.tabs.detection.contours_data import (
 
 from ui.main_window.tabs.detection.detection_operations import (
     get_mouse_position_in_canvas,
-    get_contour_info_at_position
+    get_contour_info_at_position,
+    create_sigma_data,
+    filter_and_label_contours,
+    ScaleSpaceCache
 )
 
-from ui.main_window.tabs.canvas_operations import (
-    scale_factor_resize_image
-)
+from ui.main_window.tabs.canvas_operations import CanvasImageRenderer
+from ui.main_window.tabs.preview_scheduler import PreviewScheduler
 
 from ui.main_window.tabs.detection.save_data import (
     save_labeled_image, 
@@ -92,6 +95,8 @@ from ui.main_window.tabs.detection.current_operation_model import CurrentOperati
 
 from ui.main_window.tabs.detection.contours import create_contour_data
 
+from ui.main_window.tabs.detection.detection_result import DetectionResult, format_size
+
 from ui.main_window.tabs.detection.iou_window import IntersectionOverUnionWindow
 
 import logging
@@ -127,6 +132,17 @@ class SpotsDetectionTab:
 
         self.selected_preprocess_option = None
 
+        # Previews for sigma and filter slider changes, computed in the background
+        self.preview_scheduler = PreviewScheduler(self.root)
+        self.pending_sigma_value = None
+        # Canny stages of recently detected images, so revisited sigma values only repeat the hysteresis
+        self.scale_space_cache = ScaleSpaceCache()
+        # Labels of the current contours, redrawn only around the contours changed by manual edits
+        self.label_overlay = LabelOverlay()
+        # Displayed four-panel image and the panels it was made of
+        self.detection_composite = None
+        self.detection_panels = None
+
         self.create_spots_detection_tab()
 
     def init_attributes(self):
@@ -330,6 +346,10 @@ class SpotsDetectionTab:
             )
         self.horizontal_scrollbar_detection.grid(row=2, column=2, sticky="ew")
         self.data_canvas_detection.configure(xscrollcommand=self.horizontal_scrollbar_detection.set)
+
+        # Render only the visible part of the image, again when the view moves
+        self.canvas_renderer = CanvasImageRenderer(self.data_canvas_detection)
+        self.canvas_renderer.bind_scrollbars(self.horizontal_scrollbar_detection, self.vertical_scrollbar_detection)
         
         # Bind event for canvas resizing
         self.data_canvas_detection.bind("<Configure>", self.resize_canvas_detection_scrollregion)
@@ -609,10 +629,11 @@ class SpotsDetectionTab:
         Args:
             event (tk.Event): The selection event from the listbox.
         """
+        self.cancel_previews()
         data_index = self.contour_data_listbox.curselection()
         index = int(data_index[0])
         data = get_contours_data_at_index(index)
-        self.current_operation = data['operation']
+        self.current_operation = data['operation'].to_operation()
         self.current_operation.raw_data_index = data['original_data_index']
         self.current_size_x_coefficient = data['x_coeff']
         self.current_size_y_coefficient = data['y_coeff']
@@ -803,7 +824,7 @@ class SpotsDetectionTab:
         if focuse_widget == self.contours_listbox:
             contour_index = self.contours_listbox.curselection()
             index = int(contour_index[0])
-            self.current_operation.contours_data.pop(index)
+            self.current_operation.remove_contour_data(index)
             self.refresh_edit_contours_listbox_data()
             self.refresh_image_after_filtering(manual_edit=True)
             self.update_avg_area_label(self.current_operation.contours_data)
@@ -819,13 +840,14 @@ class SpotsDetectionTab:
         index = self.current_operation.raw_data_index
         filename = get_filename_at_index(data_for_detection, index)
         framenumber = get_framenumber_at_index(data_for_detection, index)
+        result = DetectionResult(self.current_operation)
 
         data_to_save = create_contour_data(
             filename= filename,
             framenumber= framenumber,
-            operation= copy.deepcopy(self.current_operation),
-            contours_num= len(self.current_operation.contours_data),
-            originally_processed_image= self.current_operation.image_to_process,
+            operation= result,
+            contours_num= len(result),
+            originally_processed_image= result.image_to_process,
             original_data_index= self.current_operation.raw_data_index,
             x_coeff= self.current_size_x_coefficient,
             y_coeff= self.current_size_y_coefficient,
@@ -840,7 +862,7 @@ class SpotsDetectionTab:
         Refresh the data in the saved contours listbox.
 
         Retrieves contours data from memory, updates the saved contours listbox
-        with filenames, frame numbers, and number of contours.
+        with filenames, frame numbers, number of contours and memory used.
         """
         self.contour_data_listbox.delete(0, tk.END)
         contours = get_contours_data()
@@ -849,10 +871,11 @@ class SpotsDetectionTab:
                 name = contour_data['filename']
                 frame = contour_data['frame']
                 number_of_contours = str(contour_data['contours_num'])
+                memory = format_size(contour_data['operation'].nbytes)
                 if frame == "":
-                    self.contour_data_listbox.insert(tk.END, f"{name} | {number_of_contours}")
+                    self.contour_data_listbox.insert(tk.END, f"{name} | {number_of_contours} | {memory}")
                 else:
-                    self.contour_data_listbox.insert(tk.END, f"{name} | {frame} | {number_of_contours}")
+                    self.contour_data_listbox.insert(tk.END, f"{name} | {frame} | {number_of_contours} | {memory}")
 
 
     def save_to_files(self):
@@ -1003,7 +1026,7 @@ class SpotsDetectionTab:
         """
         Handle the display of the image on the canvas.
 
-        This method resizes the image based on the scale factor, converts it to a Tkinter PhotoImage, and displays it on the canvas.
+        The image is shown at the scale factor, rendering only the part visible in the canvas.
 
         Args:
             img (PIL.Image.Image): The image to be displayed on the canvas.
@@ -1011,17 +1034,8 @@ class SpotsDetectionTab:
 
         # Retrieve the scale factor
         scale_factor = self.scale_factor_var.get()
-        # Resize the image
-        img = scale_factor_resize_image(img, scale_factor)
-
-        # Convert the PIL image to a Tkinter PhotoImage
-        photo = ImageTk.PhotoImage(img)
-
-        # Display the image on the canvas
-        self.data_canvas_detection.create_image(0, 0, anchor="nw", image=photo)
-
-        # Save a reference to the PhotoImage to prevent garbage collection
-        self.data_canvas_detection.image = photo
+        # Display the visible part of the scaled image on the canvas
+        self.canvas_renderer.display(img, scale_factor)
 
     def refresh_data_in_operations_listbox(self):
         """
@@ -1065,6 +1079,7 @@ class SpotsDetectionTab:
         Returns:
             None
         """
+        self.cancel_previews()
         try:
             operations_selected_index = self.operations_listbox.curselection()
             operations_index = int(operations_selected_index[0])
@@ -1274,9 +1289,7 @@ class SpotsDetectionTab:
             if param_name in self.parameter_detection_labels:
                 label_text = f"{param_name}: {float(value):.1f}"
                 self.parameter_detection_labels[param_name].config(text=label_text)
-                self.data_canvas_detection.delete("all")
-                self.refresh_image_on_sigma_slider_change(value)
-                self.resize_canvas_detection_scrollregion()
+                self.schedule_sigma_preview(float(value))
         except ValueError as e:
             # Handle the case where the value cannot be converted to a float
             error_msg = f"Invalid value for sigma slider: {e}"
@@ -1299,8 +1312,154 @@ class SpotsDetectionTab:
         if param_name in self.parameter_filter_labels:
             label_text = f"{param_name.replace('_', ' ').capitalize()}: {float(value):.1f}"
             self.parameter_filter_labels[param_name].config(text=label_text)
-            self.refresh_image_after_filtering()
+            self.schedule_filter_preview()
+
+    def get_label_drawing_options(self):
+        """Return the draw contours, write labels and label color checkbox values."""
+        return self.draw_contours_var.get(), self.write_labels_var.get(), self.label_contour_color_var.get()
+
+    def schedule_sigma_preview(self, sigma_value):
+        """
+        Recompute edges, contours and labels for a sigma value in the background.
+
+        Widget values are read now; only the result of the latest slider change is displayed.
+
+        Args:
+            sigma_value (float): The new value of the sigma slider.
+        """
+        params = {}
+        filter_params = {}
+        index = self.current_operation.raw_data_index
+        focuse_widget = self.root.focus_get()
+        img = self.get_image_based_on_selected_file_in_listbox(index, focuse_widget)
+        self.get_values_from_detection_menu_items(params)
+        self.get_values_from_filter_menu_items(filter_params)
+        original_img = get_greyscale_image_at_index(data_for_detection, index)
+        detection_option = self.selected_detection_option
+        from_data_listbox = focuse_widget == self.data_listbox_detection
+        coefficients = (self.current_size_x_coefficient, self.current_size_y_coefficient, self.current_area_coefficient)
+        drawing_options = self.get_label_drawing_options()
+        self.pending_sigma_value = sigma_value
+
+        def create_preview():
+            sigma_data = create_sigma_data(
+                img, sigma_value, detection_option, filter_params, coefficients[2], from_data_listbox,
+                self.scale_space_cache
+            )
+            filtering = filter_and_label_contours(
+                filter_params, sigma_data["edge_image"], sigma_data["contour_features"], original_img,
+                *coefficients, *drawing_options
+            )
+            return sigma_data, filtering
+
+        def show_preview(result):
+            sigma_data, filtering = result
+            self.pending_sigma_value = None
+            self.data_canvas_detection.delete("all")
+            self.set_sigma_data(sigma_data)
+            self.show_filtered_contours(*filtering)
             self.refresh_edit_contours_listbox_data()
+            self.resize_canvas_detection_scrollregion()
+
+        self.preview_scheduler.schedule(create_preview, show_preview)
+
+    def schedule_filter_preview(self):
+        """Filter contours and draw labels for the current filter sliders in the background."""
+        if self.pending_sigma_value is not None:
+            # Edges for the new sigma are not ready yet, recompute them with the new filters
+            self.schedule_sigma_preview(self.pending_sigma_value)
+            return
+        if self.current_operation.edge_image is None:
+            return
+
+        filter_params = {}
+        self.get_values_from_filter_menu_items(filter_params)
+        original_img = get_greyscale_image_at_index(data_for_detection, self.current_operation.raw_data_index)
+        edge_img = self.current_operation.edge_image
+        contour_features = self.current_operation.contour_features
+        coefficients = (self.current_size_x_coefficient, self.current_size_y_coefficient, self.current_area_coefficient)
+        drawing_options = self.get_label_drawing_options()
+
+        def create_preview():
+            return filter_and_label_contours(filter_params, edge_img, contour_features, original_img, *coefficients, *drawing_options)
+
+        def show_preview(filtering):
+            self.show_filtered_contours(*filtering)
+            self.refresh_edit_contours_listbox_data()
+
+        self.preview_scheduler.schedule(create_preview, show_preview)
+
+    def cancel_previews(self):
+        """Discard previews scheduled for the image or operation shown before."""
+        self.preview_scheduler.cancel()
+        self.pending_sigma_value = None
+
+    def set_sigma_data(self, sigma_data):
+        """Store the result of create_sigma_data in the current operation."""
+        self.current_operation.processed_image = sigma_data["processed_image"]
+        self.current_operation.edge_image = sigma_data["edge_image"]
+        self.current_operation.filtered_contours_img = sigma_data["filtered_contours_img"]
+        self.current_operation.contours = sigma_data["contours"]
+        self.current_operation.contour_features = sigma_data["contour_features"]
+
+    def show_filtered_contours(self, result_image, contours_data, labeled_image):
+        """
+        Store filtered contours in the current operation and display them.
+
+        Args:
+            result_image (numpy.ndarray): Image of the filtered contours.
+            contours_data (list): Data of the filtered contours.
+            labeled_image (numpy.ndarray): Original image with labels.
+        """
+        self.current_operation.contours_data = contours_data
+        self.current_operation.filtered_contours_img = Image.fromarray(result_image)
+        self.current_operation.labeled_image = labeled_image
+
+        self.display_detection_images(
+            self.current_operation.processed_image, labeled_image,
+            self.current_operation.edge_image, self.current_operation.filtered_contours_img
+        )
+
+    def display_detection_images(self, processed_img, labeled_image, edge_img, filtered_img):
+        """
+        Display the processed, labeled, edge and filtered contours images side by side.
+
+        Args:
+            processed_img (PIL.Image.Image): The processed image.
+            labeled_image (numpy.ndarray or PIL.Image.Image): The labeled original image.
+            edge_img (PIL.Image.Image): The edge image.
+            filtered_img (PIL.Image.Image): Image of the filtered contours.
+        """
+        panels = (processed_img, labeled_image, edge_img, filtered_img)
+        if isinstance(labeled_image, np.ndarray):
+            labeled_image = Image.fromarray(labeled_image)
+        img = concatenate_four_images(processed_img, labeled_image, edge_img, filtered_img)
+        self.detection_composite = img
+        self.detection_panels = panels
+        self.handle_displaying_image_on_canvas(img)
+
+    def update_displayed_labels(self, boxes):
+        """
+        Copy boxes of the labeled image into the displayed four-panel image.
+
+        Args:
+            boxes (list): Boxes (x0, y0, x1, y1) changed in the labeled image.
+
+        Returns:
+            bool: False if the displayed image is not made of the current panels.
+        """
+        op = self.current_operation
+        panels = (op.processed_image, op.labeled_image, op.edge_image, op.filtered_contours_img)
+        img = self.detection_composite
+        if (img is None or self.canvas_renderer.image is not img
+                or any(a is not b for a, b in zip(panels, self.detection_panels))
+                or op.processed_image.size != op.labeled_image.shape[1::-1]):
+            return False
+        # The labeled image is the top left panel
+        for x0, y0, x1, y1 in boxes:
+            img.paste(Image.fromarray(op.labeled_image[y0:y1, x0:x1]), (x0, y0))
+        self.canvas_renderer.update_regions(img, boxes)
+        return True
 
     def refresh_image_after_filtering(self, hilghlight_index=None, manual_edit=False):
         """
@@ -1337,49 +1496,19 @@ class SpotsDetectionTab:
         filter_params = {}
         if self.current_operation.edge_image is not None:
             original_img = get_greyscale_image_at_index(data_for_detection, self.current_operation.raw_data_index)
-            previous_processed_img = self.current_operation.processed_image
-            edge_img = self.current_operation.edge_image
-            contours = self.current_operation.contours
-            result_image = None
             self.get_values_from_filter_menu_items(filter_params)
-            result_image, filtered_contours = process_contours_filters(filter_params, edge_img, contours, self.current_area_coefficient)
-
-            contours_data = GetContourData( 
-                    filtered_contours= filtered_contours,
-                    x_size_coefficient= self.current_size_x_coefficient,
-                    y_size_coefficient= self.current_size_y_coefficient,
-                    avg_coefficient= self.current_area_coefficient
-                    )
-                
-            if hilghlight_index:
-                labeled_image = DrawLabels(
-                        original_img, 
-                        contours_data,
-                        self.draw_contours_var.get(), 
-                        self.write_labels_var.get(),
-                        self.label_contour_color_var.get(),
-                        hilghlight_index
-                        )
-            else:
-                labeled_image = DrawLabels(
-                        original_img, 
-                        contours_data, 
-                        self.draw_contours_var.get(), 
-                        self.write_labels_var.get(),
-                        self.label_contour_color_var.get()
-                        )
-                
-            self.current_operation.processed_image = previous_processed_img
-            self.current_operation.edge_image = edge_img
-            self.current_operation.contours = contours
-            self.current_operation.contours_data = contours_data
-            self.current_operation.filtered_contours_img = Image.fromarray(result_image)
-            self.current_operation.labeled_image = labeled_image
-                
-            if isinstance(labeled_image, np.ndarray):
-                labeled_image = Image.fromarray(labeled_image)
-            img = concatenate_four_images(previous_processed_img, labeled_image, edge_img, Image.fromarray(result_image))
-            self.handle_displaying_image_on_canvas(img)
+            filtering = filter_and_label_contours(
+                filter_params,
+                self.current_operation.edge_image,
+                self.current_operation.contour_features,
+                original_img,
+                self.current_size_x_coefficient,
+                self.current_size_y_coefficient,
+                self.current_area_coefficient,
+                *self.get_label_drawing_options(),
+                hilghlight_index
+            )
+            self.show_filtered_contours(*filtering)
 
     def refresh_image_after_manual_change(self, hilghlight_index):
         """
@@ -1396,45 +1525,33 @@ class SpotsDetectionTab:
             - Concatenates multiple images and displays the result on a canvas.
         """
         original_img = get_greyscale_image_at_index(data_for_detection, self.current_operation.raw_data_index)
-        previous_processed_img = self.current_operation.processed_image
-        edge_img = self.current_operation.edge_image
-        labeled_image = self.current_operation.labeled_image
-        contours_data = self.current_operation.contours_data
-        filtered_mage = self.current_operation.filtered_contours_img
-        filtered_contours = [data['contour'] for data in contours_data]
-
-        new_contours_data = GetContourData( 
-            filtered_contours= filtered_contours,
-            x_size_coefficient= self.current_size_x_coefficient,
-            y_size_coefficient= self.current_size_y_coefficient,
-            avg_coefficient= self.current_area_coefficient
-            )
 
-        if hilghlight_index:
-            labeled_image = DrawLabels(
-                    original_img, 
-                    new_contours_data,
-                    self.draw_contours_var.get(), 
-                    self.write_labels_var.get(),
-                    self.label_contour_color_var.get(),
-                    hilghlight_index
-                    )
-        else:
-            labeled_image = DrawLabels(
-                    original_img, 
-                    new_contours_data, 
-                    self.draw_contours_var.get(), 
-                    self.write_labels_var.get(),
-                    self.label_contour_color_var.get()
-                    )
-        
-        self.current_operation.labeled_image = labeled_image
-        self.current_operation.contours_data = new_contours_data
-        # self.update_current_operation(labeled_image=labeled_image, contours_data=new_contours_data)
-        if isinstance(labeled_image, np.ndarray):
-            labeled_image = Image.fromarray(labeled_image)
-        img = concatenate_four_images(previous_processed_img, labeled_image, edge_img, filtered_mage)
-        self.handle_displaying_image_on_canvas(img)
+        if self.current_operation.contours_data_outdated:
+            filtered_contours = [data['contour'] for data in self.current_operation.contours_data]
+            self.current_operation.contours_data = GetContourData( 
+                filtered_contours= filtered_contours,
+                x_size_coefficient= self.current_size_x_coefficient,
+                y_size_coefficient= self.current_size_y_coefficient,
+                avg_coefficient= self.current_area_coefficient
+                )
+
+        changed_boxes = self.label_overlay.update(
+                original_img, 
+                self.current_operation.contours_data,
+                self.draw_contours_var.get(), 
+                self.write_labels_var.get(),
+                self.label_contour_color_var.get(),
+                hilghlight_index
+                )
+        self.current_operation.labeled_image = self.label_overlay.labeled
+
+        if changed_boxes is None or not self.update_displayed_labels(changed_boxes):
+            self.display_detection_images(
+                self.current_operation.processed_image,
+                self.current_operation.labeled_image,
+                self.current_operation.edge_image,
+                self.current_operation.filtered_contours_img
+            )
         
     def refresh_image_on_sigma_slider_change(self, sigma_value):
         """
@@ -1472,31 +1589,19 @@ class SpotsDetectionTab:
         focuse_widget = self.root.focus_get()
         img = self.get_image_based_on_selected_file_in_listbox(index, focuse_widget)
 
-        result_image = None
-
         self.get_values_from_detection_menu_items(params)
         self.get_values_from_filter_menu_items(filter_params)
         # Apply detection process based on selected option and parameters
-        if self.selected_detection_option == "Canny":
-            result_image = EdgeDetection(
-                img=np.asanyarray(img), 
-                sigma=sigma_value                )
-        contours = ContourFinder(result_image)
-        edge_img = Image.fromarray(result_image)
-        result_filtered_image, _ = process_contours_filters(filter_params, edge_img, contours, self.current_area_coefficient)
-        filtered_img = Image.fromarray(result_filtered_image)
-        original_img = None
-        preprocessed_img = None
-        if focuse_widget == self.data_listbox_detection:
-            original_img = img
-            preprocessed_img = Image.fromarray(np.zeros_like(original_img))
-        elif focuse_widget == self.operations_listbox:
-            preprocessed_img = img
-
-        self.current_operation.processed_image = preprocessed_img
-        self.current_operation.edge_image = edge_img
-        self.current_operation.filtered_contours_img = filtered_img
-        self.current_operation.contours = contours
+        sigma_data = create_sigma_data(
+            img,
+            sigma_value,
+            self.selected_detection_option,
+            filter_params,
+            self.current_area_coefficient,
+            focuse_widget == self.data_listbox_detection,
+            self.scale_space_cache
+        )
+        self.set_sigma_data(sigma_data)
 
     def navigate_prev_onClick(self):
         """
@@ -1585,14 +1690,10 @@ class SpotsDetectionTab:
             labeled_image = self.current_operation.labeled_image
             original_img = get_greyscale_image_at_index(data_for_detection, self.current_operation.raw_data_index)
             filtered_img = self.current_operation.filtered_contours_img
-            img = None
-            if isinstance(labeled_image, np.ndarray):
-                labeled_image = Image.fromarray(labeled_image)
-            if labeled_image:
-                img = concatenate_four_images(preprocess_img, labeled_image, edge_img, filtered_img)
+            if labeled_image is not None:
+                self.display_detection_images(preprocess_img, labeled_image, edge_img, filtered_img)
             else:
-                img = concatenate_four_images(preprocess_img, original_img, edge_img, filtered_img)
-            self.handle_displaying_image_on_canvas(img)
+                self.display_detection_images(preprocess_img, original_img, edge_img, filtered_img)
         self.resize_canvas_detection_scrollregion()
 
     def display_image(self, index):
@@ -1603,6 +1704,7 @@ class SpotsDetectionTab:
             index (int): The index of the image to display.
         """
         # Clear previous data
+        self.cancel_previews()
         self.data_canvas_detection.delete("all")
         self.display_header_info_labels()
 
@@ -1621,7 +1723,7 @@ class SpotsDetectionTab:
             event: The event triggering the resize action.
         """
         # Update the scroll region to cover the entire canvas
-        self.data_canvas_detection.config(scrollregion=self.data_canvas_detection.bbox("all"))
+        self.data_canvas_detection.config(scrollregion=self.canvas_renderer.scrollregion())
 
     def insert_formated_data_to_process(self):
         """
@@ -0,0 +1,291 @@
+# -*- coding: utf-8 -*-
+"""
+Application-wide store of loaded frames.
+
+Every scan and MPP frame is registered once and shared by the tabs. The data
+arrays are held by reference, so MPP frames stay memory-mapped, and greyscale
+images are created on first use and shared by all tabs.
+
+@author: rlewandkow
+"""
+
+import os, sys
+
+sys.path.insert(1, "/".join(os.path.realpath(__file__).split("/")[0:-2]))
+
+import copy
+import logging
+import threading
+import weakref
+
+from collections import OrderedDict
+
+import numpy as np
+
+from data.processing.data_process import convert_data_to_greyscale_image
+from data.files.read_mpp import iter_mpp_frames
+
+logger = logging.getLogger(__name__)
+
+# Memory (bytes) of greyscale images kept by the store when no tab uses them
+GREYSCALE_CACHE_MAX_BYTES = 256 * 1024 * 1024
+
+GREYSCALE_KEY = "greyscale_image"
+
+class Frame:
+    """
+    Handle of one scan or MPP frame registered in a FrameStore.
+
+    Attributes:
+        file_name (str): The path to the file.
+        frame_number (int): Number of the MPP frame, starting from 1, or None for a scan.
+        data (numpy.ndarray): The frame data, shared by all tabs.
+    """
+    __slots__ = ("file_name", "frame_number", "data", "__weakref__")
+
+    def __init__(self, file_name, frame_number, data):
+        self.file_name = file_name
+        self.frame_number = frame_number
+        self.data = data
+
+    @property
+    def key(self):
+        return self.file_name, self.frame_number
+
+def is_memory_mapped(array):
+    """Check if an array is a view of a memory-mapped file."""
+    while isinstance(array, np.ndarray):
+        if isinstance(array, np.memmap):
+            return True
+        array = array.base
+    return False
+
+def greyscale_image_size(img):
+    return len(img.getbands()) * img.width * img.height
+
+class FrameStore:
+    """
+    Registry of loaded frames with lazily created, shared greyscale images.
+
+    A greyscale image is kept while any tab holds it. Images no tab holds are kept
+    in an LRU bounded by max_greyscale_bytes and created again once evicted. Frames
+    still used after the store is cleared keep their image for as long as they exist.
+
+    Attributes:
+        hits (int): Greyscale images returned without being created.
+        misses (int): Greyscale images created.
+    """
+    def __init__(self, max_greyscale_bytes=GREYSCALE_CACHE_MAX_BYTES):
+        self.max_greyscale_bytes = max_greyscale_bytes
+        self.hits = 0
+        self.misses = 0
+        self._frames = {}
+        self._greyscale = OrderedDict()
+        self._greyscale_size = 0
+        self._alive = weakref.WeakValueDictionary()
+        # Images of frames no longer registered, by frame
+        self._stale = weakref.WeakKeyDictionary()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._frames)
+
+    def add_frame(self, file_name, frame_number, data):
+        """
+        Register a frame, or return the frame already registered for it.
+
+        Args:
+            file_name (str): The path to the file.
+            frame_number (int): Number of the MPP frame, or None for a scan.
+            data (numpy.ndarray): The frame data.
+
+        Returns:
+            Frame: The frame handle.
+        """
+        key = (file_name, frame_number)
+        with self._lock:
+            frame = self._frames.get(key)
+            if frame is None:
+                frame = Frame(file_name, frame_number, data)
+                self._frames[key] = frame
+            return frame
+
+    def add_scan(self, file_ext, item):
+        """
+        Register all frames of a loaded file.
+
+        Args:
+            file_ext (str): The file extension.
+            item (dict): Loaded file, with 'file_name' and 'data'.
+
+        Returns:
+            list: Frame handles, one per scan or MPP frame.
+        """
+        if file_ext.lower() == "stp" or file_ext.lower() == "s94":
+            return [self.add_frame(item['file_name'], None, item['data'])]
+        elif file_ext.lower() == "mpp":
+            return [
+                self.add_frame(item['file_name'], i, frame)
+                for i, frame in enumerate(iter_mpp_frames(item['data']), start=1)
+            ]
+        msg = f"FrameStore: Unsupported file extension: {file_ext}"
+        logger.error(msg)
+        raise ValueError(msg)
+
+    def get_greyscale_image(self, frame):
+        """
+        Greyscale image of a frame, created on first use.
+
+        Args:
+            frame (Frame): The frame handle.
+
+        Returns:
+            PIL.Image.Image: The greyscale image, shared by all callers.
+        """
+        key = frame.key
+        with self._lock:
+            registered = self._frames.get(key) is frame
+            img = self._alive.get(key) if registered else self._stale.get(frame)
+            if img is not None:
+                self.hits += 1
+                if registered:
+                    self._remember(key, img)
+                return img
+            self.misses += 1
+
+        img = convert_data_to_greyscale_image(frame.data)
+        with self._lock:
+            # Another thread may have created it meanwhile
+            if self._frames.get(key) is frame:
+                img = self._alive.setdefault(key, img)
+                self._remember(key, img)
+            else:
+                # Frame of data loaded before the store was cleared
+                img = self._stale.setdefault(frame, img)
+        return img
+
+    def _remember(self, key, img):
+        if key in self._greyscale:
+            self._greyscale.move_to_end(key)
+            return
+        size = greyscale_image_size(img)
+        self._greyscale[key] = img
+        self._greyscale_size += size
+        while self._greyscale_size > self.max_greyscale_bytes and len(self._greyscale) > 1:
+            _, evicted = self._greyscale.popitem(last=False)
+            self._greyscale_size -= greyscale_image_size(evicted)
+
+    def clear(self):
+        """
+        Forget all frames and greyscale images.
+
+        Images still held elsewhere stay with their frames, so entries created before
+        clearing keep returning the same image.
+        """
+        with self._lock:
+            for key, frame in self._frames.items():
+                img = self._alive.get(key)
+                if img is not None:
+                    self._stale[frame] = img
+            self._frames.clear()
+            self._alive.clear()
+            self._greyscale.clear()
+            self._greyscale_size = 0
+
+    def stats(self):
+        """
+        Memory used by the frames and greyscale images.
+
+        Returns:
+            dict: Number of frames, bytes of frame data held in memory and memory-mapped,
+                number and bytes of greyscale images alive, and the cache counters.
+        """
+        with self._lock:
+            frames = list(self._frames.values())
+            images = list(self._alive.values()) + list(self._stale.values())
+            hits, misses = self.hits, self.misses
+
+        data_bytes = mapped_bytes = 0
+        counted = set()
+        for frame in frames:
+            if not isinstance(frame.data, np.ndarray) or id(frame.data) in counted:
+                continue
+            counted.add(id(frame.data))
+            if is_memory_mapped(frame.data):
+                mapped_bytes += frame.data.nbytes
+            else:
+                data_bytes += frame.data.nbytes
+        return {
+            "frames": len(frames),
+            "data_bytes": data_bytes,
+            "mapped_bytes": mapped_bytes,
+            "greyscale_images": len(images),
+            "greyscale_bytes": sum(greyscale_image_size(img) for img in images),
+            "hits": hits,
+            "misses": misses,
+        }
+
+class FrameEntry(dict):
+    """
+    Entry of the data of a tab backed by a frame of the store.
+
+    The greyscale image keys are resolved on first access from the store instead of
+    being stored in the entry; assigning a key replaces the shared image for this entry only.
+
+    Attributes:
+        frame (Frame): The frame handle.
+    """
+    def __init__(self, frame, fields, greyscale_keys=(GREYSCALE_KEY,), store=None):
+        super().__init__(fields)
+        self.frame = frame
+        self.greyscale_keys = tuple(greyscale_keys)
+        self.store = store if store is not None else frame_store
+
+    def __missing__(self, key):
+        if key in self.greyscale_keys:
+            return self.store.get_greyscale_image(self.frame)
+        raise KeyError(key)
+
+    def __contains__(self, key):
+        return super().__contains__(key) or key in self.greyscale_keys
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def __copy__(self):
+        return FrameEntry(self.frame, dict(self), self.greyscale_keys, self.store)
+
+    def __deepcopy__(self, memo):
+        # Copies share the frame and the store
+        return FrameEntry(self.frame, copy.deepcopy(dict(self), memo), self.greyscale_keys, self.store)
+
+def create_frame_entry(item, fields, greyscale_keys=(GREYSCALE_KEY,)):
+    """
+    Create an entry whose greyscale image keys refer to the greyscale image of an item.
+
+    Args:
+        item (dict): Entry of the data of a tab.
+        fields (dict): The other keys of the entry.
+        greyscale_keys (tuple, optional): Keys resolved to the greyscale image.
+
+    Returns:
+        dict: A FrameEntry if the item is backed by the store, otherwise a dict with the image.
+    """
+    if isinstance(item, FrameEntry):
+        return FrameEntry(item.frame, fields, greyscale_keys, item.store)
+    entry = dict(fields)
+    for key in greyscale_keys:
+        entry[key] = item[GREYSCALE_KEY]
+    return entry
+
+def format_memory_usage(stats):
+    """Memory usage of a store as text."""
+    megabyte = 1024 * 1024
+    return (f"{stats['frames']} frames: {stats['data_bytes'] / megabyte:.1f} MB in memory, "
+            f"{stats['mapped_bytes'] / megabyte:.1f} MB mapped, "
+            f"{stats['greyscale_images']} greyscale images {stats['greyscale_bytes'] / megabyte:.1f} MB")
+
+frame_store = FrameStore()
@@ -11,25 +11,32 @@ import os, sys
 
 sys.path.insert(1, "/".join(os.path.realpath(__file__).split("/")[0:-2]))
 
+import queue
+import threading
+
 import tkinter as tk
 from tkinter import ttk
 from tkinter import filedialog, messagebox, Scrollbar, Text
 
-from data.files.read_mpp import read_mpp_file
-from data.files.read_s94 import read_s94_file
-from data.files.read_stp import read_stp_file
+from data.files.load_files import read_file, iter_loaded_files, DEFAULT_LOAD_WORKERS
 
 from data.processing.file_process import (
     process_stp_files_I_ISET_map, process_s94_files_I_ISET_map,
     process_mpp_files_I_ISET_map, process_stp_and_s94_files_l0,
     process_mpp_files_l0, process_mpp_files_l0_from_I_ISET_map,
-    process_stp_and_s94_files_l0_from_I_ISET_map, convert_s94_files_to_stp
+    process_stp_and_s94_files_l0_from_I_ISET_map, convert_s94_files_to_stp,
+    process_files_l0_sweep, create_ISET_range
 )
 
+from ui.main_window.tabs.frame_store import frame_store
+
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Interval (ms) for checking files loaded in the background
+LOAD_POLL_INTERVAL_MS = 50
+
 class LoadDataTab:
     """
     Class for handling data loading and processing tab.
@@ -44,6 +51,7 @@ class LoadDataTab:
         file_listbox (tk.Listbox): Listbox widget for displaying files.
         loaded_files_text (Text): Text widget for displaying loaded files.
         iset_entry (tk.Entry): Entry widget for ISET value.
+        workers_var (tk.IntVar): Number of files decoded concurrently.
     """
     def __init__(self, notebook, app):
         """
@@ -58,6 +66,10 @@ class LoadDataTab:
 
         self.app = app
         self.data = []
+        self.load_queue = None
+        self.load_failures = []
+        self.sweep_queue = None
+        self.sweep_message = None
 
         self.create_load_data_tab()
 
@@ -92,6 +104,18 @@ class LoadDataTab:
         self.calculate_I_ISET_l0_button = tk.Button(self.load_data_tab, text="Calculate l0 from (I - ISET)^2 map", command=self.calculate_I_ISET_l0)
         self.calculate_I_ISET_l0_button.grid(row=2, column=7, columnspan=2, padx=5, pady=5, sticky="ew")
 
+        # ISET range for l0 sweep
+        self.iset_range_label = tk.Label(self.load_data_tab, text="ISET from/to/step:")
+        self.iset_range_label.grid(row=3, column=5, padx=5, pady=5, sticky="e")
+        self.iset_start_entry = tk.Entry(self.load_data_tab, width=10)
+        self.iset_start_entry.grid(row=3, column=6, padx=5, pady=5, sticky="ew")
+        self.iset_stop_entry = tk.Entry(self.load_data_tab, width=10)
+        self.iset_stop_entry.grid(row=3, column=7, padx=5, pady=5, sticky="ew")
+        self.iset_step_entry = tk.Entry(self.load_data_tab, width=10)
+        self.iset_step_entry.grid(row=3, column=8, padx=5, pady=5, sticky="ew")
+        self.calculate_l0_sweep_button = tk.Button(self.load_data_tab, text="Calculate l0 for ISET range", command=self.calculate_l0_sweep)
+        self.calculate_l0_sweep_button.grid(row=4, column=7, columnspan=2, padx=5, pady=5, sticky="ew")
+
         # File type selection
         self.file_type_label = tk.Label(self.load_data_tab, text="Select File Type:")
         self.file_type_label.grid(row=1, column=0, padx=5, pady=5)
@@ -120,6 +144,13 @@ class LoadDataTab:
         self.convert_s94_stp_button = tk.Button(self.load_data_tab, text="Convert", command=self.convert_s94_stp)
         self.convert_s94_stp_button.grid(row=2, column=0, padx=5, pady=5)
 
+        # Number of files decoded concurrently
+        self.workers_label = tk.Label(self.load_data_tab, text="Workers:")
+        self.workers_label.grid(row=2, column=1, padx=5, pady=5)
+        self.workers_var = tk.IntVar(value=DEFAULT_LOAD_WORKERS)
+        self.workers_spinbox = tk.Spinbox(self.load_data_tab, from_=1, to=64, width=5, textvariable=self.workers_var)
+        self.workers_spinbox.grid(row=2, column=2, padx=5, pady=5)
+
     def browse_path(self):
         """Browse for a folder and update the path entry."""
         try:
@@ -184,11 +215,7 @@ class LoadDataTab:
             file_type = self.file_type_var.get().lower()  # Convert file type to lowercase
             files = [file for file in os.listdir(folder_path) if file.lower().endswith(file_type)]
 
-            loaded_files = self.load_files(files, folder_path, file_type)
-
-            self.loaded_files_text.insert(tk.END, "\n".join(loaded_files))
-
-            self.app.update_data(self.data)
+            self.load_files(files, folder_path, file_type)
             
         except Exception as e:
             error_msg = "Error", f"load_all_files: An error occurred while refreshing the listbox: {str(e)}"
@@ -217,11 +244,7 @@ class LoadDataTab:
             file_type = self.file_type_var.get().lower()  # Convert file type to lowercase
             selected_files = [self.file_listbox.get(idx) for idx in selected_indices]
 
-            loaded_files = self.load_files(selected_files, folder_path, file_type)
-
-            self.loaded_files_text.insert(tk.END, "\n".join(loaded_files))
-
-            self.app.update_data(self.data)
+            self.load_files(selected_files, folder_path, file_type)
             
         except Exception as e:
             error_msg = "load_selected_files: Error", f"An error occurred while loading selected files: {str(e)}"
@@ -230,17 +253,75 @@ class LoadDataTab:
             
     
     def load_files(self, files, folder_path, file_type):
-        loaded_files = []
-        for file in files:
-            file_path = os.path.join(folder_path, file)
-            try:
-                self.data.append(read_file(file_path, file_type))
-                loaded_files.append(file)
-            except Exception as e:
-                error_msg = f"load_files: Error loading file '{file}': {e}"
-                logger.error(error_msg)
-                print(error_msg)
-        return loaded_files
+        """
+        Load files in a background thread.
+
+        Files are decoded concurrently and shown in the loaded files text as soon as
+        they are read. Application data is updated once all files are loaded.
+
+        Args:
+            files (list): Names of the files to load.
+            folder_path (str): Folder containing the files.
+            file_type (str): File extension.
+        """
+        if self.load_queue is not None:
+            messagebox.showinfo("Loading", "Files are still being loaded.")
+            return
+
+        try:
+            max_workers = int(self.workers_var.get())
+        except (tk.TclError, ValueError):
+            max_workers = DEFAULT_LOAD_WORKERS
+
+        file_paths = [os.path.join(folder_path, file) for file in files]
+        self.load_queue = queue.Queue()
+        self.load_failures = []
+        self.set_load_buttons_state(tk.DISABLED)
+
+        threading.Thread(
+            target=load_files_in_background,
+            args=(file_paths, file_type, max(1, max_workers), self.load_queue),
+            daemon=True
+        ).start()
+        self.load_data_tab.after(LOAD_POLL_INTERVAL_MS, self.check_loaded_files)
+
+    def check_loaded_files(self):
+        """Show files loaded in the background and finish loading when all are read."""
+        try:
+            while True:
+                item = self.load_queue.get_nowait()
+                if item is None:
+                    self.finish_loading()
+                    return
+                file_path, result, error = item
+                file = os.path.basename(file_path)
+                if error is None:
+                    self.data.append(result)
+                    self.loaded_files_text.insert(tk.END, file + "\n")
+                    self.loaded_files_text.see(tk.END)
+                else:
+                    error_msg = f"load_files: Error loading file '{file}': {error}"
+                    logger.error(error_msg)
+                    print(error_msg)
+                    self.load_failures.append(f"{file}: {error}")
+        except queue.Empty:
+            pass
+        self.load_data_tab.after(LOAD_POLL_INTERVAL_MS, self.check_loaded_files)
+
+    def finish_loading(self):
+        """Update application data after background loading."""
+        self.load_queue = None
+        self.set_load_buttons_state(tk.NORMAL)
+        # Frames of previously loaded files are no longer shared between the tabs
+        frame_store.clear()
+        self.app.update_data(self.data)
+        if self.load_failures:
+            messagebox.showwarning("Loading", "Some files could not be loaded:\n" + "\n".join(self.load_failures))
+
+    def set_load_buttons_state(self, state):
+        """Enable or disable the buttons starting a load."""
+        self.load_all_button.config(state=state)
+        self.load_selected_button.config(state=state)
 
     def calculate_I_ISET(self):
         """Calculate (I - ISET)^2."""
@@ -288,6 +369,59 @@ class LoadDataTab:
             process_mpp_files_l0(self.data, ISET)
             messagebox.showinfo("Done", "Processing MPP files complete.")
 
+    def calculate_l0_sweep(self):
+        """
+        Calculate l0 from raw data for a range of ISET values and save it as one table.
+
+        The table is calculated in a background thread and reported once it is saved.
+        """
+        if not self.data:
+            messagebox.showerror("Error", "No files selected")
+            return
+        try:
+            ISETs = create_ISET_range(
+                float(self.iset_start_entry.get()),
+                float(self.iset_stop_entry.get()),
+                float(self.iset_step_entry.get())
+            )
+        except ValueError:
+            messagebox.showerror("Error", "Invalid ISET range.")
+            return
+        output_file = filedialog.asksaveasfilename(
+            title="Save l0 table",
+            initialdir=self.path_entry.get(),
+            initialfile="l0_sweep.csv",
+            defaultextension=".csv",
+            filetypes=[("CSV files", "*.csv")]
+        )
+        if not output_file:
+            return
+
+        # Files loaded meanwhile are not part of this sweep
+        self.sweep_queue = queue.Queue()
+        self.sweep_message = f"l0 for {len(ISETs)} ISET values saved as {output_file}."
+        self.calculate_l0_sweep_button.config(state=tk.DISABLED)
+        threading.Thread(
+            target=calculate_l0_sweep_in_background,
+            args=(list(self.data), ISETs, output_file, self.sweep_queue),
+            daemon=True
+        ).start()
+        self.load_data_tab.after(LOAD_POLL_INTERVAL_MS, self.check_l0_sweep)
+
+    def check_l0_sweep(self):
+        """Report the l0 sweep once it is calculated in the background."""
+        try:
+            error_msg = self.sweep_queue.get_nowait()
+        except queue.Empty:
+            self.load_data_tab.after(LOAD_POLL_INTERVAL_MS, self.check_l0_sweep)
+            return
+        self.sweep_queue = None
+        self.calculate_l0_sweep_button.config(state=tk.NORMAL)
+        if error_msg is None:
+            messagebox.showinfo("Done", self.sweep_message)
+        else:
+            messagebox.showerror("Error", error_msg)
+
     def calculate_I_ISET_l0(self):
         """Calculate l0 from (I - ISET)^2 map."""
         try:
@@ -306,11 +440,22 @@ class LoadDataTab:
             process_mpp_files_l0_from_I_ISET_map(self.data)
             messagebox.showinfo("Done", "Processing MPP files complete.")
 
-def read_file(file_path, file_type):
-    """Read the file based on its type."""
-    if file_type == ".s94":
-        return read_s94_file(file_path)
-    elif file_type == ".stp":
-        return read_stp_file(file_path)
-    elif file_type == ".mpp":
-        return read_mpp_file(file_path)
\ No newline at end of file
+def calculate_l0_sweep_in_background(data, ISETs, output_file, result_queue):
+    """Calculate l0 for a range of ISET values and put the error message, or None, in result_queue."""
+    try:
+        process_files_l0_sweep(data, ISETs, output_file)
+        result_queue.put(None)
+    except Exception as e:
+        error_msg = f"calculate_l0_sweep: An error occurred while calculating l0: {e}"
+        logger.error(error_msg)
+        result_queue.put(error_msg)
+
+def load_files_in_background(file_paths, file_type, max_workers, result_queue):
+    """Read files and put the results in result_queue, followed by None."""
+    try:
+        for item in iter_loaded_files(file_paths, file_type, max_workers):
+            result_queue.put(item)
+    except Exception as e:
+        logger.error(f"load_files_in_background: An unexpected error occurred: {e}")
+    finally:
+        result_queue.put(None)
@@ -135,7 +135,7 @@ class NoiseAnalysisTab:
                     self.data_listbox_analisys.insert(tk.END, filename_only)
                 elif file_ext.lower() == "mpp":
                     filename_only = os.path.basename(item['file_name'])
-                    for i, frame in enumerate(item['data'], start=1):
+                    for i in range(1, len(item['data']) + 1):
                         frame_name = f"{filename_only}: frame {i}"
                         self.data_listbox_analisys.insert(tk.END, frame_name)
         except Exception as e:
@@ -198,6 +198,7 @@ class NoiseAnalysisTab:
         if frame_number < 1 or frame_number > len(mpp_data['data']):
             raise ValueError(f"Invalid frame number: {frame_number}")
 
+        # Frames of an MppMovie are decoded on demand
         selected_data = mpp_data['data'][frame_number - 1]
         return selected_data
 
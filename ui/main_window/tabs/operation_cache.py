@@ -0,0 +1,166 @@
+# -*- coding: utf-8 -*-
+"""
+Cache for results of image operations.
+
+Results are keyed by the operation name, its parameters and a fingerprint of
+the content of the input image, so revisiting a slider value returns the
+previous result without recomputing it.
+
+@author: rlewandkow
+"""
+
+import os, sys
+
+sys.path.insert(1, "/".join(os.path.realpath(__file__).split("/")[0:-2]))
+
+import hashlib
+import json
+import logging
+import threading
+import weakref
+
+from collections import OrderedDict
+
+import numpy as np
+from PIL import Image
+
+logger = logging.getLogger(__name__)
+
+# Default bounds of an operation cache
+OPERATION_CACHE_SIZE = 64
+OPERATION_CACHE_MAX_BYTES = 512 * 1024 * 1024
+
+def image_fingerprint(img):
+    """
+    Fingerprint of the content of an image.
+
+    Args:
+        img (PIL.Image.Image or numpy.ndarray): The image.
+
+    Returns:
+        str: Hash of the mode or dtype, the shape and the pixel data.
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    if isinstance(img, Image.Image):
+        digest.update(f"{img.mode}|{img.size}".encode())
+        digest.update(img.tobytes())
+    else:
+        array = np.ascontiguousarray(img)
+        digest.update(f"{array.dtype.str}|{array.shape}".encode())
+        digest.update(memoryview(array).cast("B"))
+    return digest.hexdigest()
+
+def canonical_params(params):
+    """Parameters as a string independent of key order and of tuple or list types."""
+    return json.dumps(params, sort_keys=True, default=repr)
+
+def result_size(result):
+    """Approximate memory used by a cached result, in bytes."""
+    if isinstance(result, np.ndarray):
+        return result.nbytes
+    if isinstance(result, Image.Image):
+        return len(result.getbands()) * result.width * result.height
+    return 0
+
+def copy_result(result):
+    """Copy a result so callers cannot modify the cached one."""
+    if isinstance(result, (np.ndarray, Image.Image)):
+        return result.copy()
+    return result
+
+class OperationCache:
+    """
+    Bounded LRU cache for results of image operations.
+
+    Attributes:
+        hits (int): Number of lookups answered from the cache.
+        misses (int): Number of lookups that computed the result.
+    """
+    def __init__(self, max_entries=OPERATION_CACHE_SIZE, max_bytes=OPERATION_CACHE_MAX_BYTES):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+        # Fingerprints of PIL images, which the tabs never modify in place
+        self._fingerprints = {}
+
+    def __len__(self):
+        return len(self._entries)
+
+    def fingerprint(self, img):
+        """Fingerprint of an input image, remembered for the lifetime of PIL images."""
+        if not isinstance(img, Image.Image):
+            return image_fingerprint(img)
+        image_id = id(img)
+        entry = self._fingerprints.get(image_id)
+        if entry is not None and entry[0]() is img:
+            return entry[1]
+        fingerprint = image_fingerprint(img)
+        fingerprints = self._fingerprints
+        self._fingerprints[image_id] = (
+            weakref.ref(img, lambda ref: fingerprints.pop(image_id, None)),
+            fingerprint
+        )
+        return fingerprint
+
+    def make_key(self, operation, params, img):
+        return operation, canonical_params(params), self.fingerprint(img)
+
+    def get_or_compute(self, operation, params, img, compute):
+        """
+        Return the cached result of an operation, computing and storing it on a miss.
+
+        Args:
+            operation (str): Name of the operation.
+            params (dict): Parameters of the operation.
+            img (PIL.Image.Image or numpy.ndarray): The input image.
+            compute (callable): Called without arguments to compute the result.
+
+        Returns:
+            The result of compute, or a copy of the cached one.
+        """
+        key = self.make_key(operation, params, img)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return tuple(copy_result(item) for item in entry[0])
+            self.misses += 1
+
+        result = compute()
+        self.put(key, result)
+        return result
+
+    def put(self, key, result):
+        """Store a result tuple, evicting least recently used entries beyond the bounds."""
+        stored = tuple(copy_result(item) for item in result)
+        size = sum(result_size(item) for item in stored)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._size -= self._entries.pop(key)[1]
+            self._entries[key] = (stored, size)
+            self._size += size
+            while len(self._entries) > self.max_entries or self._size > self.max_bytes:
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self._size -= evicted_size
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+
+    def stats(self):
+        """Hit and miss counters, number of entries and memory used."""
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "entries": len(self._entries),
+                "bytes": self._size,
+            }
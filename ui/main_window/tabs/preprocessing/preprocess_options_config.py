@@ -28,6 +28,7 @@ from ui.main_window.tabs.preprocessing.preprocessing_operations import (
     perform_gamma_adjustment,
     perform_contrast_stretching,
     perform_adaptive_equalization,
+    perform_plane_leveling,
     perform_region_leveling,
     perform_three_point_leveling,
     perform_gaussian_sharpening,
@@ -100,6 +101,7 @@ options_config = {
         ]
     },
     "Adaptive Leveling": {
+        "radio_buttons": [("Decomposed disk", "decomposed"), ("Pyramid", "pyramid"), ("Exact disk", "disk")],
         "labels": [("Disk size", preprocess_params["Adaptive Leveling"]["disk_size"])],
         "sliders": [
             {"from_": 2, "to": 50, "resolution": 1, "value": preprocess_params["Adaptive Leveling"]["disk_size"]}
@@ -194,6 +196,7 @@ preprocess_operations = {
     "Gamma Adjustment": perform_gamma_adjustment,
     "Contrast Stretching": perform_contrast_stretching,
     "Adaptive Equalization": perform_adaptive_equalization,
+    "Plane Leveling": perform_plane_leveling,
     "Region Leveling": perform_region_leveling,
     "Three Point Leveling": perform_three_point_leveling,
     "Gaussian Sharpening": perform_gaussian_sharpening,
@@ -203,4 +206,7 @@ preprocess_operations = {
     "Local Median Filter": perform_local_median_filter,
     "White Top Hat": perform_white_top_hat,
     "Black Top Hat": perform_black_top_hat
-}
\ No newline at end of file
+}
+
+# Operations asking the user for input; their results depend on more than params and image
+interactive_operations = ("Region Leveling", "Three Point Leveling")
\ No newline at end of file
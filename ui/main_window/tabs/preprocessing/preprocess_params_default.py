@@ -27,12 +27,13 @@ preprocess_params = {
     "Gamma Adjustment": {"gamma": 3.5},
     "Contrast Stretching": {"min": 2, "max": 98},
     "Adaptive Equalization": {"limit": 0.03},
+    "Plane Leveling": {},
     "Region Leveling": {},
     "Three Point Leveling": {},
     "Gaussian Sharpening": {"radius": 1.0, "amount": 1.0},
     "Propagation": {"type": "dilation", "marker_value": 0.3},
     "Polynomial Leveling": {"order": 3},
-    "Adaptive Leveling": {"disk_size": 5},
+    "Adaptive Leveling": {"disk_size": 5, "method": "decomposed"},
     "Local Median Filter": {"size": 5},
     "White Top Hat": {"selem_type": "disk", "selem_size": 12},
     "Black Top Hat": {"selem_type": "disk", "selem_size": 12}
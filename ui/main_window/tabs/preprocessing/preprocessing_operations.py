@@ -50,12 +50,61 @@ from data.processing.preprocessing.intensity import (
 )
 
 from data.processing.preprocessing.leveling import (
+    PlaneLeveling,
     RegionLeveling,
     ThreePointLeveling,
     PolynomialLeveling,
     AdaptiveLeveling
 )
 
+from data.processing.data_process import quantize_image
+
+# Precision of the preprocessing chain: "uint8" quantizes the result of every operation,
+# "float64" keeps the data in float64 (in the 0-255 range) and quantizes only for display
+PRECISION_MODES = ("uint8", "float64")
+DEFAULT_PRECISION = "uint8"
+
+def get_precision(params):
+    """Precision mode of an operation, stored in its parameters."""
+    precision = params.get('precision', DEFAULT_PRECISION)
+    if precision not in PRECISION_MODES:
+        raise ValueError(f"Invalid precision mode: {precision}")
+    return precision
+
+def is_float_precision(params):
+    return get_precision(params) == "float64"
+
+def working_image(params, img):
+    """
+    Convert an image to the array an operation works on.
+
+    Args:
+        params (dict): Operation parameters with the optional 'precision' key.
+        img (PIL.Image.Image or numpy.ndarray): The input image.
+
+    Returns:
+        numpy.ndarray: uint8 array, or float64 array in the float64 precision mode.
+    """
+    if is_float_precision(params):
+        return np.asarray(img, dtype=np.float64)
+    return np.array(img)
+
+def unit_range_image(params, img):
+    """Input for operations working on float images in [0, 1]."""
+    if is_float_precision(params):
+        return np.clip(working_image(params, img) / 255.0, 0.0, 1.0)
+    return np.array(img)
+
+def unit_range_result(params, result_image):
+    """Map a result in [0, 1] back to the 0-255 range."""
+    if is_float_precision(params):
+        return result_image * 255.0
+    return (result_image * 255).astype(np.uint8)
+
+def output_dtype(params):
+    """dtype of operations normalizing their result to 0-255."""
+    return np.float64 if is_float_precision(params) else np.uint8
+
 def perform_gaussian_blur(params, img):
     """
     Apply Gaussian blur to an image.
@@ -69,7 +118,7 @@ def perform_gaussian_blur(params, img):
     """
     process_name = "GaussianBlur"
     result_image = GaussianBlur(
-            img=np.array(img), 
+            img=working_image(params, img), 
             sigmaX=params['sigmaX'],
             sigmaY=params['sigmaY']
             )
@@ -88,13 +137,14 @@ def perform_non_local_denoising(params, img):
         tuple: Process name and the resulting image.
     """
     process_name = "Non-local Mean Denoising"
+    # OpenCV denoises 8-bit images only, so this step quantizes in every mode
     result_image = NlMeansDenois(
-            img=np.array(img),
+            img=quantize_image(working_image(params, img)),
             h=params['h'],
             searchWinwowSize=params['searchWindowSize'],
             templateWindowSize=params['templateWindowSize']
             )
-    return process_name, result_image
+    return process_name, working_image(params, result_image)
 
 def perform_gaussian_filter(params, img):
     """
@@ -109,7 +159,7 @@ def perform_gaussian_filter(params, img):
     """
     process_name = "GaussianFilter"
     result_image = GaussianFilter(
-            img=np.array(img),
+            img=working_image(params, img),
             sigma=params['sigma']
         )
     
@@ -128,7 +178,7 @@ def perform_erosion(params, img):
     """
     process_name = "Erosion"
     result_image = Erosion(
-            img=np.array(img),
+            img=working_image(params, img),
             kernel_type=params['kernel_type'],
             kernel_size=params['kernel_size'],
             iterations=params['iterations']
@@ -139,7 +189,7 @@ def perform_erosion(params, img):
 def perform_binary_greyscale_erosion(params, img):
     process_name = "Binary Greyscale Erosion"
     result_image = BinaryGreyscaleErosion(
-        img=np.array(img),
+        img=working_image(params, img),
         kernel_type=params['kernel_type'],
         kernel_size=params['kernel_size']
     )
@@ -149,7 +199,7 @@ def perform_binary_greyscale_erosion(params, img):
 def perform_gaussian_greyscale_erosion(params, img):
     process_name = "Gaussian Greyscale Erosion"
     result_image = GaussianGreyscaleErosion(
-        img=np.array(img),
+        img=working_image(params, img),
         mask_size=params['mask_size'],
         sigma=params['sigma']
     )
@@ -159,7 +209,7 @@ def perform_gaussian_greyscale_erosion(params, img):
 def perform_binary_greyscale_dilation(params, img):
     process_name = "Binary Greyscale Dilation"
     result_image = BinaryGreyscaleDilation(
-        img=np.array(img),
+        img=working_image(params, img),
         kernel_type=params['kernel_type'],
         kernel_size=params['kernel_size']
     )
@@ -169,7 +219,7 @@ def perform_binary_greyscale_dilation(params, img):
 def perform_gaussian_greyscale_dilation(params, img):
     process_name = "Gaussian Greyscale Dilation"
     result_image = GaussianGreyscaleDilation(
-        img=np.array(img),
+        img=working_image(params, img),
         mask_size=params['mask_size'],
         sigma=params['sigma']
     )
@@ -179,7 +229,7 @@ def perform_gaussian_greyscale_dilation(params, img):
 def perform_binary_greyscale_opening(params, img):
     process_name = "Binary Greyscale Opening"
     result_image = BinaryGreyscaleOpening(
-        img=np.array(img),
+        img=working_image(params, img),
         kernel_type=params['kernel_type'],
         kernel_size=params['kernel_size']
     )
@@ -189,7 +239,7 @@ def perform_binary_greyscale_opening(params, img):
 def perform_gaussian_greyscale_opening(params, img):
     process_name = "Gaussian Greyscale Opening"
     result_image = GaussianGreyscaleOpening(
-        img=np.array(img),
+        img=working_image(params, img),
         mask_size=params['mask_size'],
         sigma=params['sigma']
     )
@@ -199,7 +249,7 @@ def perform_gaussian_greyscale_opening(params, img):
 def perform_binary_greyscale_closing(params, img):
     process_name = "Binary Greyscale Closing"
     result_image = BinaryGreyscaleClosing(
-        img=np.array(img),
+        img=working_image(params, img),
         kernel_type=params['kernel_type'],
         kernel_size=params['kernel_size']
     )
@@ -209,7 +259,7 @@ def perform_binary_greyscale_closing(params, img):
 def perform_gaussian_greyscale_closing(params, img):
     process_name = "Gaussian Greyscale Closing"
     result_image = GaussianGreyscaleClosing(
-        img=np.array(img),
+        img=working_image(params, img),
         mask_size=params['mask_size'],
         sigma=params['sigma']
     )
@@ -218,99 +268,120 @@ def perform_gaussian_greyscale_closing(params, img):
 
 def perform_gamma_adjustment(params, img):
     process_name = "Gamma Adjustment"
-    result_image = GammaAdjustment(
-        img=np.array(img),
-        gamma=params['gamma']
-    )
+    if is_float_precision(params):
+        result_image = unit_range_result(params, GammaAdjustment(
+            img=unit_range_image(params, img),
+            gamma=params['gamma']
+        ))
+    else:
+        result_image = GammaAdjustment(
+            img=working_image(params, img),
+            gamma=params['gamma']
+        )
 
     return process_name, result_image
 
 def perform_contrast_stretching(params, img):
     process_name = "Contrast Stretching"
-    result_image = ContrastStretching(
-        img=np.array(img),
-        min=params['min'],
-        max=params['max']
-    )
+    if is_float_precision(params):
+        result_image = unit_range_result(params, ContrastStretching(
+            img=unit_range_image(params, img),
+            min=params['min'],
+            max=params['max']
+        ))
+    else:
+        result_image = ContrastStretching(
+            img=working_image(params, img),
+            min=params['min'],
+            max=params['max']
+        )
     return process_name, result_image
 
 def perform_adaptive_equalization(params, img):
     process_name = "Adaptive Equalization"
     result_image = AdaptiveEqualization(
-        img=np.array(img),
+        img=unit_range_image(params, img),
         limit=params['limit']
     )
-    image_uint8 = (result_image * 255).astype(np.uint8)
-    return process_name, image_uint8
+    return process_name, unit_range_result(params, result_image)
+
+def perform_plane_leveling(params, img):
+    process_name = "Plane Leveling"
+    result_image = PlaneLeveling(working_image(params, img), dtype=output_dtype(params))
+    return process_name, result_image
 
 def perform_region_leveling(params, img):
     process_name = "Region Leveling"
-    result_image = RegionLeveling(img)
+    result_image = RegionLeveling(working_image(params, img), dtype=output_dtype(params))
     return process_name, result_image
 
 def perform_three_point_leveling(params, img):
     process_name = "Three Point Leveling"
-    result_image = ThreePointLeveling(img)
+    result_image = ThreePointLeveling(working_image(params, img), dtype=output_dtype(params))
     return process_name, result_image
 
 def perform_gaussian_sharpening(params, img):
     process_name = "Gaussian Sharpening"
     result_image = GaussianSharpening(
-        img=np.array(img),
+        img=unit_range_image(params, img),
         radius=params['radius'],
         amount=params['amount']
     )
-    image_uint8 = (result_image * 255).astype(np.uint8)
-    return process_name, image_uint8
+    return process_name, unit_range_result(params, result_image)
 
 def perform_propagation(params, img):
     process_name = "Propagation"
     result_image = Propagation(
-        img=np.array(img),
+        img=unit_range_image(params, img),
         type=params['type'],
         marker_value=params['marker_value']
     )
-    image_uint8 = (result_image * 255).astype(np.uint8)
-    return process_name, image_uint8
+    return process_name, unit_range_result(params, result_image)
 
 def perform_polynomial_leveling(params, img):
     process_name = "Polynomial Leveling"
     result_image = PolynomialLeveling(
-        img=np.array(img),
-        order=params['order']
+        img=working_image(params, img),
+        order=params['order'],
+        dtype=output_dtype(params)
     )
     return process_name, result_image
 
 def perform_adaptive_leveling(params, img):
     process_name = "Adaptive Leveling"
     result_image = AdaptiveLeveling(
-        img=np.array(img),
-        disk_size=params['disk_size']
+        img=working_image(params, img),
+        disk_size=params['disk_size'],
+        method=params.get('method', "disk"),
+        dtype=output_dtype(params)
     )
     return process_name, result_image
 
 def perform_local_median_filter(params, img):
     process_name = "Local Median Filter"
     result_image = LocalMedianFilter(
-        image=np.array(img),
-        size=params['size']
+        image=working_image(params, img),
+        size=params['size'],
+        dtype=output_dtype(params)
     )
     return process_name, result_image
 
 def perform_white_top_hat(params, img):
     process_name = "White Top Hat"
     result_image = WhiteTopHatTransformation(
-        img=np.array(img),
+        img=working_image(params, img),
         selem_type=params['selem_type'],
-        selem_size=params['selem_size']
+        selem_size=params['selem_size'],
+        dtype=output_dtype(params)
     )
     return process_name, result_image
 
 def perform_black_top_hat(params, img):
     process_name = "Black Top Hat"
     result_image = BlackTopHatTransformation(
-        img=np.array(img),
+        img=working_image(params, img),
         selem_type=params['selem_type'],
-        selem_size=params['selem_size']
+        selem_size=params['selem_size'],
+        dtype=output_dtype(params)
     )
     return process_name, result_image
\ No newline at end of file
@@ -0,0 +1,194 @@
+# -*- coding: utf-8 -*-
+"""
+Preprocessing recipes.
+
+A recipe is an ordered list of preprocessing operations with their parameters.
+It can be saved and loaded as JSON and replayed on every entry of the
+preprocessing data, concurrently across frames.
+
+@author: rlewandkow
+"""
+
+import os, sys
+
+sys.path.insert(1, "/".join(os.path.realpath(__file__).split("/")[0:-2]))
+
+import itertools
+import json
+import logging
+
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from PIL import Image
+
+from data.files.scan_cache import write_atomically
+from data.processing.data_process import quantize_image, scale_data_to_image_range
+
+from ui.main_window.tabs.detection.preprocess_operations import create_preprocess_operation
+from ui.main_window.tabs.preprocessing.preprocess_options_config import (
+    interactive_operations,
+    preprocess_operations
+)
+from ui.main_window.tabs.preprocessing.preprocessing_operations import is_float_precision
+
+logger = logging.getLogger(__name__)
+
+RECIPE_FORMAT_VERSION = 1
+
+# Default number of frames processed concurrently
+DEFAULT_RECIPE_WORKERS = min(8, os.cpu_count() or 1)
+
+class PreprocessingRecipe:
+    """
+    Ordered list of preprocessing operations applied as a chain.
+
+    Each step is a dictionary with the operation name, as used in preprocess_operations,
+    and its parameters. Every step works on the result of the previous one, the first
+    step on the image of the data entry.
+    """
+    def __init__(self, steps=None):
+        self.steps = []
+        for step in steps or []:
+            self.add_step(step['operation'], step['params'])
+
+    def __len__(self):
+        return len(self.steps)
+
+    def __iter__(self):
+        return iter(self.steps)
+
+    def add_step(self, operation, params):
+        """Append an operation with a copy of its parameters."""
+        if operation not in preprocess_operations:
+            msg = f"PreprocessingRecipe: Invalid preprocessing option: {operation}"
+            logger.error(msg)
+            raise ValueError(msg)
+        if operation in interactive_operations:
+            msg = f"PreprocessingRecipe: '{operation}' needs user input and cannot be used in a recipe."
+            logger.error(msg)
+            raise ValueError(msg)
+        self.steps.append({"operation": operation, "params": dict(params)})
+
+    def clear(self):
+        self.steps.clear()
+
+    def to_dict(self):
+        return {"version": RECIPE_FORMAT_VERSION, "steps": [dict(step) for step in self.steps]}
+
+    @classmethod
+    def from_dict(cls, recipe):
+        if recipe.get("version") != RECIPE_FORMAT_VERSION:
+            msg = f"PreprocessingRecipe: Unsupported recipe version: {recipe.get('version')}"
+            logger.error(msg)
+            raise ValueError(msg)
+        return cls(recipe.get("steps", []))
+
+    def save(self, file_name):
+        """Save the recipe as JSON."""
+        text = json.dumps(self.to_dict(), indent=4)
+        write_atomically(file_name, lambda file: file.write(text.encode("utf-8")))
+
+    @classmethod
+    def load(cls, file_name):
+        """Load a recipe saved with save."""
+        with open(file_name, "r", encoding="utf-8") as file:
+            return cls.from_dict(json.load(file))
+
+def get_operation_input(item, previous_operation, params):
+    """
+    Get the image an operation works on, as the preprocessing tab does.
+
+    Args:
+        item (dict): Entry of the preprocessing data.
+        previous_operation (dict): Operation whose result is processed, or None for the entry image.
+        params (dict): Parameters of the operation, with the optional 'precision' key.
+
+    Returns:
+        PIL.Image.Image or numpy.ndarray: The input image.
+    """
+    if previous_operation is None:
+        if is_float_precision(params):
+            return scale_data_to_image_range(item['original_data'])
+        return item['greyscale_image']
+    if is_float_precision(params):
+        return previous_operation.get('processed_data', previous_operation['processed_image'])
+    return Image.fromarray(previous_operation['processed_image'])
+
+def create_operation_from_result(result_image, process_name, params):
+    """Create the operation record stored in the entry 'operations' list."""
+    if is_float_precision(params):
+        return create_preprocess_operation(quantize_image(result_image), process_name, params, processed_data=result_image)
+    return create_preprocess_operation(result_image, process_name, params)
+
+def apply_recipe_to_item(recipe, item):
+    """
+    Run a recipe on one entry of the preprocessing data.
+
+    The entry is not modified.
+
+    Args:
+        recipe (PreprocessingRecipe): The recipe.
+        item (dict): Entry of the preprocessing data.
+
+    Returns:
+        list: Operation records, one per step, to be appended to the entry 'operations'.
+    """
+    operations = []
+    previous_operation = None
+    for step in recipe:
+        params = dict(step['params'])
+        img = get_operation_input(item, previous_operation, params)
+        process_name, result_image = preprocess_operations[step['operation']](params, img)
+        previous_operation = create_operation_from_result(result_image, process_name, params)
+        operations.append(previous_operation)
+    return operations
+
+def iter_recipe_results(recipe, items, max_workers=DEFAULT_RECIPE_WORKERS, cancel_event=None):
+    """
+    Run a recipe on data entries concurrently and yield the results in input order.
+
+    Most operations spend their time in OpenCV, SciPy and scikit-image code releasing the GIL,
+    so frames are processed in a thread pool. A failing entry is reported and does not stop
+    the run.
+
+    Args:
+        recipe (PreprocessingRecipe): The recipe.
+        items (list): Entries of the preprocessing data.
+        max_workers (int, optional): Number of entries processed concurrently.
+        cancel_event (threading.Event, optional): Stop when set.
+
+    Yields:
+        tuple: (index, operations, error) where operations is the list returned by
+            apply_recipe_to_item, or None and an error message if the recipe failed.
+    """
+    if not isinstance(max_workers, int) or max_workers < 1:
+        msg = "iter_recipe_results: max_workers must be a positive integer."
+        logger.error(msg)
+        raise ValueError(msg)
+
+    indexed_items = enumerate(items)
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        # Keep a bounded window of submitted entries so results stream in order
+        pending = deque(
+            (index, executor.submit(apply_recipe_to_item, recipe, item))
+            for index, item in itertools.islice(indexed_items, 2 * max_workers)
+        )
+        while pending:
+            if cancel_event is not None and cancel_event.is_set():
+                for _, future in pending:
+                    future.cancel()
+                return
+
+            index, future = pending.popleft()
+            try:
+                operations, error = future.result(), None
+            except Exception as e:
+                operations, error = None, str(e)
+                logger.error(f"iter_recipe_results: Error processing entry {index}: {error}")
+
+            next_item = next(indexed_items, None)
+            if next_item is not None:
+                pending.append((next_item[0], executor.submit(apply_recipe_to_item, recipe, next_item[1])))
+
+            yield index, operations, error
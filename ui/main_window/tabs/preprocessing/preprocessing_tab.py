@@ -10,12 +10,12 @@ import os, sys
 
 sys.path.insert(1, "/".join(os.path.realpath(__file__).split("/")[0:-2]))
 
+import queue
+import threading
 import tkinter as tk
 import numpy as np
-from tkinter import ttk
-from PIL import Image, ImageTk
-
-from ui.main_window.tabs.detection.preprocess_operations import create_preprocess_operation
+from tkinter import ttk, filedialog, messagebox
+from PIL import Image
 
 from ui.main_window.tabs.preprocessing.preprocessing_data import (
     data_for_preprocessing,
@@ -33,6 +33,8 @@ from ui.main_window.tabs.tabs_data import (
     get_header_info_at_index,
     get_mpp_labels,
     get_preprocessed_image_data_at_index,
+    get_preprocessed_data_at_index,
+    get_float_image_at_index,
     get_s94_labels,
     get_stp_labels,
     insert_operation_at_index
@@ -42,19 +44,34 @@ from data.processing.img_process import (
     concatenate_two_images
 )
 
-from ui.main_window.tabs.canvas_operations import (
-    scale_factor_resize_image
-)
+from data.processing.data_process import quantize_image
+
+from ui.main_window.tabs.canvas_operations import CanvasImageRenderer
+from ui.main_window.tabs.operation_cache import OperationCache
+from ui.main_window.tabs.preview_scheduler import PreviewScheduler
 
 from ui.main_window.tabs.preprocessing.preprocess_params_default import preprocess_params
 from ui.main_window.tabs.preprocessing.preprocess_options_config import (
-    options_config, preprocess_operations
+    options_config, preprocess_operations, interactive_operations
+)
+from ui.main_window.tabs.preprocessing.preprocessing_operations import (
+    DEFAULT_PRECISION,
+    is_float_precision
+)
+from ui.main_window.tabs.preprocessing.preprocessing_recipe import (
+    DEFAULT_RECIPE_WORKERS,
+    PreprocessingRecipe,
+    create_operation_from_result,
+    iter_recipe_results
 )
 
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Interval (ms) for checking recipe results computed in the background
+RECIPE_POLL_INTERVAL_MS = 50
+
 class PreprocessingTab:
     """Class representing the tab for spots detection in the application."""
 
@@ -67,6 +84,19 @@ class PreprocessingTab:
 
         self.selected_preprocess_option = None
 
+        # Results of previewed operations, so revisited slider values are not recomputed
+        self.operation_cache = OperationCache()
+        # Previews for slider changes, computed in the background
+        self.preview_scheduler = PreviewScheduler(self.root)
+
+        self.recipe = PreprocessingRecipe()
+        self.recipe_queue = None
+        self.recipe_cancel_event = None
+        # Entries the running recipe was started on
+        self.recipe_items = []
+        self.recipe_results = []
+        self.recipe_failures = []
+
         self.load_params()
 
         self.create_preprocessing_tab()
@@ -94,6 +124,7 @@ class PreprocessingTab:
 
         self.display_header_info_labels()
         self.display_detection_section_menu()
+        self.create_recipe_ui()
     
     def load_params(self):
         """
@@ -174,6 +205,7 @@ class PreprocessingTab:
         self.update_navigation_slider_range()
 
     def show_data_onDataListboxSelect(self, event):
+        self.preview_scheduler.cancel()
         # Get the index of the selected filename
         selected_index = self.data_listbox_preprocessing.curselection()
         if selected_index:
@@ -202,17 +234,8 @@ class PreprocessingTab:
     def handle_displaying_image_on_canvas(self, img):
         # Retrieve the scale factor
         scale_factor = self.scale_factor_var.get()
-        # Resize the image
-        img = scale_factor_resize_image(img, scale_factor)
-
-        # Convert the PIL image to a Tkinter PhotoImage
-        photo = ImageTk.PhotoImage(img)
-
-        # Display the image on the canvas
-        self.data_canvas_preprocessing.create_image(0, 0, anchor="nw", image=photo)
-
-        # Save a reference to the PhotoImage to prevent garbage collection
-        self.data_canvas_preprocessing.image = photo
+        # Display the visible part of the scaled image on the canvas
+        self.canvas_renderer.display(img, scale_factor)
 
     def update_navigation_slider_range(self):
         num_items = len(self.data_listbox_preprocessing.get(0, tk.END))
@@ -272,6 +295,10 @@ class PreprocessingTab:
             )
         self.horizontal_scrollbar_preprocessing.grid(row=2, column=2, sticky="ew")
         self.data_canvas_preprocessing.configure(xscrollcommand=self.horizontal_scrollbar_preprocessing.set)
+
+        # Render only the visible part of the image, again when the view moves
+        self.canvas_renderer = CanvasImageRenderer(self.data_canvas_preprocessing)
+        self.canvas_renderer.bind_scrollbars(self.horizontal_scrollbar_preprocessing, self.vertical_scrollbar_preprocessing)
         
         # Bind event for canvas resizing
         self.data_canvas_preprocessing.bind("<Configure>", self.resize_canvas_detection_scrollregion)
@@ -346,7 +373,7 @@ class PreprocessingTab:
             logger.error(error_msg)
 
     def resize_canvas_detection_scrollregion(self, event=None):
-        self.data_canvas_preprocessing.config(scrollregion=self.data_canvas_preprocessing.bbox("all"))
+        self.data_canvas_preprocessing.config(scrollregion=self.canvas_renderer.scrollregion())
 
     def display_header_info_labels(self):
         try:
@@ -404,6 +431,18 @@ class PreprocessingTab:
             choose_preprocess_option_dropdown.config(width=20)
             choose_preprocess_option_dropdown.grid(row=1, column=0, padx=5, pady=1, sticky="n")
 
+            # Run the operation chain on float64 data, quantizing only for display
+            self.precision_var = tk.StringVar(value=DEFAULT_PRECISION)
+            precision_checkbutton = tk.Checkbutton(
+                self.preprocess_section_menu,
+                text="Float64 precision",
+                variable=self.precision_var,
+                onvalue="float64",
+                offvalue="uint8",
+                command=self.precision_onChange
+                )
+            precision_checkbutton.grid(row=0, column=0, padx=5, pady=1, sticky="w")
+
             # Labels for function parameters
             self.parameter_preprocess_entries = {}
             self.parameter_preprocess_labels = {}
@@ -510,18 +549,19 @@ class PreprocessingTab:
     def apply_preprocessing_onClick(self):
         if self.selected_preprocess_option is None:
             return  # No option selected
+        self.preview_scheduler.cancel()
         params = {}
         index = self.current_data_index
         focuse_widget = self.root.focus_get()
-        img = self.get_image_based_on_selected_file_in_listbox(index, focuse_widget)
 
         result_image = None
         process_name = None
 
         self.get_values_from_preprocess_menu_items(params)
+        img = self.get_image_based_on_selected_file_in_listbox(index, focuse_widget, params)
         # Apply preprocessing based on selected option and parameters
         result_image, process_name = self.apply_preprocessing_operation(params, img)
-        operation = create_preprocess_operation(result_image, process_name, params)
+        operation = create_operation_from_result(result_image, process_name, params)
 
         insert_operation_at_index(data_for_preprocessing, index, operation)
 
@@ -535,20 +575,201 @@ class PreprocessingTab:
         self.operations_listbox.selection_set(tk.END)
         self.app.update_data(data_for_preprocessing)
 
-    def apply_preprocessing_operation(self, params, img):
+    def apply_preprocessing_operation(self, params, img, option=None):
+        option = self.selected_preprocess_option if option is None else option
 
-        if self.selected_preprocess_option in preprocess_operations:
-            process_function = preprocess_operations[self.selected_preprocess_option]
-            process_name, result_image = process_function(params, img)
+        if option in preprocess_operations:
+            process_function = preprocess_operations[option]
+            if option in interactive_operations:
+                process_name, result_image = process_function(params, img)
+            else:
+                process_name, result_image = self.operation_cache.get_or_compute(
+                    option, params, img, lambda: process_function(params, img)
+                )
         else:
-            msg = f"Invalid preprocessing option: {self.selected_preprocess_option}"
+            msg = f"Invalid preprocessing option: {option}"
             logger.error(msg)
             raise ValueError(msg)
             
         return result_image, process_name
     
+    def create_recipe_ui(self):
+        """Create widgets to build, save, load and run a preprocessing recipe."""
+        self.recipe_section_frame = ttk.Frame(self.preprocessing_tab, padding="3")
+        self.recipe_section_frame.grid(row=2, column=5, rowspan=3, columnspan=2, padx=5, pady=2, sticky="nsew")
+
+        recipe_label = tk.Label(self.recipe_section_frame, text="Recipe:")
+        recipe_label.grid(row=0, column=0, padx=5, pady=1, sticky="w")
+
+        self.recipe_listbox = tk.Listbox(self.recipe_section_frame, height=5)
+        self.recipe_listbox.grid(row=1, column=0, rowspan=3, columnspan=2, padx=5, pady=2, sticky="nsew")
+
+        buttons = [
+            ("Add Step", self.add_recipe_step_onClick),
+            ("Clear", self.clear_recipe_onClick),
+            ("Save", self.save_recipe_onClick),
+            ("Load", self.load_recipe_onClick),
+        ]
+        for row, (text, command) in enumerate(buttons):
+            button = tk.Button(self.recipe_section_frame, text=text, width=8, command=command)
+            button.grid(row=row, column=2, padx=5, pady=1, sticky="w")
+
+        self.run_recipe_button = tk.Button(self.recipe_section_frame, text="Run on All", command=self.run_recipe_onClick)
+        self.run_recipe_button.grid(row=4, column=0, padx=5, pady=2, sticky="w")
+        self.cancel_recipe_button = tk.Button(self.recipe_section_frame, text="Cancel", state=tk.DISABLED, command=self.cancel_recipe_onClick)
+        self.cancel_recipe_button.grid(row=4, column=1, padx=5, pady=2, sticky="w")
+
+        self.recipe_progressbar = ttk.Progressbar(self.recipe_section_frame, orient=tk.HORIZONTAL, mode="determinate", length=150)
+        self.recipe_progressbar.grid(row=5, column=0, columnspan=2, padx=5, pady=2, sticky="ew")
+        self.recipe_progress_label = tk.Label(self.recipe_section_frame, text="")
+        self.recipe_progress_label.grid(row=5, column=2, padx=5, pady=2, sticky="w")
+
+    def refresh_recipe_listbox(self):
+        self.recipe_listbox.delete(0, tk.END)
+        for i, step in enumerate(self.recipe, start=1):
+            self.recipe_listbox.insert(tk.END, f"{i}. {step['operation']}")
+
+    def add_recipe_step_onClick(self):
+        """Add the selected operation with the current parameters to the recipe."""
+        if self.selected_preprocess_option is None:
+            return  # No option selected
+        params = {}
+        self.get_values_from_preprocess_menu_items(params)
+        try:
+            self.recipe.add_step(self.selected_preprocess_option, params)
+        except ValueError as e:
+            messagebox.showerror("Recipe", str(e))
+            return
+        self.refresh_recipe_listbox()
+
+    def clear_recipe_onClick(self):
+        self.recipe.clear()
+        self.refresh_recipe_listbox()
+
+    def save_recipe_onClick(self):
+        file_name = filedialog.asksaveasfilename(
+            title="Save recipe",
+            defaultextension=".json",
+            filetypes=[("Recipe", "*.json")]
+        )
+        if not file_name:
+            return
+        try:
+            self.recipe.save(file_name)
+        except OSError as e:
+            error_msg = f"Error saving recipe: {e}"
+            logger.error(error_msg)
+            messagebox.showerror("Recipe", error_msg)
+
+    def load_recipe_onClick(self):
+        file_name = filedialog.askopenfilename(
+            title="Load recipe",
+            filetypes=[("Recipe", "*.json")]
+        )
+        if not file_name:
+            return
+        try:
+            self.recipe = PreprocessingRecipe.load(file_name)
+        except (OSError, ValueError, KeyError) as e:
+            error_msg = f"Error loading recipe: {e}"
+            logger.error(error_msg)
+            messagebox.showerror("Recipe", error_msg)
+            return
+        self.refresh_recipe_listbox()
+
+    def run_recipe_onClick(self):
+        """
+        Run the recipe on every entry in a background thread.
+
+        The operations are appended to the entries only when all of them are processed,
+        so a cancelled run leaves the data unchanged. Entries replaced meanwhile, e.g. by
+        loading other files, are left unchanged and reported.
+        """
+        if self.recipe_queue is not None:
+            return  # Already running
+        if not len(self.recipe):
+            messagebox.showinfo("Recipe", "The recipe has no steps.")
+            return
+        if not data_for_preprocessing:
+            messagebox.showinfo("Recipe", "No data loaded.")
+            return
+
+        items = list(data_for_preprocessing)
+        self.recipe_items = items
+        self.recipe_queue = queue.Queue()
+        self.recipe_cancel_event = threading.Event()
+        self.recipe_results = []
+        self.recipe_failures = []
+        self.recipe_progressbar.config(maximum=len(items), value=0)
+        self.recipe_progress_label.config(text=f"0/{len(items)}")
+        self.run_recipe_button.config(state=tk.DISABLED)
+        self.cancel_recipe_button.config(state=tk.NORMAL)
+
+        threading.Thread(
+            target=run_recipe_in_background,
+            args=(PreprocessingRecipe(self.recipe.steps), items, DEFAULT_RECIPE_WORKERS, self.recipe_queue, self.recipe_cancel_event),
+            daemon=True
+        ).start()
+        self.preprocessing_tab.after(RECIPE_POLL_INTERVAL_MS, self.check_recipe_results)
+
+    def cancel_recipe_onClick(self):
+        if self.recipe_cancel_event is not None:
+            self.recipe_cancel_event.set()
+
+    def check_recipe_results(self):
+        """Collect recipe results computed in the background and finish when all are done."""
+        try:
+            while True:
+                item = self.recipe_queue.get_nowait()
+                if item is None:
+                    self.finish_recipe_run()
+                    return
+                index, operations, error = item
+                if error is None:
+                    self.recipe_results.append((index, operations))
+                else:
+                    self.recipe_failures.append(f"{get_filename_at_index(self.recipe_items, index)} ({index + 1}): {error}")
+                done = len(self.recipe_results) + len(self.recipe_failures)
+                self.recipe_progressbar.config(value=done)
+                self.recipe_progress_label.config(text=f"{done}/{int(self.recipe_progressbar.cget('maximum'))}")
+        except queue.Empty:
+            pass
+        self.preprocessing_tab.after(RECIPE_POLL_INTERVAL_MS, self.check_recipe_results)
+
+    def finish_recipe_run(self):
+        """Store the recipe results like operations applied manually."""
+        cancelled = self.recipe_cancel_event.is_set()
+        self.recipe_queue = None
+        self.recipe_cancel_event = None
+        self.run_recipe_button.config(state=tk.NORMAL)
+        self.cancel_recipe_button.config(state=tk.DISABLED)
+
+        items = self.recipe_items
+        self.recipe_items = []
+        if cancelled:
+            self.recipe_results = []
+            self.recipe_progress_label.config(text="Cancelled")
+            return
+
+        stale = []
+        for index, operations in self.recipe_results:
+            if index < len(data_for_preprocessing) and data_for_preprocessing[index] is items[index]:
+                for operation in operations:
+                    insert_operation_at_index(data_for_preprocessing, index, operation)
+            else:
+                stale.append(f"{get_filename_at_index(items, index)} ({index + 1})")
+        self.recipe_results = []
+        if stale:
+            self.recipe_failures.append("Data changed during the run, not updated: " + ", ".join(stale))
+
+        self.refresh_data_in_operations_listbox()
+        self.app.update_data(data_for_preprocessing)
+        if self.recipe_failures:
+            messagebox.showwarning("Recipe", "The recipe failed for some entries:\n" + "\n".join(self.recipe_failures))
+
     def get_values_from_preprocess_menu_items(self, params):
         option = self.selected_preprocess_option
+        params['precision'] = self.precision_var.get()
 
         def add_odd_value(slider):
             value = slider.get()
@@ -585,6 +806,7 @@ class PreprocessingTab:
                 'order': self.parameter_preprocess_sliders[0].get(),
             }),
             "Adaptive Leveling": lambda: params.update({
+                'method': self.selected_option_var.get(),
                 'disk_size': self.parameter_preprocess_sliders[0].get(),
             }),
             "Local Median Filter": lambda: params.update({
@@ -647,17 +869,25 @@ class PreprocessingTab:
             except ValueError:
                 params[param_name] = entry.get()
 
-    def get_image_based_on_selected_file_in_listbox(self, index, focuse_widget):
+    def get_image_based_on_selected_file_in_listbox(self, index, focuse_widget, params=None):
         img = None
+        float_precision = params is not None and is_float_precision(params)
         if focuse_widget == self.data_listbox_preprocessing:
-            img = get_greyscale_image_at_index(data_for_preprocessing, index)
+            if float_precision:
+                img = get_float_image_at_index(data_for_preprocessing, index)
+            else:
+                img = get_greyscale_image_at_index(data_for_preprocessing, index)
         elif focuse_widget == self.operations_listbox:
             operations_selected_index = self.operations_listbox.curselection()
             operations_index = int(operations_selected_index[0])
-            img = Image.fromarray(get_preprocessed_image_data_at_index(data_for_preprocessing, index, operations_index))
+            if float_precision:
+                img = get_preprocessed_data_at_index(data_for_preprocessing, index, operations_index)
+            else:
+                img = Image.fromarray(get_preprocessed_image_data_at_index(data_for_preprocessing, index, operations_index))
         return img
 
     def show_operations_image_listboxOnSelect(self, event=None):
+        self.preview_scheduler.cancel()
         try:
             operations_selected_index = self.operations_listbox.curselection()
             operations_index = int(operations_selected_index[0])
@@ -724,17 +954,45 @@ class PreprocessingTab:
     def dropdown_onChange(self, event=None):
         self.process_and_display_image()
 
+    def precision_onChange(self):
+        if self.selected_preprocess_option is not None:
+            self.process_and_display_image()
+
     def process_and_display_image(self):
+        """
+        Preview the selected operation with the current parameters.
+
+        Widget values are read here; the operation runs in the background and only the
+        result of the latest request is displayed. Interactive operations run directly.
+        """
         params = {}
         index = self.current_data_index
         focuse_widget = self.root.focus_get()
-        img = self.get_image_based_on_selected_file_in_listbox(index, focuse_widget)
+        option = self.selected_preprocess_option
 
         original_img = get_greyscale_image_at_index(data_for_preprocessing, index)
 
         self.get_values_from_preprocess_menu_items(params)
-        result_image, _ = self.apply_preprocessing_operation(params, img)
-        if isinstance(result_image, np.ndarray):
-            result_image = Image.fromarray(result_image)
-        img = concatenate_two_images(result_image, original_img)
-        self.handle_displaying_image_on_canvas(img)
\ No newline at end of file
+        img = self.get_image_based_on_selected_file_in_listbox(index, focuse_widget, params)
+
+        def create_preview():
+            result_image, _ = self.apply_preprocessing_operation(params, img, option)
+            if isinstance(result_image, np.ndarray):
+                result_image = Image.fromarray(quantize_image(result_image))
+            return concatenate_two_images(result_image, original_img)
+
+        if option in interactive_operations:
+            self.preview_scheduler.cancel()
+            self.handle_displaying_image_on_canvas(create_preview())
+        else:
+            self.preview_scheduler.schedule(create_preview, self.handle_displaying_image_on_canvas)
+
+def run_recipe_in_background(recipe, items, max_workers, result_queue, cancel_event):
+    """Run a recipe on the entries and put the results in result_queue, followed by None."""
+    try:
+        for item in iter_recipe_results(recipe, items, max_workers, cancel_event):
+            result_queue.put(item)
+    except Exception as e:
+        logger.error(f"run_recipe_in_background: An unexpected error occurred: {e}")
+    finally:
+        result_queue.put(None)
@@ -0,0 +1,105 @@
+# -*- coding: utf-8 -*-
+"""
+Scheduler for slider-driven previews.
+
+Rapid slider events are coalesced, the latest request is computed on a
+worker thread and its result is handed back to the Tk event loop with after().
+Results of requests superseded by a newer one are discarded.
+
+@author: rlewandkow
+"""
+
+import os, sys
+
+sys.path.insert(1, "/".join(os.path.realpath(__file__).split("/")[0:-2]))
+
+import logging
+
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+# Delay (ms) after the last slider event before a preview is computed
+PREVIEW_DEBOUNCE_MS = 60
+
+# Interval (ms) for checking if a preview computed in the background is ready
+PREVIEW_POLL_INTERVAL_MS = 15
+
+class PreviewScheduler:
+    """
+    Debounced, cancellable background execution of previews for one tab.
+
+    The compute callable runs on a worker thread and must not use Tk; read widget
+    values on the Tk thread before scheduling. The done callback runs on the Tk thread.
+
+    Attributes:
+        widget (tk.Widget): Widget whose after() is used to run callbacks on the Tk thread.
+        delay_ms (int): Debounce delay.
+    """
+    def __init__(self, widget, delay_ms=PREVIEW_DEBOUNCE_MS):
+        self.widget = widget
+        self.delay_ms = delay_ms
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="preview")
+        self._generation = 0
+        self._pending_after_id = None
+        self._request = None
+
+    def schedule(self, compute, on_done, on_error=None):
+        """
+        Request a preview, replacing any request that has not finished yet.
+
+        Args:
+            compute (callable): Called without arguments on the worker thread; returns the result.
+            on_done (callable): Called with the result on the Tk thread.
+            on_error (callable, optional): Called with the exception on the Tk thread.
+                By default the error is logged.
+        """
+        self._generation += 1
+        self._request = (self._generation, compute, on_done, on_error)
+        if self._pending_after_id is not None:
+            self.widget.after_cancel(self._pending_after_id)
+        self._pending_after_id = self.widget.after(self.delay_ms, self._submit)
+
+    def cancel(self):
+        """Drop the pending request and discard the result of the running one."""
+        self._generation += 1
+        self._request = None
+        if self._pending_after_id is not None:
+            self.widget.after_cancel(self._pending_after_id)
+            self._pending_after_id = None
+
+    def is_current(self, generation):
+        return generation == self._generation
+
+    def _submit(self):
+        self._pending_after_id = None
+        if self._request is None:
+            return
+        generation, compute, on_done, on_error = self._request
+        self._request = None
+        future = self._executor.submit(self._run, generation, compute)
+        self.widget.after(PREVIEW_POLL_INTERVAL_MS, self._check, generation, future, on_done, on_error)
+
+    def _run(self, generation, compute):
+        # A newer request arrived while this one was queued
+        if not self.is_current(generation):
+            return None
+        return compute()
+
+    def _check(self, generation, future, on_done, on_error):
+        if not future.done():
+            self.widget.after(PREVIEW_POLL_INTERVAL_MS, self._check, generation, future, on_done, on_error)
+            return
+        if not self.is_current(generation):
+            return  # Stale result
+        error = future.exception()
+        if error is None:
+            on_done(future.result())
+        elif on_error is not None:
+            on_error(error)
+        else:
+            logger.error(f"PreviewScheduler: Error computing preview: {error}")
+
+    def shutdown(self):
+        self.cancel()
+        self._executor.shutdown(wait=False)
@@ -118,4 +118,7 @@ process_operations = {
     "Remove Small Objects": perform_removing_small_objects,
     "Manual Erase": perform_manual_white_remove,
     "Binary Threshold": perform_binary_threshold
-}
\ No newline at end of file
+}
+
+# Operations asking the user for input; their results depend on more than params and image
+interactive_operations = ("Manual Erase",)
\ No newline at end of file
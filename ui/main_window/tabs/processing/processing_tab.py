@@ -13,7 +13,7 @@ sys.path.insert(1, "/".join(os.path.realpath(__file__).split("/")[0:-2]))
 import tkinter as tk
 import numpy as np
 from tkinter import ttk
-from PIL import Image, ImageTk
+from PIL import Image
 
 from ui.main_window.tabs.processing.processing_data import (
     data_for_processing,
@@ -40,14 +40,15 @@ from data.processing.img_process import (
     concatenate_two_images
 )
 
-from ui.main_window.tabs.canvas_operations import (
-    scale_factor_resize_image
-)
+from ui.main_window.tabs.canvas_operations import CanvasImageRenderer
+from ui.main_window.tabs.operation_cache import OperationCache
+from ui.main_window.tabs.preview_scheduler import PreviewScheduler
 
 from ui.main_window.tabs.processing.process_params_default import process_params
 from ui.main_window.tabs.processing.process_options_config import (
     options_config,
-    process_operations
+    process_operations,
+    interactive_operations
 )
 
 from ui.main_window.tabs.processing.processing_operations import create_process_operation
@@ -68,6 +69,11 @@ class ProcessingTab:
 
         self.selected_process_option = None
 
+        # Results of previewed operations, so revisited slider values are not recomputed
+        self.operation_cache = OperationCache()
+        # Previews for slider changes, computed in the background
+        self.preview_scheduler = PreviewScheduler(self.root)
+
         self.load_params()
 
         self.create_processing_tab()
@@ -174,6 +180,7 @@ class ProcessingTab:
         self.update_navigation_slider_range()
     
     def show_data_onDataListboxSelect(self, event):
+        self.preview_scheduler.cancel()
         # Get the index of the selected filename
         selected_index = self.data_listbox_processing.curselection()
         if selected_index:
@@ -202,17 +209,8 @@ class ProcessingTab:
     def handle_displaying_image_on_canvas(self, img):
         # Retrieve the scale factor
         scale_factor = self.scale_factor_var.get()
-        # Resize the image
-        img = scale_factor_resize_image(img, scale_factor)
-
-        # Convert the PIL image to a Tkinter PhotoImage
-        photo = ImageTk.PhotoImage(img)
-
-        # Display the image on the canvas
-        self.data_canvas_processing.create_image(0, 0, anchor="nw", image=photo)
-
-        # Save a reference to the PhotoImage to prevent garbage collection
-        self.data_canvas_processing.image = photo
+        # Display the visible part of the scaled image on the canvas
+        self.canvas_renderer.display(img, scale_factor)
     
     def update_navigation_slider_range(self):
         num_items = len(self.data_listbox_processing.get(0, tk.END))
@@ -272,6 +270,10 @@ class ProcessingTab:
             )
         self.horizontal_scrollbar_processing.grid(row=2, column=2, sticky="ew")
         self.data_canvas_processing.configure(xscrollcommand=self.horizontal_scrollbar_processing.set)
+
+        # Render only the visible part of the image, again when the view moves
+        self.canvas_renderer = CanvasImageRenderer(self.data_canvas_processing)
+        self.canvas_renderer.bind_scrollbars(self.horizontal_scrollbar_processing, self.vertical_scrollbar_processing)
         
         # Bind event for canvas resizing
         self.data_canvas_processing.bind("<Configure>", self.resize_canvas_detection_scrollregion)
@@ -345,7 +347,7 @@ class ProcessingTab:
             logger.error(error_msg)
 
     def resize_canvas_detection_scrollregion(self, event=None):
-        self.data_canvas_processing.config(scrollregion=self.data_canvas_processing.bbox("all"))
+        self.data_canvas_processing.config(scrollregion=self.canvas_renderer.scrollregion())
 
     def display_header_info_labels(self):
         try:
@@ -492,6 +494,7 @@ class ProcessingTab:
     def apply_processing_onClick(self):
         if self.selected_process_option is None:
             return  # No option selected
+        self.preview_scheduler.cancel()
         params = {}
         index = self.current_data_index
         focuse_widget = self.root.focus_get()
@@ -517,13 +520,19 @@ class ProcessingTab:
         self.operations_listbox.selection_set(tk.END)
         self.app.update_data(data_for_processing)
 
-    def apply_processing_operation(self, params, img):
+    def apply_processing_operation(self, params, img, option=None):
+        option = self.selected_process_option if option is None else option
 
-        if self.selected_process_option in process_operations:
-            process_function = process_operations[self.selected_process_option]
-            process_name, result_image = process_function(params, img)
+        if option in process_operations:
+            process_function = process_operations[option]
+            if option in interactive_operations:
+                process_name, result_image = process_function(params, img)
+            else:
+                process_name, result_image = self.operation_cache.get_or_compute(
+                    option, params, img, lambda: process_function(params, img)
+                )
         else:
-            msg = f"Invalid preprocessing option: {self.selected_process_option}"
+            msg = f"Invalid preprocessing option: {option}"
             logger.error(msg)
             raise ValueError(msg)
             
@@ -540,6 +549,7 @@ class ProcessingTab:
         return img
 
     def show_operations_image_listboxOnSelect(self, event=None):
+        self.preview_scheduler.cancel()
         try:
             operations_selected_index = self.operations_listbox.curselection()
             operations_index = int(operations_selected_index[0])
@@ -606,19 +616,33 @@ class ProcessingTab:
         self.process_and_display_image()
 
     def process_and_display_image(self):
+        """
+        Preview the selected operation with the current parameters.
+
+        Widget values are read here; the operation runs in the background and only the
+        result of the latest request is displayed. Interactive operations run directly.
+        """
         params = {}
         index = self.current_data_index
         focuse_widget = self.root.focus_get()
+        option = self.selected_process_option
         img = self.get_image_based_on_selected_file_in_listbox(index, focuse_widget)
 
         original_img = get_greyscale_image_at_index(data_for_processing, index)
 
         self.get_values_from_process_menu_items(params)
-        result_image, _ = self.apply_processing_operation(params, img)
-        if isinstance(result_image, np.ndarray):
-            result_image = Image.fromarray(result_image)
-        img = concatenate_two_images(result_image, original_img)
-        self.handle_displaying_image_on_canvas(img)
+
+        def create_preview():
+            result_image, _ = self.apply_processing_operation(params, img, option)
+            if isinstance(result_image, np.ndarray):
+                result_image = Image.fromarray(result_image)
+            return concatenate_two_images(result_image, original_img)
+
+        if option in interactive_operations:
+            self.preview_scheduler.cancel()
+            self.handle_displaying_image_on_canvas(create_preview())
+        else:
+            self.preview_scheduler.schedule(create_preview, self.handle_displaying_image_on_canvas)
 
     def get_values_from_process_menu_items(self, params):
         option = self.selected_process_option
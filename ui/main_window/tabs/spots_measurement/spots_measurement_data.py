@@ -10,9 +10,7 @@ import os, sys
 
 sys.path.insert(1, "/".join(os.path.realpath(__file__).split("/")[0:-2]))
 
-from data.processing.data_process import (
-    convert_data_to_greyscale_image
-)
+from ui.main_window.tabs.frame_store import FrameEntry, frame_store
 
 data_for_measurement = []
 measured_data = []
@@ -27,26 +25,25 @@ def insert_data(file_ext, item):
     if file_ext.lower() == "stp" or file_ext.lower() == "s94":
         filename_only = os.path.basename(item['file_name'])
         data_name.append(filename_only)
-        data_for_measurement.append({
+        frame = frame_store.add_frame(item['file_name'], None, item['data'])
+        data_for_measurement.append(FrameEntry(frame, {
                 "file_name": item['file_name'],
                 "header_info": item['header_info'],
-                "data": item['data'],
-                "greyscale_image": convert_data_to_greyscale_image(item['data']),
+                "data": frame.data,
                 "operations": []
-            })
+            }))
     elif file_ext.lower() == "mpp":
         filename_only = os.path.basename(item['file_name'])
-        for i, frame in enumerate(item['data'], start=1):
-            frame_name = f"frame {i}"
+        for frame in frame_store.add_scan(file_ext, item):
+            frame_name = f"frame {frame.frame_number}"
             data_name.append(frame_name)
-            data_for_measurement.append({
+            data_for_measurement.append(FrameEntry(frame, {
                 "file_name": item['file_name'],
-                "frame_number": i,
+                "frame_number": frame.frame_number,
                 "header_info": item['header_info'],
-                "data": frame,
-                "greyscale_image": convert_data_to_greyscale_image(frame),
+                "data": frame.data,
                 "operations": []
-                })
+                }))
     return data_name 
 
 def insert_formatted_data(file_ext, data):
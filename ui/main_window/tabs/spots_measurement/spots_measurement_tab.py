@@ -14,7 +14,7 @@ import tkinter as tk
 import cv2
 import numpy as np
 from tkinter import ttk
-from PIL import Image, ImageTk
+from PIL import Image
 import copy
 from collections import defaultdict
 from tkinter import filedialog
@@ -26,6 +26,7 @@ from ui.main_window.tabs.spots_measurement.spots_measurement_data import (
     clear_measurement_data,
     insert_formatted_data
 )
+from ui.main_window.tabs.frame_store import create_frame_entry
 
 from ui.main_window.tabs.tabs_data import (
     get_filename_at_index,
@@ -45,9 +46,7 @@ from data.processing.img_process import (
     concatenate_two_images
 )
 
-from ui.main_window.tabs.canvas_operations import (
-    scale_factor_resize_image
-)
+from ui.main_window.tabs.canvas_operations import CanvasImageRenderer
 
 from data.processing.file_process import (
     calculate_avg_nm_per_px, 
@@ -293,13 +292,8 @@ class SpotsMeasurementTab:
             self.data_listbox_measurement.insert(tk.END, *data_name)
 
             for name, item in zip(data_name, data_for_measurement):
-                img_for_analisys = item['greyscale_image']
-                if item['operations']:
-                    img_for_analisys = Image.fromarray(item['operations'][-1]['processed_image'])
-                measured_data.append({
+                entry = {
                     'name': name,
-                    'original_image': item['greyscale_image'],
-                    'image': img_for_analisys,
                     'labeled_image': None,
                     'labeled_overlays': None,
                     'labeled_overlays_white': None,
@@ -308,7 +302,13 @@ class SpotsMeasurementTab:
                     'labels_names': None,
                     'nearest_neighbor_distances': None,
                     'nearest_neighbor_name': None
-                })
+                }
+                # Greyscale images are created by the frame store on first use
+                greyscale_keys = ('original_image', 'image')
+                if item['operations']:
+                    greyscale_keys = ('original_image',)
+                    entry['image'] = Image.fromarray(item['operations'][-1]['processed_image'])
+                measured_data.append(create_frame_entry(item, entry, greyscale_keys))
         else:
             # file_ext = data[0]['file_name'][-3:]
             names = []
@@ -320,10 +320,8 @@ class SpotsMeasurementTab:
             self.data_listbox_measurement.insert(tk.END, *names)
 
             for name, item in zip(names, data_for_measurement):
-                measured_data.append({
+                measured_data.append(create_frame_entry(item, {
                     'name': name,
-                    'original_image': item['greyscale_image'],
-                    'image': item['greyscale_image'],
                     'labeled_image': None,
                     'labeled_overlays': None,
                     'labeled_overlays_white': None,
@@ -332,7 +330,7 @@ class SpotsMeasurementTab:
                     'areas': None,
                     'nearest_neighbor_distances': None,
                     'nerest_neighbor_name': None
-                })
+                }, ('original_image', 'image')))
 
         self.update_navigation_slider_range()
     
@@ -416,15 +414,8 @@ class SpotsMeasurementTab:
     def handle_displaying_image_on_canvas(self, img, text=None):
         # Retrieve the scale factor
         scale_factor = self.scale_factor_var.get()
-        # Resize the image
-        img = scale_factor_resize_image(img, scale_factor)
-
-        # Convert the PIL image to a Tkinter PhotoImage
-        image_width, image_height = img.size
-        photo = ImageTk.PhotoImage(img)
-
-        # Display the image on the canvas
-        self.data_canvas_processing.create_image(0, 0, anchor="nw", image=photo)
+        # Display the visible part of the scaled image on the canvas
+        _, image_height = self.canvas_renderer.display(img, scale_factor)
         if text:
             self.data_canvas_processing.create_text(
                 20, 
@@ -435,9 +426,6 @@ class SpotsMeasurementTab:
                 fill="black"
             )
 
-        # Save a reference to the PhotoImage to prevent garbage collection
-        self.data_canvas_processing.image = photo
-
     def update_navigation_slider_range(self):
         num_items = len(self.data_listbox_processing.get(0, tk.END))
         self.navigation_slider.config(from_=1, to=num_items)
@@ -496,6 +484,10 @@ class SpotsMeasurementTab:
             )
         self.horizontal_scrollbar_processing.grid(row=2, column=4, sticky="ew")
         self.data_canvas_processing.configure(xscrollcommand=self.horizontal_scrollbar_processing.set)
+
+        # Render only the visible part of the image, again when the view moves
+        self.canvas_renderer = CanvasImageRenderer(self.data_canvas_processing)
+        self.canvas_renderer.bind_scrollbars(self.horizontal_scrollbar_processing, self.vertical_scrollbar_processing)
         
         # Bind event for canvas resizing
         self.data_canvas_processing.bind("<Configure>", self.resize_canvas_detection_scrollregion)
@@ -569,7 +561,7 @@ class SpotsMeasurementTab:
             logger.error(error_msg)
 
     def resize_canvas_detection_scrollregion(self, event=None):
-        self.data_canvas_processing.config(scrollregion=self.data_canvas_processing.bbox("all"))
+        self.data_canvas_processing.config(scrollregion=self.canvas_renderer.scrollregion())
 
     def display_header_info_labels(self):
         try:
@@ -10,6 +10,8 @@ import os, sys
 
 sys.path.insert(1, "/".join(os.path.realpath(__file__).split("/")[0:-2]))
 
+from data.processing.data_process import scale_data_to_image_range
+
 def get_file_extension(data):
     file_ext = data[0]['file_name'][-3:]
     return file_ext
@@ -79,6 +81,15 @@ def get_preprocessed_image_data_at_index(data, img_index, operation_index):
     img = data[img_index]['operations'][operation_index]['processed_image']
     return img
 
+def get_preprocessed_data_at_index(data, img_index, operation_index):
+    """Full precision result of an operation, or its image if it was computed in uint8."""
+    operation = data[img_index]['operations'][operation_index]
+    return operation.get('processed_data', operation['processed_image'])
+
+def get_float_image_at_index(data, index):
+    """Original data scaled to the 0-255 range of the greyscale image, as float64."""
+    return scale_data_to_image_range(data[index]['original_data'])
+
 def insert_operation_at_index(data, index, operation):
     data[index]['operations'].append(operation)
 